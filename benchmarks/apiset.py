@@ -0,0 +1,109 @@
+"""
+Time building and changing an `APISet`, against the duplicate checks it used to
+make by scanning the list, and then removing, replacing and checking for items in
+the middle of it
+
+    python benchmarks/apiset.py [count ...]
+"""
+
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import sys
+import time
+
+# DocumentCloud
+from documentcloud.base import APISet
+
+# the old checks take quadratic time, so they are only timed up to this many items
+LIST_MAX = 10000
+# how many items are removed, replaced and checked for
+CHANGES = 200
+
+
+class Item(object):
+    __slots__ = ("id",)
+
+    def __init__(self, id_):
+        self.id = id_
+
+
+def list_set(items):
+    """Build a list checking for duplicates as `APISet` used to"""
+    ids = [item.id for item in items]
+    for id_ in ids:
+        if ids.count(id_) > 1:
+            raise ValueError(id_)
+    items = list(items)
+    for id_ in range(len(items), len(items) + 100):
+        if id_ in [i.id for i in items]:
+            raise ValueError(id_)
+        items.append(Item(id_))
+    return items
+
+
+def api_set(items):
+    items = APISet(items, Item)
+    for id_ in range(len(items), len(items) + 100):
+        items.append(Item(id_))
+    return items
+
+
+def measure(build, items):
+    start = time.time()
+    build(items)
+    return time.time() - start
+
+
+def middle(items):
+    """`CHANGES` items spread over the middle half of `items`"""
+    step = max(len(items) // (2 * CHANGES), 1)
+    return items[len(items) // 4 :: step][:CHANGES]
+
+
+def remove(items):
+    for item in middle(list(items)):
+        items.remove(item)
+
+
+def replace(items):
+    for index, item in enumerate(middle(list(items))):
+        items[items.index(item)] = Item(-index - 1)
+
+
+def contains(items):
+    for item in middle(list(items)):
+        assert item in items
+
+
+def main(*counts):
+    counts = counts or (10000, 100000, 1000000)
+    print("Building a set of items and appending 100 more")
+    print("{:>10} {:>10} {:>10}".format("items", "APISet", "list"))
+    for count in counts:
+        items = [Item(i) for i in range(count)]
+        indexed = measure(api_set, items)
+        if count <= LIST_MAX:
+            scanned = "{:.3f}s".format(measure(list_set, items))
+        else:
+            scanned = "skipped"
+        print("{:>10,} {:>9.3f}s {:>10}".format(count, indexed, scanned))
+
+    print()
+    print("Removing, replacing and checking for {} items".format(CHANGES))
+    print("{:>10} {:>10} {:>10} {:>10}".format("items", "remove", "replace", "in"))
+    for count in counts:
+        items = [Item(i) for i in range(count)]
+        print(
+            "{:>10,} {:>9.3f}s {:>9.3f}s {:>9.3f}s".format(
+                count,
+                measure(remove, APISet(items, Item)),
+                measure(replace, APISet(items, Item)),
+                measure(contains, APISet(items, Item)),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,73 @@
+"""
+Compare how quickly timestamps from the API are parsed by dateutil and by
+`documentcloud.toolbox.parse_date`
+
+    python benchmarks/dates.py [count]
+"""
+
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Third Party
+from dateutil.parser import parse as dateparser
+
+# DocumentCloud
+from documentcloud import toolbox
+
+
+class PatternDatetime(datetime):
+    """Skips fromisoformat, to time the regular expression used on older Pythons"""
+
+    @classmethod
+    def fromisoformat(cls, date_string):
+        raise ValueError
+
+
+def timestamps(count):
+    start = datetime(2010, 1, 1)
+    return [
+        (start + timedelta(seconds=random.randint(0, 10**9))).strftime(
+            "%Y-%m-%dT%H:%M:%S.%fZ"
+        )
+        for _ in range(count)
+    ]
+
+
+def measure(name, parse, values):
+    start = time.time()
+    for value in values:
+        parse(value)
+    elapsed = time.time() - start
+    print(
+        "{:<24} {:>8.3f}s {:>12,.0f} per second".format(
+            name, elapsed, len(values) / elapsed
+        )
+    )
+    return elapsed
+
+
+def main(count=100000):
+    values = timestamps(count)
+    print("Parsing {:,} timestamps".format(count))
+    baseline = measure("dateutil", dateparser, values)
+    fast = measure("parse_date", toolbox.parse_date, values)
+    toolbox.datetime = PatternDatetime
+    try:
+        pattern = measure("parse_date (pattern)", toolbox.parse_date, values)
+    finally:
+        toolbox.datetime = datetime
+    print(
+        "parse_date is {:.1f}x faster, {:.1f}x with the pattern".format(
+            baseline / fast, baseline / pattern
+        )
+    )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
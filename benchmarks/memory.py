@@ -0,0 +1,88 @@
+"""
+Compare how much memory a `Document` and a `CompactDocument` take, with and without
+the values of their fields, which both keep
+
+    python benchmarks/memory.py [count]
+"""
+
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import gc
+import json
+import sys
+import tracemalloc
+
+# DocumentCloud
+from documentcloud.documents import CompactDocument, Document
+
+# a document as the API lists it
+DOCUMENT = {
+    "id": 10000637,
+    "access": "private",
+    "asset_url": "https://assets.documentcloud.org/",
+    "canonical_url": "https://www.documentcloud.org/documents/10000637-test",
+    "created_at": "2020-06-11T02:15:49.489996Z",
+    "data": {"_tag": ["document"]},
+    "description": "A simple test document",
+    "edit_access": True,
+    "language": "eng",
+    "organization": 11343,
+    "page_count": 1,
+    "page_spec": "612.0x792.0:0",
+    "projects": [100340],
+    "published_url": "https://www.example.com/article/test.pdf",
+    "related_article": "https://www.example.com/article/",
+    "slug": "test",
+    "source": "DocumentCloud",
+    "status": "success",
+    "title": "Test",
+    "updated_at": "2020-06-11T02:15:53.618313Z",
+    "user": 100098,
+}
+
+
+def measure(resource, count):
+    """Bytes per object, including the fields' values"""
+    payload = json.dumps(DOCUMENT)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    documents = [resource(None, json.loads(payload)) for _ in range(count)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del documents
+    return (after - before) / count
+
+
+def own_size(resource):
+    """Bytes for the object itself and its dictionary, without the fields' values"""
+    document = resource(None, dict(DOCUMENT))
+    size = sys.getsizeof(document)
+    if hasattr(document, "__dict__"):
+        size += sys.getsizeof(document.__dict__)
+    return size
+
+
+def main(count=100000):
+    print("Keeping {:,} documents".format(count))
+    print("{:<16} {:>14} {:>14}".format("", "with values", "without"))
+    sizes = {}
+    for resource in (Document, CompactDocument):
+        sizes[resource] = measure(resource, count)
+        print(
+            "{:<16} {:>8,.0f} bytes {:>8,.0f} bytes".format(
+                resource.__name__, sizes[resource], own_size(resource)
+            )
+        )
+    print(
+        "CompactDocument takes {:.0%} of the memory".format(
+            sizes[CompactDocument] / sizes[Document]
+        )
+    )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -1,6 +1,12 @@
 # Local
 from .annotations import Annotation, Location
 from .client import DocumentCloud
-from .documents import Document, DocumentClient, Mention
+from .documents import (
+    CompactDocument,
+    CompactDocumentClient,
+    Document,
+    DocumentClient,
+    Mention,
+)
 from .projects import Project, ProjectClient
 from .sections import Section
@@ -0,0 +1,937 @@
+"""
+An asyncio interface for the DocumentCloud API
+
+It mirrors the blocking interface, except every method which talks to the network
+is a coroutine.  It requires the optional `httpx` dependency, which can be
+installed with `pip install documentcloud[async]`
+"""
+
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import asyncio
+import logging
+import time
+from functools import partial
+
+# Third Party
+import httpx
+
+try:
+    from urllib.parse import urlparse
+except ImportError:  # pragma: no cover
+    from urlparse import urlparse
+
+# Local
+from .annotations import Annotation, AnnotationClient
+from .base import APISet, BaseAPIClient, ChildAPIClient, LazyChildClient, LazyResults
+from .changes import ChangeFeed
+from .client import get_rate_limiter
+from .constants import AUTH_URI, BASE_URI, BULK_LIMIT, TIMEOUT, TOKEN_REFRESH_MARGIN
+from .documents import BaseDocument, Document, DocumentClient
+from .exceptions import (
+    APIError,
+    CredentialsFailedError,
+    DoesNotExistError,
+    MultipleObjectsReturnedError,
+)
+from .organizations import Organization
+from .projects import Project, ProjectClient
+from .retry import RetryPolicy
+from .sections import Section, SectionClient
+from .tokencache import get_token_cache
+from .toolbox import (
+    clock_skew,
+    field_params,
+    get_id,
+    grouper,
+    merge_dicts,
+    token_expiry,
+)
+from .transport import pool_options
+from .users import User
+
+logger = logging.getLogger("documentcloud")
+
+# the resources and clients here override the blocking interface's methods which
+# talk to the network with coroutines
+# pylint: disable=invalid-overridden-method
+
+
+def _check_prefetch(prefetch):
+    """Prefetching is taken for compatibility with the blocking interface, but each
+    page is fetched when it is iterated to
+    """
+    if prefetch:
+        raise TypeError("Prefetching is not supported by the asyncio interface")
+
+
+class AsyncTransport(object):
+    """The non-blocking counterpart of `Transport`
+
+    Each class of host gets its own connection pooled `httpx.AsyncClient`.  The
+    `pool_maxsize` option sets how many connections are kept alive, and when
+    `pool_block` is set it also caps the total number of connections, making
+    requests wait for a free one.  `pool_connections` has no equivalent in httpx
+    and is ignored.  Requests are retried as `retry_policy` says.
+    """
+
+    def __init__(self, pool_config=None, timeout=TIMEOUT, retry_policy=None):
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        self.retry_policy = retry_policy
+        self.sessions = {}
+        for name, options in pool_options(pool_config).items():
+            limits = httpx.Limits(
+                max_connections=(
+                    options["pool_maxsize"] if options["pool_block"] else None
+                ),
+                max_keepalive_connections=options["pool_maxsize"],
+            )
+            self.sessions[name] = httpx.AsyncClient(
+                # httpx retries failed connections itself
+                transport=httpx.AsyncHTTPTransport(
+                    limits=limits, retries=retry_policy.retries
+                ),
+                timeout=timeout,
+                follow_redirects=True,
+            )
+
+    async def request(self, pool, method, url, **kwargs):
+        """Make a request using the given pool, retrying as the retry policy says"""
+        session = self.sessions[pool]
+        policy = self.retry_policy
+        breaker = policy.breaker(urlparse(url).netloc)
+        if breaker is not None:
+            breaker.check()
+        attempt = 0
+        while True:
+            try:
+                response = await session.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if breaker is not None:
+                    breaker.record_failure()
+                raise
+            if attempt == policy.retries or not policy.is_retry(
+                method, response.status_code
+            ):
+                break
+            attempt += 1
+            await asyncio.sleep(policy.wait(attempt, response.headers))
+        if breaker is not None:
+            breaker.record(response.status_code)
+        return response
+
+    async def aclose(self):
+        """Close all pooled connections"""
+        for session in self.sessions.values():
+            await session.aclose()
+
+
+class AsyncDocumentCloud(object):
+    """
+    The asyncio interface for the DocumentCloud API
+
+    Authentication happens on the first request, and the client should be closed
+    when it is no longer needed, either by using it as an async context manager or
+    by awaiting `aclose`.  `token_cache` and `retry_policy` work as they do for
+    `DocumentCloud`.
+    """
+
+    def __init__(
+        self,
+        username=None,
+        password=None,
+        base_uri=BASE_URI,
+        auth_uri=AUTH_URI,
+        timeout=TIMEOUT,
+        loglevel=None,
+        rate_limit=True,
+        pool_config=None,
+        token_cache=None,
+        retry_policy=None,
+    ):
+        self.base_uri = base_uri
+        self.auth_uri = auth_uri
+        self.username = username
+        self.password = password
+        self._user_id = None
+        self.timeout = timeout
+        self.access_token = None
+        self.refresh_token = None
+        self._authenticated = False
+        self._access_expires = None
+        self._access_lifetime = None
+        self._token_skew = 0
+        self._token_lock = None
+        self.token_cache = get_token_cache(token_cache)
+        self.transport = AsyncTransport(pool_config, timeout, retry_policy)
+        self.rate_limiter = get_rate_limiter(rate_limit)
+
+        if loglevel:  # pragma: no cover
+            logging.basicConfig(
+                level=loglevel,
+                format="%(asctime)s %(levelname)-8s %(name)-25s %(message)s",
+            )
+        else:
+            logger.addHandler(logging.NullHandler())
+
+        self.documents = AsyncDocumentClient(self)
+        self.projects = AsyncProjectClient(self)
+        self.users = AsyncUserClient(self)
+        self.organizations = AsyncOrganizationClient(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close all pooled connections"""
+        await self.transport.aclose()
+
+    async def _set_tokens(self, used_token=None):
+        """Set the refresh and access tokens
+
+        `used_token` is the access token a rejected request was made with, so that
+        when many concurrent requests are rejected only the first one refreshes
+        """
+        # the lock is created here so it is bound to the running event loop
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        async with self._token_lock:
+            if self._authenticated and self.access_token != used_token:
+                return
+            if not self._authenticated and self._load_cached_tokens():
+                self._authenticated = True
+                return
+            if self.refresh_token:
+                self.access_token, self.refresh_token = await self._refresh_tokens(
+                    self.refresh_token
+                )
+            elif self.username and self.password:
+                self.access_token, self.refresh_token = await self._get_tokens(
+                    self.username, self.password
+                )
+            if self.access_token:
+                self._access_expires, self._access_lifetime = token_expiry(
+                    self.access_token, self._token_skew
+                )
+                if self.token_cache is not None:
+                    self.token_cache.set(
+                        self.username,
+                        self.auth_uri,
+                        self.access_token,
+                        self.refresh_token,
+                    )
+            self._authenticated = True
+
+    def _load_cached_tokens(self):
+        """Load the tokens cached by an earlier run
+
+        Returns True if the cached access token can be used as is.  Otherwise the
+        cached refresh token, if any, is left to be refreshed.
+        """
+        if self.token_cache is None or not self.username:
+            return False
+        tokens = self.token_cache.get(self.username, self.auth_uri)
+        if tokens is None:
+            return False
+        access_token, refresh_token = tokens
+        if refresh_token:
+            self.refresh_token = refresh_token
+        expires, lifetime = token_expiry(access_token)
+        if expires is None or expires - time.time() <= TOKEN_REFRESH_MARGIN:
+            return False
+        self.access_token = access_token
+        self._access_expires, self._access_lifetime = expires, lifetime
+        return True
+
+    async def _get_tokens(self, username, password):
+        """Get an access and refresh token in exchange for the username and password"""
+        response = await self.transport.request(
+            "auth",
+            "post",
+            "{}token/".format(self.auth_uri),
+            json={"username": username, "password": password},
+        )
+
+        if response.status_code == httpx.codes.UNAUTHORIZED:
+            raise CredentialsFailedError("The username and password is incorrect")
+
+        self.raise_for_status(response)
+
+        self._token_skew = clock_skew(response)
+        json = response.json()
+        return (json["access"], json["refresh"])
+
+    async def _refresh_tokens(self, refresh_token):
+        """Refresh the access and refresh tokens"""
+        response = await self.transport.request(
+            "auth",
+            "post",
+            "{}refresh/".format(self.auth_uri),
+            json={"refresh": refresh_token},
+        )
+
+        if response.status_code == httpx.codes.UNAUTHORIZED:
+            # refresh token is expired
+            return await self._get_tokens(self.username, self.password)
+
+        self.raise_for_status(response)
+
+        self._token_skew = clock_skew(response)
+        json = response.json()
+        return (json["access"], json["refresh"])
+
+    def _token_expiring(self):
+        """Is the access token within its refresh margin of expiring?"""
+        if self._access_expires is None:
+            return False
+        margin = min(TOKEN_REFRESH_MARGIN, self._access_lifetime / 10)
+        return self._access_expires - time.time() <= margin
+
+    async def get_user_id(self):
+        if self._user_id is None:
+            user = await self.users.get("me")
+            self._user_id = user.id
+        return self._user_id
+
+    async def _request(self, method, url, raise_error=True, **kwargs):
+        """Generic method to make API requests"""
+        logger.info("request: %s - %s - %s", method, url, kwargs)
+        if self.rate_limiter is not None:
+            # reserve a token without blocking the event loop
+            wait = self.rate_limiter.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        set_tokens = kwargs.pop("set_tokens", True)
+        full_url = kwargs.pop("full_url", False)
+
+        if not full_url:
+            url = "{}{}".format(self.base_uri, url)
+
+        if not self._authenticated:
+            await self._set_tokens()
+        elif set_tokens and self._token_expiring():
+            await self._set_tokens(used_token=self.access_token)
+
+        access_token = self.access_token
+        headers = dict(kwargs.pop("headers", None) or {})
+        if access_token:
+            headers["Authorization"] = "Bearer {}".format(access_token)
+
+        response = await self.transport.request(
+            "api", method, url, headers=headers, **kwargs
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("response: %s - %s", response.status_code, response.content)
+        if response.status_code == httpx.codes.FORBIDDEN and set_tokens:
+            await self._set_tokens(used_token=access_token)
+            # track set_tokens to not enter an infinite loop
+            kwargs["set_tokens"] = False
+            return await self._request(method, url, full_url=True, **kwargs)
+
+        if raise_error:
+            self.raise_for_status(response)
+
+        return response
+
+    def __getattr__(self, attr):
+        """Generate coroutine methods for each HTTP request type"""
+        methods = ["get", "options", "head", "post", "put", "patch", "delete"]
+        if attr in methods:
+            return partial(self._request, attr)
+        raise AttributeError(
+            "'{}' object has no attribute '{}'".format(self.__class__.__name__, attr)
+        )
+
+    def raise_for_status(self, response):
+        """Raise for status with a custom error class"""
+        if response.status_code == 404:
+            raise DoesNotExistError(response=response)
+        elif response.status_code >= 400:
+            raise APIError(response=response)
+
+
+class AsyncAPIResults(object):
+    """Paginated list results from the API, iterated with `async for`
+
+    Iterating fetches each following page in turn without holding on to the pages
+    already consumed.  Use `next` and `previous` to step through pages manually.
+    """
+
+    def __init__(self, resource, client, json, extra=None):
+        if extra is None:
+            extra = {}
+
+        self.resource = resource
+        self.client = client
+        self.extra = extra
+        self.count = json["count"]
+        self.next_url = json["next"]
+        self.previous_url = json["previous"]
+        # the resources are built as they are used
+        self.results = LazyResults(resource, client, json["results"], extra)
+
+    def __repr__(self):
+        return "<AsyncAPIResults: {!r}".format(self.results)  # pragma: no cover
+
+    def __str__(self):
+        return "[{}]".format(", ".join(str(r) for r in self.results))
+
+    def __len__(self):
+        return self.count
+
+    async def __aiter__(self):
+        page = self
+        while page is not None:
+            for result in page.results:
+                yield result
+            page = await page.next()
+
+    async def _fetch(self, url):
+        if url:
+            response = await self.client.get(url, full_url=True)
+            return AsyncAPIResults(
+                self.resource, self.client, response.json(), self.extra
+            )
+        else:
+            return None
+
+    async def next(self):
+        """Fetch the next page of results, or None if this is the last page"""
+        return await self._fetch(self.next_url)
+
+    async def previous(self):
+        """Fetch the previous page of results, or None if this is the first page"""
+        return await self._fetch(self.previous_url)
+
+
+class AsyncChangeFeed(ChangeFeed):
+    """A `ChangeFeed` iterated with `async for`"""
+
+    async def __aiter__(self):
+        number = 1
+        while True:
+            results = await self.client.list(**self._params(number))
+            checkpoint = self.checkpoint
+            for document in self._unseen(results):
+                yield document
+            if not results.next_url:
+                return
+            number = self._next_number(number, checkpoint)
+
+
+class AsyncBaseAPIClient(BaseAPIClient):
+    """Base client for all API resources using the asyncio interface"""
+
+    async def get(self, id_, expand=None, fields=None):
+        """Get a resource by its ID"""
+        response = await self.client.get(
+            "{}/{}/".format(self.api_path, get_id(id_)),
+            params=field_params(expand=expand, fields=fields),
+        )
+        # pylint: disable=not-callable
+        return self.resource(self.client, response.json())
+
+    async def get_many(self, ids, expand=None):
+        """Get many resources by their IDs, with one list request per page of IDs,
+        made concurrently
+
+        Returns the resources found, in the order of `ids`, and a list of the IDs
+        which were not found
+        """
+        pages = await asyncio.gather(
+            *[self.list(**params) for params in self._get_many_params(ids, expand)]
+        )
+        return self._order_many(ids, [obj for page in pages for obj in page.results])
+
+    def get_future(self, id_, expand=None):
+        raise TypeError("Use `await get_many(ids)` with the asyncio interface")
+
+    async def delete(self, id_):
+        """Deletes a resource"""
+        await self.client.delete("{}/{}/".format(self.api_path, get_id(id_)))
+
+    async def all(self, **params):
+        return await self.list(**params)
+
+    async def list(self, prefetch=None, fields=None, **params):
+        _check_prefetch(prefetch)
+        response = await self.client.get(
+            self.api_path + "/", params=field_params(params, fields=fields)
+        )
+        return AsyncAPIResults(self.resource, self.client, response.json())
+
+
+class AsyncChildAPIClient(AsyncBaseAPIClient, ChildAPIClient):
+    """Base client for sub resources using the asyncio interface"""
+
+    async def list(self, prefetch=None, fields=None, **params):
+        _check_prefetch(prefetch)
+        response = await self.client.get(
+            self.api_path + "/", params=field_params(params, fields=fields)
+        )
+        parent_name = self.parent.__class__.__name__.lower()
+        if parent_name.startswith("async"):
+            parent_name = parent_name[len("async") :]
+        return AsyncAPIResults(
+            self.resource, self.client, response.json(), {parent_name: self.parent}
+        )
+
+    async def __aiter__(self):
+        results = await self.list()
+        async for result in results:
+            yield result
+
+    def __iter__(self):
+        raise TypeError("Use `async for` to iterate over {}".format(self.api_path))
+
+    def __len__(self):
+        raise TypeError("Use `len(await client.list())` with the asyncio interface")
+
+    def __getitem__(self, key):
+        raise TypeError(
+            "Use `(await client.list()).results` with the asyncio interface"
+        )
+
+
+class AsyncAPIObjectMixin(object):
+    """Coroutine versions of the methods on `BaseAPIObject` which make requests"""
+
+    async def put(self):
+        """Alias for save"""
+        return await self.save()
+
+    async def save(self):
+        data = {f: getattr(self, f) for f in self.writable_fields if hasattr(self, f)}
+        await self._client.put("{}/{}/".format(self.api_path, self.id), json=data)
+
+    async def delete(self):
+        await self._client.delete("{}/{}/".format(self.api_path, self.id))
+
+
+class AsyncUser(AsyncAPIObjectMixin, User):
+    """A documentcloud user, using the asyncio interface"""
+
+
+class AsyncOrganization(AsyncAPIObjectMixin, Organization):
+    """A documentcloud organization, using the asyncio interface"""
+
+
+class AsyncSection(AsyncAPIObjectMixin, Section):
+    """A section of a document, using the asyncio interface"""
+
+
+class AsyncAnnotation(AsyncAPIObjectMixin, Annotation):
+    """A note on a document, using the asyncio interface"""
+
+
+class AsyncSectionClient(AsyncChildAPIClient, SectionClient):
+    """Client for interacting with Sections using the asyncio interface"""
+
+    resource = AsyncSection
+
+    async def create(self, title, page_number):
+        data = {"title": title, "page_number": page_number}
+        response = await self.client.post(self.api_path + "/", json=data)
+        return AsyncSection(
+            self.client, merge_dicts(response.json(), {"document": self.parent})
+        )
+
+
+class AsyncAnnotationClient(AsyncChildAPIClient, AnnotationClient):
+    """Client for interacting with Annotations using the asyncio interface"""
+
+    resource = AsyncAnnotation
+
+    async def create(
+        self,
+        title,
+        page_number,
+        content="",
+        access="private",
+        x1=None,
+        y1=None,
+        x2=None,
+        y2=None,
+    ):
+        data = self._format_create_data(
+            title, page_number, content, access, x1, y1, x2, y2
+        )
+        response = await self.client.post(self.api_path + "/", json=data)
+        return AsyncAnnotation(
+            self.client, merge_dicts(response.json(), {"document": self.parent})
+        )
+
+
+class AsyncDocument(AsyncAPIObjectMixin, Document):
+    """A single DocumentCloud document, using the asyncio interface
+
+    Accessing `user`, `organization` and the `contributor` properties, as well as
+    fetching text, images and the PDF, returns an awaitable
+    """
+
+    sections = LazyChildClient("sections", AsyncSectionClient)
+    annotations = LazyChildClient("annotations", AsyncAnnotationClient)
+
+    async def _get_nested(self, name, client):
+        value = getattr(self, "_" + name)
+        if isinstance(value, dict):
+            value = client.resource(self._client, value)
+            setattr(self, "_" + name, value)
+        elif value is None and getattr(self, name + "_id") is not None:
+            value = await client.get(getattr(self, name + "_id"))
+            setattr(self, "_" + name, value)
+        return value
+
+    async def _get_nested_attr(self, name, client, attr):
+        value = await self._get_nested(name, client)
+        return getattr(value, attr)
+
+    @property
+    def user(self):
+        return self._get_nested("user", self._client.users)
+
+    @property
+    def organization(self):
+        return self._get_nested("organization", self._client.organizations)
+
+    @property
+    def contributor(self):
+        return self._get_nested_attr("user", self._client.users, "name")
+
+    @property
+    def contributor_organization(self):
+        return self._get_nested_attr("organization", self._client.organizations, "name")
+
+    @property
+    def contributor_organization_slug(self):
+        return self._get_nested_attr("organization", self._client.organizations, "slug")
+
+    async def _get_url(self, url, text):
+        response = await self._client.transport.request(
+            "asset", "get", url, headers={"User-Agent": "python-documentcloud2"}
+        )
+        if text:
+            return response.content.decode("utf8")
+        else:
+            return response.content
+
+
+class AsyncProject(AsyncAPIObjectMixin, Project):
+    """A documentcloud project, using the asyncio interface
+
+    The document list must be loaded with `load_document_list` before it is used
+    """
+
+    @property
+    def document_list(self):
+        if self._document_list is None:
+            raise ValueError(
+                "The document list has not been loaded, "
+                "call `await project.load_document_list()` first"
+            )
+        return self._document_list
+
+    @document_list.setter
+    def document_list(self, value):
+        Project.document_list.fset(self, value)
+
+    async def _fetch_documents(self, fields=None):
+        response = await self._client.get(
+            "{}/{}/documents/".format(self.api_path, get_id(self.id)),
+            params=field_params(
+                {"per_page": self._per_page},
+                ["document"],
+                fields,
+                prefix="document.",
+            ),
+        )
+        json = response.json()
+        next_url = json["next"]
+        results = json["results"]
+        while next_url:
+            response = await self._client.get(next_url, full_url=True)
+            json = response.json()
+            next_url = json["next"]
+            results.extend(json["results"])
+        return [AsyncDocument(self._client, r["document"]) for r in results]
+
+    async def load_document_list(self, fields=None):
+        """Fetch every document in the project
+
+        With `fields`, the API only returns those fields of each document
+        """
+        if self._document_list is None:
+            self._document_list = APISet(
+                await self._fetch_documents(fields), BaseDocument
+            )
+            self._saved_ids = set(self.document_ids)
+        return self._document_list
+
+    async def save(self):
+        """Add the documents added to the document list since it was loaded or last
+        saved to the project, and remove the documents removed from it, as well
+        """
+        await super(AsyncProject, self).save()
+        if self._document_list is None:
+            return
+        if self._saved_ids is None:
+            if not self._document_list:
+                return
+            self._saved_ids = set(d.id for d in await self._fetch_documents(["id"]))
+        added, removed = self._document_changes()
+        path = "{}/{}/documents/".format(self.api_path, self.id)
+        for group in self._groups(added):
+            await self._client.post(path, json=[{"document": d} for d in group])
+            self._saved_ids.update(group)
+        for group in self._groups(removed):
+            await self._client.delete(
+                path, params={"document_id__in": ",".join(str(d) for d in group)}
+            )
+            self._saved_ids.difference_update(group)
+
+    async def get_document(self, doc_id):
+        response = await self._client.get(
+            "{}/{}/documents/{}".format(self.api_path, get_id(self.id), doc_id),
+            params={"expand": ["document"]},
+        )
+        return AsyncDocument(self._client, response.json()["document"])
+
+
+class AsyncUserClient(AsyncBaseAPIClient):
+    """Client for interacting with users using the asyncio interface"""
+
+    api_path = "users"
+    resource = AsyncUser
+
+
+class AsyncOrganizationClient(AsyncBaseAPIClient):
+    """Client for interacting with organizations using the asyncio interface"""
+
+    api_path = "organizations"
+    resource = AsyncOrganization
+
+
+class AsyncDocumentClient(AsyncBaseAPIClient, DocumentClient):
+    """Client for interacting with Documents using the asyncio interface"""
+
+    resource = AsyncDocument
+
+    def compact(self):
+        raise TypeError("Compact documents are not supported by the asyncio interface")
+
+    def changes(self, since=None, **params):
+        """The documents updated after `since`, iterated with `async for`"""
+        return AsyncChangeFeed(self, since, **params)
+
+    async def search(self, query, prefetch=None, fields=None, **params):
+        """Return documents matching a search query"""
+        _check_prefetch(prefetch)
+        if query:
+            params["q"] = query
+        response = await self.client.get(
+            "documents/search/", params=field_params(params, fields=fields)
+        )
+        return AsyncAPIResults(self.resource, self.client, response.json())
+
+    async def upload(self, pdf, **kwargs):
+        """Upload a document"""
+        # the blocking client checks the file and dispatches to `_upload_url` or
+        # `_upload_file`, which return coroutines here
+        return await super(AsyncDocumentClient, self).upload(pdf, **kwargs)
+
+    async def _upload_url(self, file_url, **kwargs):
+        """Upload a document from a publicly accessible URL"""
+        params = self._format_upload_parameters(file_url, **kwargs)
+        params["file_url"] = file_url
+        response = await self.client.post("documents/", json=params)
+        return AsyncDocument(self.client, response.json())
+
+    async def _upload_file(self, file_, **kwargs):
+        """Upload a document directly"""
+        # create the document
+        force_ocr = kwargs.pop("force_ocr", False)
+        params = self._format_upload_parameters(file_.name, **kwargs)
+        response = await self.client.post("documents/", json=params)
+
+        # upload the file directly to storage, reading it off of the event loop
+        create_json = response.json()
+        presigned_url = create_json["presigned_url"]
+        content = await asyncio.get_event_loop().run_in_executor(None, file_.read)
+        response = await self.client.transport.request(
+            "storage", "put", presigned_url, content=content
+        )
+        self.client.raise_for_status(response)
+
+        # begin processing the document
+        doc_id = create_json["id"]
+        response = await self.client.post(
+            "documents/{}/process/".format(doc_id), json={"force_ocr": force_ocr}
+        )
+
+        return AsyncDocument(self.client, create_json)
+
+    async def _upload_storage(self, url, pdf_path):
+        """Upload a single file to a presigned URL"""
+        logger.info("Uploading %s to S3...", pdf_path)
+
+        def read():
+            with open(pdf_path, "rb") as pdf:
+                return pdf.read()
+
+        content = await asyncio.get_event_loop().run_in_executor(None, read)
+        response = await self.client.transport.request(
+            "storage", "put", url, content=content
+        )
+        self.client.raise_for_status(response)
+
+    async def upload_directory(self, path, handle_errors=False, **kwargs):
+        """Upload all PDFs in a directory
+
+        The files in each group are uploaded to storage concurrently
+        """
+
+        # do not set the same title for all documents
+        kwargs.pop("title", None)
+
+        path_list = self._collect_files(path)
+
+        logger.info(
+            "Upload directory on %s: Found %d files to upload", path, len(path_list)
+        )
+
+        obj_list = []
+        params = self._format_upload_parameters("", **kwargs)
+        for i, pdf_paths in enumerate(grouper(path_list, BULK_LIMIT)):
+            # Grouper will put None's on the end of the last group
+            pdf_paths = [p for p in pdf_paths if p is not None]
+
+            logger.info("Uploading group %d: %s", i + 1, "\n".join(pdf_paths))
+
+            # create the documents
+            logger.info("Creating the documents...")
+            try:
+                response = await self.client.post(
+                    "documents/",
+                    json=[
+                        merge_dicts(params, {"title": self._get_title(p)})
+                        for p in pdf_paths
+                    ],
+                )
+            except (APIError, httpx.HTTPError) as exc:
+                if handle_errors:
+                    logger.info(
+                        "Error creating the following documents: %s %s",
+                        exc,
+                        "\n".join(pdf_paths),
+                    )
+                    continue
+                else:
+                    raise
+
+            # upload the files directly to storage
+            create_json = response.json()
+            obj_list.extend(create_json)
+            presigned_urls = [j["presigned_url"] for j in create_json]
+            uploads = await asyncio.gather(
+                *[
+                    self._upload_storage(url, pdf_path)
+                    for url, pdf_path in zip(presigned_urls, pdf_paths)
+                ],
+                return_exceptions=handle_errors
+            )
+            for pdf_path, exc in zip(pdf_paths, uploads):
+                if isinstance(exc, (APIError, httpx.HTTPError)):
+                    logger.info(
+                        "Error uploading the following document: %s %s", exc, pdf_path
+                    )
+                elif isinstance(exc, BaseException):
+                    raise exc
+
+            # begin processing the documents
+            logger.info("Processing the documents...")
+            doc_ids = [j["id"] for j in create_json]
+            try:
+                response = await self.client.post(
+                    "documents/process/", json={"ids": doc_ids}
+                )
+            except (APIError, httpx.HTTPError) as exc:
+                if handle_errors:
+                    logger.info(
+                        "Error creating the following documents: %s %s",
+                        exc,
+                        "\n".join(pdf_paths),
+                    )
+                    continue
+                else:
+                    raise
+
+        logger.info("Upload directory complete")
+
+        # Pass back the list of documents
+        return [AsyncDocument(self.client, d) for d in obj_list]
+
+
+class AsyncProjectClient(AsyncBaseAPIClient, ProjectClient):
+    """Client for interacting with projects using the asyncio interface"""
+
+    resource = AsyncProject
+
+    # all is overriden to filter by the current user for backward compatibility
+    async def all(self, **params):
+        return await self.list(user=await self.client.get_user_id(), **params)
+
+    async def get(self, id=None, title=None):
+        # pylint:disable=redefined-builtin, arguments-differ
+        if id is not None and title is not None:
+            raise ValueError(
+                "You can only retrieve a Project by id or title, not by both"
+            )
+        elif id is None and title is None:
+            raise ValueError("You must provide an id or a title to make a request.")
+
+        if id is not None:
+            return await self.get_by_id(id)
+        else:
+            return await self.get_by_title(title)
+
+    async def get_by_id(self, id_):
+        return await AsyncBaseAPIClient.get(self, id_)
+
+    async def get_by_title(self, title):
+        response = await self.client.get(
+            self.api_path + "/",
+            params={"title": title, "user": await self.client.get_user_id()},
+        )
+        json = response.json()
+        if json["count"] == 0:
+            raise DoesNotExistError(response=response)
+        elif json["count"] > 1:
+            raise MultipleObjectsReturnedError(response=response)
+
+        return self.resource(self.client, json["results"][0])
+
+    async def create(self, title, description="", private=True, document_ids=None):
+        data = {"title": title, "description": description, "private": private}
+        response = await self.client.post(self.api_path + "/", json=data)
+        project = AsyncProject(self.client, response.json())
+        if document_ids:
+            data = [{"document": d} for d in document_ids]
+            response = await self.client.put(
+                "{}/{}/documents/".format(self.api_path, project.id), json=data
+            )
+        return project
+
+    async def get_or_create_by_title(self, title):
+        try:
+            project = await self.get(title=title)
+            created = False
+        except DoesNotExistError:
+            project = await self.create(title=title)
+            created = True
+        return project, created
@@ -84,6 +84,16 @@ class AnnotationClient(ChildAPIClient):
         x2=None,
         y2=None,
     ):
+        data = self._format_create_data(
+            title, page_number, content, access, x1, y1, x2, y2
+        )
+        response = self.client.post(self.api_path + "/", json=data)
+        return Annotation(
+            self.client, merge_dicts(response.json(), {"document": self.parent})
+        )
+
+    def _format_create_data(self, title, page_number, content, access, x1, y1, x2, y2):
+        """Validate and format the data for creating an annotation"""
         coords = [x1, y2, x2, y2]
         if not (all(c is None for c in coords) or all(c is not None for c in coords)):
             raise ValueError(
@@ -92,7 +102,7 @@ class AnnotationClient(ChildAPIClient):
         if coords[0] is not None and not all(0 <= c <= 1.0 for c in coords):
             raise ValueError("x1, y2, x2, y2 must all be between 0.0 and 1.0")
 
-        data = {
+        return {
             "title": title,
             "page_number": page_number,
             "content": content,
@@ -102,7 +112,3 @@ class AnnotationClient(ChildAPIClient):
             "x2": x2,
             "y2": y2,
         }
-        response = self.client.post(self.api_path + "/", json=data)
-        return Annotation(
-            self.client, merge_dicts(response.json(), {"document": self.parent})
-        )
@@ -2,35 +2,126 @@
 from __future__ import division, print_function, unicode_literals
 
 # Standard Library
+import threading
 from builtins import str
-from copy import copy
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import chain
+from types import MemberDescriptorType
 
 # Third Party
-from dateutil.parser import parse as dateparser
-from future.utils import python_2_unicode_compatible
+from future.utils import python_2_unicode_compatible, with_metaclass
 
 # Local
+from .batch import GetBatcher
+from .constants import FETCH_WORKERS, PER_PAGE_MAX
 from .exceptions import DuplicateObjectError
-from .toolbox import get_id, merge_dicts
+from .export import (
+    arrow_table,
+    columns,
+    record_batches,
+    write_csv,
+    write_jsonl,
+    write_parquet,
+)
+from .prefetch import Prefetcher
+from .toolbox import field_params, get_id, grouper, merge_dicts, parse_date
 
 try:
     from collections.abc import Sequence
 except ImportError:
     from collections import Sequence
 
+try:
+    from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+except ImportError:  # pragma: no cover
+    from urllib import urlencode
+    from urlparse import parse_qsl, urlparse, urlunparse
+
+
+class LazyResults(Sequence):
+    """The resources on one page of results, each built from the API's response
+    the first time it is used
+
+    `raw` holds the response's dictionaries, for filtering on a field without
+    building the resources which are not wanted.  It compares equal to, and can be
+    added to, a list of the same resources, but cannot be changed.
+    """
+
+    def __init__(self, resource, client, raw, extra=None):
+        self.resource = resource
+        self.client = client
+        self.raw = raw
+        self.extra = extra or {}
+        self._objects = [None] * len(raw)
+
+    def __repr__(self):
+        return repr(list(self))  # pragma: no cover
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(len(self)))]
+        obj = self._objects[key]
+        if obj is None:
+            obj = self.resource(self.client, merge_dicts(self.raw[key], self.extra))
+            self._objects[key] = obj
+        return obj
+
+    def __len__(self):
+        return len(self.raw)
+
+    def __iter__(self):
+        for i in range(len(self.raw)):
+            yield self[i]
+
+    def __eq__(self, other):
+        if isinstance(other, (list, LazyResults)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
 
 @python_2_unicode_compatible
 class APIResults(Sequence):
-    """Class for encapsulating paginated list results from the API"""
+    """Class for encapsulating paginated list results from the API
+
+    Indexing and slicing work out which pages hold the items asked for and fetch
+    only those pages, by page number.  Fetched pages are kept, so each is only
+    fetched once.
+
+    With `prefetch`, iterating fetches up to that many of the following pages on a
+    background thread while the current page is being used.
+    """
 
     def __init__(
-        self, resource, client, response, extra=None, next_=None, previous=None
+        self,
+        resource,
+        client,
+        response,
+        extra=None,
+        next_=None,
+        previous=None,
+        prefetch=None,
     ):
         if extra is None:
             extra = {}
 
         self.resource = resource
         self.client = client
+        self.extra = extra
+        self.prefetch = prefetch
         json = response.json()
 
         self.count = json["count"]
@@ -38,9 +129,26 @@ class APIResults(Sequence):
         self.previous_url = json["previous"]
         self._next = next_
         self._previous = previous
-        self.results = [
-            resource(client, merge_dicts(r, extra)) for r in json["results"]
-        ]
+        # the resources are built as they are used
+        self.results = LazyResults(resource, client, json["results"], extra)
+
+        self.url = response.url
+        params = dict(parse_qsl(urlparse(self.url).query))
+        self.page = int(params.get("page", 1))
+        self.per_page = self._per_page(params)
+        # the pages fetched so far, by page number
+        self._pages = {self.page: self.results}
+
+    def _per_page(self, params):
+        """The number of results on each page"""
+        if self.next_url:
+            # every page but the last is full
+            return len(self.results)
+        elif self.page > 1:
+            return (self.count - len(self.results)) // (self.page - 1)
+        else:
+            # there is only one page
+            return int(params.get("per_page", max(len(self.results), 1)))
 
     def __repr__(self):
         return "<APIResults: {!r}".format(self.results)  # pragma: no cover
@@ -49,34 +157,195 @@ class APIResults(Sequence):
         return "[{}]".format(", ".join(str(r) for r in self.results))
 
     def __getitem__(self, key):
-        # pylint: disable=unsubscriptable-object
-        if key >= len(self):
+        # indexes count from the first result on this page
+        length = self.count - (self.page - 1) * self.per_page
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(length))]
+
+        if key < 0:
+            key += length
+        if not 0 <= key < length:
             raise IndexError
 
-        length = len(self.results)
-        if key < length:
-            return self.results[key]
-        else:
-            return self.next[key - length]
+        page, index = divmod((self.page - 1) * self.per_page + key, self.per_page)
+        results = self._get_page(page + 1)
+        if index >= len(results):
+            # the results have changed since the first page was fetched
+            raise IndexError
+        return results[index]
 
     def __len__(self):
         return self.count
 
     def __iter__(self):
-        for result in self.results:
-            yield result
-        if self.next_url:
-            # pylint: disable=not-an-iterable
-            for result in self.next:
+        # pylint: disable=protected-access
+        last = self
+        while last._next is not None:
+            last = last._next
+        # start on the pages not fetched yet before using the ones already fetched
+        following = self._following(last)
+        try:
+            page = self
+            while True:
+                for result in page.results:
+                    yield result
+                if page is last:
+                    break
+                page = page._next
+            # link the pages fetched from here on, so they are kept for reuse
+            for next_page in following:
+                next_page._previous, page._next = page, next_page
+                page = next_page
+                for result in page.results:
+                    yield result
+        finally:
+            following.close()
+
+    def stream(self):
+        """Iterate over the results from this page on, without holding on to the
+        pages already consumed
+
+        Unlike iterating over the results directly, which keeps every page so they
+        may be used again, this keeps memory use to one page however many results
+        there are.
+        """
+        following = self._following(self)
+        try:
+            for result in self.results:
                 yield result
-        else:
-            return
+            for page in following:
+                for result in page.results:
+                    yield result
+        finally:
+            following.close()
+
+    def _following(self, page):
+        """The pages after `page`, without linking them together, fetched ahead in
+        the background if prefetching
+        """
+        if self.prefetch:
+            return Prefetcher(self._fetch, page.next_url, self.prefetch)
+        return self._fetch_from(page.next_url)
+
+    def _fetch_from(self, url):
+        while url:
+            page = self._fetch(url)
+            url = page.next_url
+            yield page
+
+    def _page_url(self, number):
+        """The URL for the given page of these results"""
+        parsed = urlparse(self.url)
+        params = [(k, v) for k, v in parse_qsl(parsed.query) if k != "page"]
+        params.append(("page", number))
+        return urlunparse(parsed._replace(query=urlencode(params)))
+
+    @property
+    def _numbered(self):
+        """Whether the pages of these results may be fetched by page number"""
+        return not self.next_url or "page" in dict(
+            parse_qsl(urlparse(self.next_url).query)
+        )
+
+    def _fetch_page(self, number):
+        return self._fetch(self._page_url(number)).results
+
+    def _get_page(self, number):
+        """The results on the given page, fetching it if needed"""
+        if number not in self._pages:
+            if not self._numbered:
+                # the API is not paginating by page number, so step through pages
+                page = self
+                for _ in range(abs(number - self.page)):
+                    if page is None:
+                        break
+                    page = page.next if number > self.page else page.previous
+                results = page.results if page is not None else []
+            else:
+                results = self._fetch_page(number)
+            self._pages[number] = results
+        return self._pages[number]
+
+    def fetch_all(self, workers=FETCH_WORKERS):
+        """Every result from this page on, as a list
+
+        As the number of pages is known from the first one, the pages not fetched
+        yet are fetched concurrently by `workers` threads.  The requests still wait
+        their turn with the client's rate limiter.
+        """
+        if not self._numbered:
+            return list(self)
+        last = max(self.page, -(-self.count // self.per_page))
+        missing = [n for n in range(self.page + 1, last + 1) if n not in self._pages]
+        if missing:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for number, results in zip(
+                    missing, executor.map(self._fetch_page, missing)
+                ):
+                    self._pages[number] = results
+        return [r for n in range(self.page, last + 1) for r in self._pages[n]]
+
+    def raw_pages(self):
+        """The API's dictionaries for the results from this page on, a page at a
+        time, without building the resources or holding on to the pages
+
+        They are as the API returned them, without `extra`, such as the document a
+        note belongs to, which the resources are built with.
+        """
+        following = self._following(self)
+        try:
+            for page in chain([self], following):
+                yield page.results.raw
+        finally:
+            following.close()
+
+    def to_columns(self, fields=None):
+        """The results from this page on as an ordered dictionary of a list of
+        values for each of `fields`, which defaults to those on this page
+
+        The columns are built from the API's responses without building a resource
+        for each result.  Fields may name values in nested objects with dots, such
+        as `user.name`.
+        """
+        return columns(self.raw_pages(), fields)
+
+    def to_csv(self, file_, fields=None):
+        """Write the results from this page on to a CSV file object, a page at a
+        time, returning the number written
+        """
+        return write_csv(self.raw_pages(), file_, fields)
+
+    def to_jsonl(self, file_, fields=None):
+        """Write the results from this page on to a file object as lines of JSON,
+        a page at a time, returning the number written
+        """
+        return write_jsonl(self.raw_pages(), file_, fields)
+
+    def to_record_batches(self, fields=None, schema=None):
+        """Yield a `pyarrow.RecordBatch` for each page of results from this one on"""
+        return record_batches(self.raw_pages(), fields, schema)
+
+    def to_arrow(self, fields=None, schema=None):
+        """The results from this page on as a `pyarrow.Table`"""
+        return arrow_table(self.raw_pages(), fields, schema)
+
+    def to_parquet(self, where, fields=None, schema=None, **kwargs):
+        """Write the results from this page on to a Parquet file, a row group per
+        page, returning the number written
+        """
+        return write_parquet(self.raw_pages(), where, fields, schema, **kwargs)
 
     def _fetch(self, url, next_=None, previous=None):
         if url:
             response = self.client.get(url, full_url=True)
             return APIResults(
-                self.resource, self.client, response, next_=next_, previous=previous
+                self.resource,
+                self.client,
+                response,
+                self.extra,
+                next_=next_,
+                previous=previous,
+                prefetch=self.prefetch,
             )
         else:
             return None
@@ -103,19 +372,67 @@ class BaseAPIClient(object):
 
     def __init__(self, client):
         self.client = client
+        self._batchers = {}
+        self._batchers_lock = threading.Lock()
 
-    def get(self, id_, expand=None):
-        """Get a resource by its ID"""
-        if expand is not None:
-            params = {"expand": ",".join(expand)}
-        else:
-            params = {}
+    def get(self, id_, expand=None, fields=None):
+        """Get a resource by its ID
+
+        With `fields`, the API only returns those fields of the resource
+        """
         response = self.client.get(
-            "{}/{}/".format(self.api_path, get_id(id_)), params=params
+            "{}/{}/".format(self.api_path, get_id(id_)),
+            params=field_params(expand=expand, fields=fields),
         )
         # pylint: disable=not-callable
         return self.resource(self.client, response.json())
 
+    def _get_many_params(self, ids, expand=None):
+        """The list query parameters for each page of `ids`"""
+        unique = list(OrderedDict.fromkeys(str(get_id(i)) for i in ids))
+        for group in grouper(unique, PER_PAGE_MAX):
+            params = {
+                "id__in": ",".join(i for i in group if i is not None),
+                "per_page": PER_PAGE_MAX,
+            }
+            if expand is not None:
+                params["expand"] = ",".join(expand)
+            yield params
+
+    def _order_many(self, ids, objects):
+        """The objects found in the order of `ids`, and the IDs not found"""
+        found = {str(obj.id): obj for obj in objects}
+        keys = [str(get_id(i)) for i in ids]
+        return (
+            [found[k] for k in keys if k in found],
+            [i for i, k in zip(ids, keys) if k not in found],
+        )
+
+    def get_many(self, ids, expand=None):
+        """Get many resources by their IDs, with one list request per page of IDs
+
+        Returns the resources found, in the order of `ids`, and a list of the IDs
+        which were not found
+        """
+        objects = []
+        for params in self._get_many_params(ids, expand):
+            objects.extend(self.list(**params).results)
+        return self._order_many(ids, objects)
+
+    def get_future(self, id_, expand=None):
+        """Get a resource by its ID, fetched together with the other `get_future`
+        calls made within a short window
+
+        Returns a `concurrent.futures.Future`, which raises `DoesNotExistError` if
+        there is no resource with this ID
+        """
+        key = tuple(expand) if expand is not None else None
+        with self._batchers_lock:
+            if key not in self._batchers:
+                self._batchers[key] = GetBatcher(self, expand)
+            batcher = self._batchers[key]
+        return batcher.get(id_)
+
     def delete(self, id_):
         """Deletes a resource"""
         self.client.delete("{}/{}/".format(self.api_path, get_id(id_)))
@@ -123,9 +440,17 @@ class BaseAPIClient(object):
     def all(self, **params):
         return self.list(**params)
 
-    def list(self, **params):
-        response = self.client.get(self.api_path + "/", params=params)
-        return APIResults(self.resource, self.client, response)
+    def list(self, prefetch=None, fields=None, **params):
+        """List resources
+
+        With `fields`, the API only returns those fields of each resource.  With
+        `prefetch`, iterating over the results fetches up to that many of the
+        following pages in the background
+        """
+        response = self.client.get(
+            self.api_path + "/", params=field_params(params, fields=fields)
+        )
+        return APIResults(self.resource, self.client, response, prefetch=prefetch)
 
 
 class ChildAPIClient(BaseAPIClient):
@@ -135,11 +460,17 @@ class ChildAPIClient(BaseAPIClient):
         super(ChildAPIClient, self).__init__(client)
         self.parent = parent
 
-    def list(self, **params):
-        response = self.client.get(self.api_path + "/", params=params)
+    def list(self, prefetch=None, fields=None, **params):
+        response = self.client.get(
+            self.api_path + "/", params=field_params(params, fields=fields)
+        )
         parent_name = self.parent.__class__.__name__.lower()
         return APIResults(
-            self.resource, self.client, response, {parent_name: self.parent}
+            self.resource,
+            self.client,
+            response,
+            {parent_name: self.parent},
+            prefetch=prefetch,
         )
 
     # try to emulate old behavior by making it act as the list of returned resources
@@ -153,16 +484,96 @@ class ChildAPIClient(BaseAPIClient):
         return self.list()[key]
 
 
-class BaseAPIObject(object):
+class LazyDate(object):
+    """A date field, parsed from the string in the API's response the first time
+    it is read
+
+    The value is kept in the object's dictionary, or in `slot` for resources
+    with `__slots__`
+    """
+
+    def __init__(self, name, slot=None):
+        self.name = name
+        self.slot = slot
+
+    def __get__(self, obj, type_=None):
+        if obj is None:
+            return self
+        if self.slot is not None:
+            # raises AttributeError if the field was left out of the response
+            value = self.slot.__get__(obj, type_)
+        else:
+            try:
+                value = obj.__dict__[self.name]
+            except KeyError:
+                # the field was left out of the response
+                raise AttributeError(self.name)
+        if value is not None and not isinstance(value, datetime):
+            value = parse_date(value)
+            self.__set__(obj, value)
+        return value
+
+    def __set__(self, obj, value):
+        if self.slot is not None:
+            self.slot.__set__(obj, value)
+        else:
+            obj.__dict__[self.name] = value
+
+
+class APIObjectMeta(type):
+    """Gives each of a resource's `date_fields` a `LazyDate` descriptor"""
+
+    def __init__(cls, name, bases, attrs):
+        super(APIObjectMeta, cls).__init__(name, bases, attrs)
+        for field in cls.date_fields:
+            attr = cls.__dict__.get(field)
+            if isinstance(attr, MemberDescriptorType):
+                # keep the value in the slot
+                setattr(cls, field, LazyDate(field, attr))
+            elif not isinstance(getattr(cls, field, None), LazyDate):
+                setattr(cls, field, LazyDate(field))
+
+
+class LazyChildClient(object):
+    """A client for a resource's sub resources, created the first time it is used
+
+    The client is kept in `attr`, or in the object's dictionary if it is None
+    """
+
+    def __init__(self, name, client_class, attr=None):
+        self.name = name
+        self.client_class = client_class
+        self.attr = attr
+
+    def __get__(self, obj, type_=None):
+        if obj is None:
+            return self
+        if self.attr is not None:
+            child_client = getattr(obj, self.attr)
+            if child_client is not None:
+                return child_client
+        # pylint: disable=protected-access
+        child_client = self.client_class(obj._client, obj)
+        if self.attr is not None:
+            setattr(obj, self.attr, child_client)
+        else:
+            # cache it on the object, where it will be found before this descriptor
+            obj.__dict__[self.name] = child_client
+        return child_client
+
+
+class BaseAPIObject(with_metaclass(APIObjectMeta, object)):
     """Base object for all API resources"""
 
+    # resources keep their fields in a dictionary, unless they define slots
+    __slots__ = ()
+
     date_fields = []
 
     def __init__(self, client, dict_):
         self.__dict__ = dict_
-        self._client = client
-        for field in self.date_fields:
-            setattr(self, field, dateparser(getattr(self, field)))
+        # in the dictionary just set
+        self._client = client  # pylint: disable=assigning-non-slot
 
     def __repr__(self):
         return "<{}: {} - {}>".format(
@@ -186,57 +597,199 @@ class BaseAPIObject(object):
 
 @python_2_unicode_compatible
 class APISet(list):
+    """A list of resources in which each ID appears only once
+
+    The IDs are kept in a dictionary alongside the list, so checking for duplicates
+    and membership takes constant time.  Positions are kept by ID as well, and
+    only counted again after many resources are removed, so finding, replacing and
+    removing a resource does not scan the list.  The resources themselves are kept
+    as they are, rather than copied.
+    """
+
     def __init__(self, iterable, resource):
         super(APISet, self).__init__(iterable)
         self.resource = resource
-        if not all(isinstance(obj, self.resource) for obj in self):
+        self._check_types(self)
+        self._ids = {}
+        # the position of each ID when they were last counted, built when needed,
+        # and how many resources have been removed from before the end since then,
+        # as each may have moved those after it down by one
+        self._positions = None
+        self._removed = 0
+        for obj in self:
+            if obj.id in self._ids:
+                raise self._duplicate(obj)
+            self._ids[obj.id] = obj
+
+    def _check_types(self, objs):
+        if not all(isinstance(obj, self.resource) for obj in objs):
             raise TypeError(
-                "Only {} can be added to this list".format(
-                    self.resource.__class__.__name__
-                )
+                "Only {} can be added to this list".format(self.resource.__name__)
             )
-        ids = [obj.id for obj in self]
-        for id_ in ids:
-            if ids.count(id_) > 1:
-                raise DuplicateObjectError(
-                    "Object with ID {} appears in the list more than once".format(id_)
-                )
+
+    @staticmethod
+    def _duplicate(obj):
+        return DuplicateObjectError(
+            "Object with ID {} appears in the list more than once".format(obj.id)
+        )
+
+    def _reindex(self):
+        """Check and index the list again after changing it by slice"""
+        ids = {}
+        for obj in self:
+            ids[obj.id] = obj
+        self._ids = ids
+        self._positions = None
+
+    def _position(self, obj):
+        """The position of a resource in the list"""
+        if self._positions is None:
+            self._positions = {o.id: i for i, o in enumerate(self)}
+            self._removed = 0
+        item = self._ids[obj.id]
+        # it is at most as many places before its counted position as there have
+        # been removals since
+        position = min(self._positions[obj.id], len(self) - 1)
+        for index in range(position, max(position - self._removed, 0) - 1, -1):
+            if self[index] is item:
+                return index
+        raise ValueError("{!r} is not in list".format(obj))  # pragma: no cover
+
+    def __contains__(self, obj):
+        if isinstance(obj, self.resource):
+            return obj.id in self._ids
+        return super(APISet, self).__contains__(obj)
 
     def append(self, obj):
-        if not isinstance(obj, self.resource):
-            raise TypeError(
-                "Only {} can be added to this list".format(
-                    self.resource.__class__.__name__
-                )
-            )
-        if obj.id in [i.id for i in self]:
-            raise DuplicateObjectError(
-                "Object with ID {} appears in the list more than once".format(obj.id)
-            )
-        super(APISet, self).append(copy(obj))
+        self._check_types([obj])
+        if obj.id in self._ids:
+            raise self._duplicate(obj)
+        self._append(obj)
+
+    def _append(self, obj):
+        if self._positions is not None:
+            self._positions[obj.id] = len(self)
+        self._ids[obj.id] = obj
+        super(APISet, self).append(obj)
 
     def add(self, obj):
-        if not isinstance(obj, self.resource):
-            raise TypeError(
-                "Only {} can be added to this list".format(
-                    self.resource.__class__.__name__
-                )
-            )
+        self._check_types([obj])
         # skip duplicates silently
-        if obj.id not in [i.id for i in self]:
-            super(APISet, self).append(copy(obj))
+        if obj.id not in self._ids:
+            self._append(obj)
 
     def extend(self, list_):
-        if not all(isinstance(obj, self.resource) for obj in list_):
-            raise TypeError(
-                "Only {} can be added to this list".format(
-                    self.resource.__class__.__name__
-                )
-            )
-        ids = [obj.id for obj in self + list_]
-        for id_ in ids:
-            if ids.count(id_) > 1:
-                raise DuplicateObjectError(
-                    "Object with ID {} appears in the list more than once".format(id)
-                )
-        super(APISet, self).extend(copy(obj) for obj in list_)
+        list_ = list(list_)
+        self._check_types(list_)
+        ids = set()
+        for obj in list_:
+            if obj.id in self._ids or obj.id in ids:
+                raise self._duplicate(obj)
+            ids.add(obj.id)
+        for obj in list_:
+            self._append(obj)
+
+    def update(self, iterable):
+        """Add each resource not already in the list, like `add`"""
+        iterable = list(iterable)
+        self._check_types(iterable)
+        for obj in iterable:
+            if obj.id not in self._ids:
+                self._append(obj)
+
+    def __iadd__(self, list_):
+        self.extend(list_)
+        return self
+
+    def index(self, obj, *args):
+        if args or not isinstance(obj, self.resource) or obj.id not in self._ids:
+            return super(APISet, self).index(obj, *args)
+        return self._position(obj)
+
+    def remove(self, obj):
+        if not isinstance(obj, self.resource) or obj.id not in self._ids:
+            super(APISet, self).remove(obj)
+            return
+        self._delete(self._position(obj))
+
+    def _delete(self, index):
+        obj = self[index]
+        super(APISet, self).__delitem__(index)
+        del self._ids[obj.id]
+        if self._positions is None:
+            return
+        del self._positions[obj.id]
+        if index < len(self):
+            # the resources after it have moved down by one
+            self._removed += 1
+            if self._removed * self._removed > len(self):
+                # count them again, rather than searching further and further back
+                self._positions = None
+
+    def __delitem__(self, key):
+        if isinstance(key, slice):
+            super(APISet, self).__delitem__(key)
+            self._reindex()
+            return
+        index = key + len(self) if key < 0 else key
+        if not 0 <= index < len(self):
+            raise IndexError("list assignment index out of range")
+        self._delete(index)
+
+    def pop(self, index=-1):
+        obj = self[index]
+        del self[index]
+        return obj
+
+    def insert(self, index, obj):
+        self._check_types([obj])
+        if obj.id in self._ids:
+            raise self._duplicate(obj)
+        if index >= len(self):
+            self._append(obj)
+            return
+        super(APISet, self).insert(index, obj)
+        self._ids[obj.id] = obj
+        # the resources after it have moved up
+        self._positions = None
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            self._set_slice(key, value)
+            return
+        self._check_types([value])
+        old = self[key]
+        if value.id in self._ids and value.id != old.id:
+            raise self._duplicate(value)
+        super(APISet, self).__setitem__(key, value)
+        del self._ids[old.id]
+        self._ids[value.id] = value
+        if self._positions is not None:
+            # it takes the replaced resource's place
+            self._positions[value.id] = self._positions.pop(old.id)
+
+    def _set_slice(self, key, value):
+        value = list(value)
+        self._check_types(value)
+        replaced = {obj.id for obj in self[key]}
+        ids = set()
+        for obj in value:
+            if obj.id in ids or (obj.id in self._ids and obj.id not in replaced):
+                raise self._duplicate(obj)
+            ids.add(obj.id)
+        super(APISet, self).__setitem__(key, value)
+        self._reindex()
+
+    def clear(self):
+        del self[:]
+
+    def sort(self, *args, **kwargs):
+        super(APISet, self).sort(*args, **kwargs)
+        self._positions = None
+
+    def reverse(self):
+        super(APISet, self).reverse()
+        self._positions = None
+
+    def __copy__(self):
+        return APISet(self, self.resource)
@@ -0,0 +1,87 @@
+"""
+Gather many requests for single objects into a few list requests
+"""
+
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Local
+from .constants import BATCH_WINDOW, PER_PAGE_MAX
+from .exceptions import DoesNotExistError
+from .toolbox import get_id
+
+
+class GetBatcher(object):
+    """Gathers the `get` calls made within `window` seconds of each other into one
+    `get_many` call on `api_client`
+
+    Each call returns a `concurrent.futures.Future` at once.  The batch is fetched
+    when the window closes, or as soon as it holds a full page of IDs.
+    """
+
+    def __init__(self, api_client, expand=None, window=BATCH_WINDOW):
+        self.api_client = api_client
+        self.expand = expand
+        self.window = window
+        self._lock = threading.Lock()
+        # maps each pending ID to the futures waiting on it
+        self._pending = OrderedDict()
+        self._timer = None
+
+    def get(self, id_):
+        """A future for the resource with the given ID"""
+        future = Future()
+        batch = None
+        with self._lock:
+            self._pending.setdefault(str(get_id(id_)), []).append(future)
+            if len(self._pending) >= PER_PAGE_MAX:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._resolve(batch)
+        return future
+
+    def _take(self):
+        batch, self._pending = self._pending, OrderedDict()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def flush(self):
+        """Fetch the pending IDs now, instead of waiting for the window to close"""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._resolve(batch)
+
+    def _resolve(self, batch):
+        try:
+            objects, _ = self.api_client.get_many(list(batch), self.expand)
+        except Exception as exc:  # pylint: disable=broad-except
+            for futures in batch.values():
+                for future in futures:
+                    future.set_exception(exc)
+            return
+
+        found = {str(obj.id): obj for obj in objects}
+        for id_, futures in batch.items():
+            for future in futures:
+                if id_ in found:
+                    future.set_result(found[id_])
+                else:
+                    future.set_exception(
+                        DoesNotExistError(
+                            "{} {} does not exist".format(
+                                self.api_client.resource.__name__, id_
+                            )
+                        )
+                    )
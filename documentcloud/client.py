@@ -7,27 +7,81 @@ from __future__ import division, print_function, unicode_literals
 
 # Standard Library
 import logging
+import threading
+import time
 from functools import partial
 
 # Third Party
-import ratelimit
 import requests
 
+try:
+    from urllib.parse import urlparse
+except ImportError:  # pragma: no cover
+    from urlparse import urlparse
+
 # Local
-from .constants import AUTH_URI, BASE_URI, RATE_LIMIT, RATE_PERIOD, TIMEOUT
+from .constants import AUTH_URI, BASE_URI, TIMEOUT, TOKEN_REFRESH_MARGIN
 from .documents import DocumentClient
 from .exceptions import APIError, CredentialsFailedError, DoesNotExistError
+from .httpcache import get_http_cache
+from .instrumentation import (
+    EventBus,
+    RateLimitEvent,
+    RequestEvent,
+    TokenEvent,
+    path_template,
+)
+from .limiter import TokenBucket, monotonic
 from .organizations import OrganizationClient
 from .projects import ProjectClient
-from .toolbox import requests_retry_session
+from .tokencache import get_token_cache
+from .toolbox import clock_skew, token_expiry
+from .transport import Transport
 from .users import UserClient
 
 logger = logging.getLogger("documentcloud")
 
 
+def get_rate_limiter(rate_limit):
+    """Build the rate limiter for a client
+
+    `rate_limit` may be True for the default limit, False or None for no limit, or
+    any object with `acquire` and `reserve` methods, such as a `TokenBucket`
+    """
+    if rate_limit is True:
+        return TokenBucket()
+    elif not rate_limit:
+        return None
+    return rate_limit
+
+
 class DocumentCloud(object):
     """
     The public interface for the DocumentCloud API
+
+    A client is safe to share between threads.  Logging in, refreshing tokens and
+    looking up `user_id` happen once however many threads need them at the same
+    time, and the transport is set up once, when the client is created.  The
+    objects returned by the client are not locked, so each should be modified by
+    only one thread at a time.
+
+    Requests are rate limited by a `TokenBucket` allowing short bursts, and block
+    until they are allowed through.  Pass `rate_limit=False` to disable this, or a
+    `TokenBucket` of your own to change the rate or burst.
+
+    Authentication happens on the first request.  Pass `token_cache=True`, or the
+    path to a file, to keep the tokens on disk so later runs can reuse them
+    instead of logging in again.
+
+    Pass `http_cache=True` to keep API responses in memory, or the path to a file,
+    so that fetching an unchanged object again only costs a `304 Not Modified`.
+
+    Failed requests are retried as `retry_policy` says, by default a `RetryPolicy`
+    backing off with jitter, honoring `Retry-After` and failing fast with
+    `CircuitOpenError` while a host is down.
+
+    Every request, token refresh and rate limiter wait is reported to the
+    subscribers of `events`, such as a `MetricsAggregator` or a `SpanAdapter`.
     """
 
     def __init__(
@@ -39,6 +93,10 @@ class DocumentCloud(object):
         timeout=TIMEOUT,
         loglevel=None,
         rate_limit=True,
+        pool_config=None,
+        token_cache=None,
+        http_cache=None,
+        retry_policy=None,
     ):
         self.base_uri = base_uri
         self.auth_uri = auth_uri
@@ -47,8 +105,24 @@ class DocumentCloud(object):
         self._user_id = None
         self.timeout = timeout
         self.refresh_token = None
-        self.session = requests.Session()
-        self._set_tokens()
+        self._access_token = None
+        self._access_expires = None
+        self._access_lifetime = None
+        self._token_skew = 0
+        self._authenticated = False
+        self.token_cache = get_token_cache(token_cache)
+        self.http_cache = get_http_cache(http_cache)
+        self.events = EventBus()
+        # held while the tokens are being replaced
+        self._token_lock = threading.RLock()
+        # held while a refresh runs in the background
+        self._refresh_lock = threading.Lock()
+        # held while looking up the user's ID
+        self._user_lock = threading.Lock()
+        # the transport is shared with every resource client, so connections are
+        # kept alive across requests
+        self.transport = Transport(pool_config, retry_policy)
+        self.session = self.transport.api
 
         if loglevel:  # pragma: no cover
             logging.basicConfig(
@@ -63,30 +137,127 @@ class DocumentCloud(object):
         self.users = UserClient(self)
         self.organizations = OrganizationClient(self)
 
-        if rate_limit:
-            self._request = ratelimit.limits(calls=RATE_LIMIT, period=RATE_PERIOD)(
-                self._request
-            )
+        self.rate_limiter = get_rate_limiter(rate_limit)
 
-    def _set_tokens(self):
-        """Set the refresh and access tokens"""
-        if self.refresh_token:
-            access_token, self.refresh_token = self._refresh_tokens(self.refresh_token)
-        elif self.username and self.password:
-            access_token, self.refresh_token = self._get_tokens(
-                self.username, self.password
-            )
-        else:
-            access_token = None
+    def _set_tokens(self, used_token=None):
+        """Set the refresh and access tokens
 
-        if access_token:
-            self.session.headers.update(
-                {"Authorization": "Bearer {}".format(access_token)}
+        `used_token` is the access token which was found to be expired.  If another
+        thread has already replaced it there is nothing left to do, so concurrent
+        requests only trigger one refresh.
+        """
+        with self._token_lock:
+            if used_token is not None and used_token != self._access_token:
+                return
+
+            if not self._authenticated and self._load_cached_tokens():
+                self._authenticated = True
+                return
+
+            if self.refresh_token:
+                access_token, self.refresh_token = self._instrument_tokens(
+                    "refresh", self._refresh_tokens, self.refresh_token
+                )
+            elif self.username and self.password:
+                access_token, self.refresh_token = self._instrument_tokens(
+                    "login", self._get_tokens, self.username, self.password
+                )
+            else:
+                access_token = None
+
+            if access_token:
+                self._use_access_token(access_token)
+                if self.token_cache is not None:
+                    self.token_cache.set(
+                        self.username, self.auth_uri, access_token, self.refresh_token
+                    )
+            self._authenticated = True
+
+    def _use_access_token(self, access_token):
+        # the expiry is replaced before the token it belongs to, as requests read
+        # the token first, so they never pair a new token with an old expiry
+        self._access_expires, self._access_lifetime = token_expiry(
+            access_token, self._token_skew
+        )
+        self._access_token = access_token
+
+    def _load_cached_tokens(self):
+        """Load the tokens cached by an earlier run
+
+        Returns True if the cached access token can be used as is.  Otherwise the
+        cached refresh token, if any, is left to be refreshed.
+        """
+        if self.token_cache is None or not self.username:
+            return False
+        tokens = self.token_cache.get(self.username, self.auth_uri)
+        if tokens is None:
+            return False
+        access_token, refresh_token = tokens
+        if refresh_token:
+            self.refresh_token = refresh_token
+        expires, _ = token_expiry(access_token)
+        if expires is None or expires - time.time() <= TOKEN_REFRESH_MARGIN:
+            return False
+        self._use_access_token(access_token)
+        return True
+
+    def _login(self):
+        """Authenticate before the first request, unless another thread already
+        has
+        """
+        with self._token_lock:
+            if not self._authenticated:
+                self._set_tokens()
+
+    def _refresh_expiring_tokens(self):
+        """Refresh the access token shortly before it expires, instead of waiting for
+        a request to be rejected with it
+
+        Within the refresh margin the refresh happens on a background thread, while
+        requests continue with the current token.  Once the token has expired
+        requests wait for the refresh.
+        """
+        access_token, expires = self._access_token, self._access_expires
+        if access_token is None or expires is None:
+            return
+        expires_in = expires - time.time()
+        # short lived tokens get a proportionally short margin
+        margin = min(TOKEN_REFRESH_MARGIN, self._access_lifetime / 10)
+        if expires_in <= 0:
+            self._set_tokens(used_token=access_token)
+        elif expires_in <= margin and self._refresh_lock.acquire(False):
+            thread = threading.Thread(
+                target=self._refresh_in_background, args=(access_token,)
             )
+            thread.daemon = True
+            thread.start()
+
+    def _refresh_in_background(self, access_token):
+        try:
+            self._set_tokens(used_token=access_token)
+        except Exception:  # pylint: disable=broad-except
+            # the token is still valid, so the refresh will be tried again on the
+            # next request
+            logger.warning("Refreshing the access token failed", exc_info=True)
+        finally:
+            self._refresh_lock.release()
+
+    def _instrument_tokens(self, kind, get_tokens, *args):
+        """Call `get_tokens`, reporting how long it took to the event subscribers"""
+        if not self.events.active:
+            return get_tokens(*args)
+        start, started = time.time(), monotonic()
+        try:
+            tokens = get_tokens(*args)
+        except Exception as exc:
+            self.events.emit(TokenEvent(kind, start, monotonic() - started, exc))
+            raise
+        self.events.emit(TokenEvent(kind, start, monotonic() - started, None))
+        return tokens
 
     def _get_tokens(self, username, password):
         """Get an access and refresh token in exchange for the username and password"""
-        response = requests_retry_session().post(
+        response = self.transport.auth.post(
             "{}token/".format(self.auth_uri),
             json={"username": username, "password": password},
             timeout=self.timeout,
@@ -97,12 +268,13 @@ class DocumentCloud(object):
 
         self.raise_for_status(response)
 
+        self._token_skew = clock_skew(response)
         json = response.json()
         return (json["access"], json["refresh"])
 
     def _refresh_tokens(self, refresh_token):
         """Refresh the access and refresh tokens"""
-        response = requests_retry_session().post(
+        response = self.transport.auth.post(
             "{}refresh/".format(self.auth_uri),
             json={"refresh": refresh_token},
             timeout=self.timeout,
@@ -114,41 +286,142 @@ class DocumentCloud(object):
 
         self.raise_for_status(response)
 
+        self._token_skew = clock_skew(response)
         json = response.json()
         return (json["access"], json["refresh"])
 
     @property
     def user_id(self):
         if self._user_id is None:
-            user = self.users.get("me")
-            self._user_id = user.id
+            with self._user_lock:
+                if self._user_id is None:
+                    self._user_id = self.users.get("me").id
         return self._user_id
 
     def _request(self, method, url, raise_error=True, **kwargs):
         """Generic method to make API requests"""
-        # pylint: disable=method-hidden
         logger.info("request: %s - %s - %s", method, url, kwargs)
+        self._wait_for_rate_limit()
         set_tokens = kwargs.pop("set_tokens", True)
         full_url = kwargs.pop("full_url", False)
 
         if not full_url:
             url = "{}{}".format(self.base_uri, url)
 
-        response = requests_retry_session(session=self.session).request(
-            method, url, timeout=self.timeout, **kwargs
-        )
-        logger.debug("response: %s - %s", response.status_code, response.content)
+        if not self._authenticated:
+            self._login()
+        elif set_tokens:
+            self._refresh_expiring_tokens()
+        access_token = self._access_token
+
+        # the token is sent with each request, rather than set on the shared
+        # session, so the token a request was sent with is always known
+        caller_headers = kwargs.pop("headers", None)
+        headers = dict(caller_headers or {})
+        if access_token:
+            headers["Authorization"] = "Bearer {}".format(access_token)
+
+        cache = self._cache_lookup(method, url, kwargs, headers)
+        response = self._send(method, url, headers, cache, **kwargs)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("response: %s - %s", response.status_code, response.content)
         if response.status_code == requests.codes.FORBIDDEN and set_tokens:
-            self._set_tokens()
+            self._set_tokens(used_token=access_token)
             # track set_tokens to not enter an infinite loop
             kwargs["set_tokens"] = False
-            return self._request(method, url, full_url=True, **kwargs)
+            return self._request(
+                method, url, full_url=True, headers=caller_headers, **kwargs
+            )
 
         if raise_error:
             self.raise_for_status(response)
 
         return response
 
+    def _wait_for_rate_limit(self):
+        """Wait for the rate limiter, reporting any wait to the event subscribers"""
+        if self.rate_limiter is not None:
+            wait = self.rate_limiter.acquire()
+            if wait and self.events.active:
+                self.events.emit(RateLimitEvent(wait))
+
+    def _cache_lookup(self, method, url, kwargs, headers):
+        """The HTTP cache's key and cached response for a request, adding the
+        headers to revalidate the cached response with
+        """
+        if self.http_cache is None or method != "get":
+            return None, None
+        cache_key = self.http_cache.key(self.username, url, kwargs.get("params"))
+        # kept to answer a 304, even if it leaves the cache before then
+        cached = self.http_cache.get(cache_key)
+        headers.update(self.http_cache.conditional_headers(cached))
+        return cache_key, cached
+
+    def _cache_response(self, method, url, cache, response):
+        """Update the HTTP cache with a response, returning the response to use"""
+        cache_key, cached = cache
+        if cache_key is not None:
+            return self.http_cache.update(cache_key, response, cached)
+        if self.http_cache is not None and method not in ("head", "options"):
+            # writes may change the object at the URL and anything below it
+            self.http_cache.invalidate(url.split("?", 1)[0])
+        return response
+
+    def _send(self, method, url, headers, cache, **kwargs):
+        """Send a request on the session, updating the HTTP cache with the response
+        and reporting it to the event subscribers
+        """
+        instrument = self.events.active
+        if instrument:
+            start, started = time.time(), monotonic()
+        try:
+            response = self.session.request(
+                method, url, headers=headers, timeout=self.timeout, **kwargs
+            )
+        except requests.exceptions.RequestException as exc:
+            if instrument:
+                self._emit_request(method, url, start, monotonic() - started, error=exc)
+            raise
+        response = self._cache_response(method, url, cache, response)
+        if instrument:
+            self._emit_request(method, url, start, monotonic() - started, response)
+        return response
+
+    def _emit_request(self, method, url, start, latency, response=None, error=None):
+        """Report a request to the event subscribers"""
+        path = url.split("?", 1)[0]
+        if path.startswith(self.base_uri):
+            path = path[len(self.base_uri) :]
+        else:
+            path = urlparse(path).path
+        status, sent, received, retries, from_cache = None, 0, 0, 0, False
+        if response is not None:
+            status = response.status_code
+            body = response.request.body if response.request is not None else None
+            sent = len(body) if body else 0
+            received = len(response.content)
+            history = getattr(getattr(response.raw, "retries", None), "history", ())
+            retries = len(history)
+            from_cache = getattr(response, "from_cache", False)
+        self.events.emit(
+            RequestEvent(
+                method.upper(),
+                path_template(path),
+                status,
+                start,
+                latency,
+                sent,
+                received,
+                retries,
+                from_cache,
+                error,
+            )
+        )
+
+    def close(self):
+        """Close all pooled connections"""
+        self.transport.close()
+
     def __getattr__(self, attr):
         """Generate methods for each HTTP request type"""
         methods = ["get", "options", "head", "post", "put", "patch", "delete"]
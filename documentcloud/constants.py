@@ -8,3 +8,11 @@ AUTH_URI = "https://accounts.muckrock.com/api/"
 TIMEOUT = 10
 RATE_LIMIT = 10
 RATE_PERIOD = 1
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 10
+POOL_BLOCK = False
+TOKEN_REFRESH_MARGIN = 30
+HTTP_CACHE_SIZE = 256
+BATCH_WINDOW = 0.01
+FETCH_WORKERS = 4
+PARQUET_PENDING_PAGES = 10
@@ -8,30 +8,167 @@ from __future__ import division, print_function, unicode_literals
 # Standard Library
 import logging
 import os
-import re
 import warnings
-from functools import partial
 
 # Third Party
-from future.utils import python_2_unicode_compatible
+from future.utils import python_2_unicode_compatible, with_metaclass
 from requests.exceptions import RequestException
 
 # Local
 from .annotations import AnnotationClient
-from .base import APIResults, BaseAPIClient, BaseAPIObject
+from .base import (
+    APIObjectMeta,
+    APIResults,
+    BaseAPIClient,
+    BaseAPIObject,
+    LazyChildClient,
+)
+from .changes import ChangeFeed
 from .constants import BULK_LIMIT
 from .exceptions import APIError
-from .organizations import Organization
 from .sections import SectionClient
-from .toolbox import grouper, is_url, merge_dicts, requests_retry_session
-from .users import User
+from .toolbox import field_params, grouper, is_url, merge_dicts
 
 logger = logging.getLogger("documentcloud")
 
 
+# the fields of a document kept in the slots of a `CompactDocument`
+COMPACT_FIELDS = (
+    "id",
+    "access",
+    "asset_url",
+    "canonical_url",
+    "created_at",
+    "data",
+    "description",
+    "edit_access",
+    "language",
+    "organization_id",
+    "page_count",
+    "page_spec",
+    "projects",
+    "published_url",
+    "related_article",
+    "slug",
+    "source",
+    "status",
+    "title",
+    "updated_at",
+    "user_id",
+)
+COMPACT_SLOTS = COMPACT_FIELDS + (
+    "_client",
+    "_user",
+    "_organization",
+    "_sections",
+    "_annotations",
+    "_extra",
+)
+
+IMAGE_SIZES = ("thumbnail", "small", "normal", "large")
+
+
+def _split_nested(dict_):
+    """Replace a document's potentially nested user and organization, which may
+    have been left out, with their IDs
+
+    Nested objects are kept as dictionaries, and only built when they are used
+    """
+    for name in ("user", "organization"):
+        value = dict_.get(name)
+        if isinstance(value, dict):
+            dict_["_" + name] = value
+            dict_[name + "_id"] = value.get("id")
+        else:
+            dict_["_" + name] = None
+            dict_[name + "_id"] = value
+
+
+class Shortcut(object):
+    """Reads as the result of calling the `getter` method with no arguments, so
+    that `document.full_text` is `document.get_full_text()`
+
+    Values in the object's dictionary, or a compact document's overflow
+    dictionary, take precedence.
+    """
+
+    def __init__(self, getter):
+        self.getter = getter
+        self.name = getter[len("get_") :]
+
+    def __get__(self, obj, type_=None):
+        if obj is None:
+            return self
+        extra = obj._extra  # pylint: disable=protected-access
+        if extra and self.name in extra:
+            return extra[self.name]
+        return getattr(obj, self.getter)()
+
+
+def _sized_image_url(size):
+    def get_sized_image_url(self, page=1):
+        return self.get_image_url(page=page, size=size)
+
+    get_sized_image_url.__name__ = str("get_{}_image_url".format(size))
+    return get_sized_image_url
+
+
+def _sized_image_url_list(size):
+    def get_sized_image_url_list(self):
+        return self.get_image_url_list(size=size)
+
+    get_sized_image_url_list.__name__ = str("get_{}_image_url_list".format(size))
+    return get_sized_image_url_list
+
+
+def _fetch_url(url_getter, text):
+    def fetch(self, *args, **kwargs):
+        # a method of the document once it is set on the class
+        # pylint: disable=protected-access
+        return self._get_url(getattr(self, url_getter)(*args, **kwargs), text)
+
+    fetch.__name__ = str(url_getter[: -len("_url")])
+    return fetch
+
+
+class DocumentMeta(APIObjectMeta):
+    """Generates a document's resource accessors when the class is created
+
+    For every size of image there are `get_<size>_image_url` and
+    `get_<size>_image_url_list` methods, for every `get_<name>_url` method there
+    is a `get_<name>` method fetching the resource, and every `get_<name>` method
+    can be read as a `<name>` attribute.  Accessors a class defines itself are left
+    alone.
+    """
+
+    def __init__(cls, name, bases, attrs):
+        super(DocumentMeta, cls).__init__(name, bases, attrs)
+        names = set(dir(cls))
+
+        def add(name, value):
+            if name not in names:
+                setattr(cls, name, value)
+                names.add(name)
+
+        for size in IMAGE_SIZES:
+            add("get_{}_image_url".format(size), _sized_image_url(size))
+            add("get_{}_image_url_list".format(size), _sized_image_url_list(size))
+        for url_getter in sorted(names):
+            if url_getter.startswith("get_") and url_getter.endswith("_url"):
+                getter = url_getter[: -len("_url")]
+                add(getter, _fetch_url(url_getter, getter.endswith("_text")))
+        for getter in sorted(names):
+            if getter.startswith("get_"):
+                add(getter[len("get_") :], Shortcut(getter))
+
+
 @python_2_unicode_compatible
-class Document(BaseAPIObject):
-    """A single DocumentCloud document"""
+class BaseDocument(with_metaclass(DocumentMeta, BaseAPIObject)):
+    """What `Document` and `CompactDocument` share, without the dictionary a
+    document keeps its fields in
+    """
+
+    __slots__ = ()
 
     api_path = "documents"
     writable_fields = [
@@ -46,72 +183,21 @@ class Document(BaseAPIObject):
     ]
     date_fields = ["created_at", "updated_at"]
 
-    def __init__(self, client, dict_):
-
-        # deal with potentially nested objects
-        objs = [("user", User), ("organization", Organization)]
-        for name, resource in objs:
-            value = dict_.get(name)
-            if isinstance(value, dict):
-                dict_["_" + name] = resource(client, value)
-                dict_[name + "_id"] = value.get("id")
-            elif isinstance(value, int):
-                dict_["_" + name] = None
-                dict_[name + "_id"] = value
-
-        super(Document, self).__init__(client, dict_)
+    sections = LazyChildClient("sections", SectionClient)
+    annotations = LazyChildClient("annotations", AnnotationClient)
 
-        self.sections = SectionClient(client, self)
-        self.annotations = AnnotationClient(client, self)
-        self.notes = self.annotations
+    # only compact documents have an overflow dictionary
+    _extra = None
 
     def __str__(self):
         return self.title
 
-    def __getattr__(self, attr):
-        """Generate methods for fetching resources"""
-        p_image = re.compile(
-            r"^get_(?P<size>thumbnail|small|normal|large)_image_url(?P<list>_list)?$"
-        )
-        get = attr.startswith("get_")
-        url = attr.endswith("_url")
-        text = attr.endswith("_text")
-        # this allows dropping `get_` to act like a property, ie
-        # .full_text_url
-        if not get and hasattr(self, "get_{}".format(attr)):
-            return getattr(self, "get_{}".format(attr))()
-        # this allows dropping `_url` to fetch the url, ie
-        # .get_full_text()
-        if not url and hasattr(self, "{}_url".format(attr)):
-            return lambda *a, **k: self._get_url(
-                getattr(self, "{}_url".format(attr))(*a, **k), text
-            )
-        # this genericizes the image sizes
-        m_image = p_image.match(attr)
-        if m_image and m_image.group("list"):
-            return partial(self.get_image_url_list, size=m_image.group("size"))
-        if m_image and not m_image.group("list"):
-            return partial(self.get_image_url, size=m_image.group("size"))
-        raise AttributeError(
-            "'{}' object has no attribute '{}'".format(self.__class__.__name__, attr)
-        )
+    def __eq__(self, obj):
+        # a compact document equals the full document with the same ID
+        return isinstance(obj, BaseDocument) and self.id == obj.id
 
     def __dir__(self):
-        attrs = dir(type(self)) + list(self.__dict__.keys())
-        getters = [a for a in attrs if a.startswith("get_")]
-        attrs += [a[len("get_") :] for a in getters]
-        attrs += [a[: -len("_url")] for a in getters if a.endswith("url")]
-        attrs += [a[len("get_") : -len("_url")] for a in getters if a.endswith("url")]
-        for size in ["thumbnail", "small", "normal", "large"]:
-            attrs += [
-                "get_{}_image_url".format(size),
-                "{}_image_url".format(size),
-                "get_{}_image".format(size),
-                "{}_image".format(size),
-                "get_{}_image_url_list".format(size),
-                "{}_image_url_list".format(size),
-            ]
-        return sorted(attrs)
+        return sorted(set(dir(type(self))) | set(getattr(self, "__dict__", ())))
 
     @property
     def pages(self):
@@ -128,19 +214,27 @@ class Document(BaseAPIObject):
         else:
             return []
 
+    @property
+    def notes(self):
+        return self.annotations
+
+    def _get_nested(self, name, client):
+        value = getattr(self, "_" + name)
+        if isinstance(value, dict):
+            value = client.resource(self._client, value)
+            setattr(self, "_" + name, value)
+        elif value is None and getattr(self, name + "_id") is not None:
+            value = client.get(getattr(self, name + "_id"))
+            setattr(self, "_" + name, value)
+        return value
+
     @property
     def user(self):
-        # pylint:disable=access-member-before-definition
-        if self._user is None:
-            self._user = self._client.users.get(self.user_id)
-        return self._user
+        return self._get_nested("user", self._client.users)
 
     @property
     def organization(self):
-        # pylint:disable=access-member-before-definition
-        if self._organization is None:
-            self._organization = self._client.organizations.get(self.organization_id)
-        return self._organization
+        return self._get_nested("organization", self._client.organizations)
 
     @property
     def contributor(self):
@@ -155,7 +249,7 @@ class Document(BaseAPIObject):
         return self.organization.slug
 
     def _get_url(self, url, text):
-        response = requests_retry_session().get(
+        response = self._client.transport.asset.get(
             url, headers={"User-Agent": "python-documentcloud2"}
         )
         if text:
@@ -189,14 +283,104 @@ class Document(BaseAPIObject):
         ]
 
 
+class Document(BaseDocument):
+    """A single DocumentCloud document"""
+
+    def __init__(self, client, dict_):
+        _split_nested(dict_)
+        super(Document, self).__init__(client, dict_)
+
+
+class CompactDocument(BaseDocument):
+    """A document taking less memory, for keeping many documents at once
+
+    The fields every document has are kept in slots instead of a dictionary, and
+    any others in an overflow dictionary created when the first of them is set.  It
+    is a `BaseDocument` rather than a `Document`, so as not to inherit the
+    dictionary, and equals a `Document` with the same ID.  An overflow field
+    with the same name as one of the class's methods or properties, such as
+    `notes`, is hidden by it, while one named like a shortcut, such as
+    `full_text`, is read instead of fetching the resource, as it would be for a
+    `Document`.
+    """
+
+    __slots__ = COMPACT_SLOTS
+    _slot_names = frozenset(COMPACT_SLOTS)
+
+    sections = LazyChildClient("sections", SectionClient, "_sections")
+    annotations = LazyChildClient("annotations", AnnotationClient, "_annotations")
+
+    def __init__(self, client, dict_):
+        # pylint: disable=super-init-not-called
+        self._extra = None
+        self._client = client
+        self._sections = self._annotations = None
+        _split_nested(dict_)
+        for name, value in dict_.items():
+            # the nested objects are kept in _user and _organization
+            if name not in ("user", "organization"):
+                setattr(self, name, value)
+
+    def __setattr__(self, name, value):
+        if name in self._slot_names:
+            super(CompactDocument, self).__setattr__(name, value)
+        elif self._extra is None:
+            self._extra = {name: value}
+        else:
+            self._extra[name] = value
+
+    def __getattr__(self, attr):
+        if attr == "_extra":
+            raise AttributeError(attr)
+        try:
+            return self._extra[attr]
+        except (KeyError, TypeError):
+            raise AttributeError(
+                "'{}' object has no attribute '{}'".format(
+                    self.__class__.__name__, attr
+                )
+            )
+
+    def __copy__(self):
+        clone = self.__class__.__new__(self.__class__)
+        for name in COMPACT_SLOTS:
+            try:
+                value = getattr(self, name)
+            except AttributeError:
+                # the field was left out of the response
+                continue
+            object.__setattr__(clone, name, value)
+        # pylint: disable=protected-access
+        clone._extra = None if self._extra is None else dict(self._extra)
+        return clone
+
+
 class DocumentClient(BaseAPIClient):
     """Client for interacting with Documents"""
 
     api_path = "documents"
     resource = Document
 
-    def search(self, query, **params):
-        """Return documents matching a search query"""
+    def compact(self):
+        """A client returning `CompactDocument`s, which take less memory"""
+        return CompactDocumentClient(self.client)
+
+    def changes(self, since=None, **params):
+        """The documents updated after `since`, a `Checkpoint`, a checkpoint's token
+        or a datetime, in the order they were updated
+
+        Iterating over the returned `ChangeFeed` keeps the checkpoint of the last
+        document in its `checkpoint`.  `params` filter the documents like `list`'s.
+        """
+        return ChangeFeed(self, since, **params)
+
+    def search(self, query, prefetch=None, fields=None, **params):
+        """Return documents matching a search query
+
+        With `fields`, the API only returns those fields of each document.  With
+        `prefetch`, iterating over the results fetches up to that many of the
+        following pages in the background
+        """
 
         mentions = params.pop("mentions", None)
         if mentions is not None:  # pragma: no cover
@@ -215,8 +399,10 @@ class DocumentClient(BaseAPIClient):
 
         if query:
             params["q"] = query
-        response = self.client.get("documents/search/", params=params)
-        return APIResults(self.resource, self.client, response)
+        response = self.client.get(
+            "documents/search/", params=field_params(params, fields=fields)
+        )
+        return APIResults(self.resource, self.client, response, prefetch=prefetch)
 
     def upload(self, pdf, **kwargs):
         """Upload a document"""
@@ -300,7 +486,7 @@ class DocumentClient(BaseAPIClient):
         # upload the file directly to storage
         create_json = response.json()
         presigned_url = create_json["presigned_url"]
-        response = requests_retry_session().put(presigned_url, data=file_.read())
+        response = self.client.transport.storage.put(presigned_url, data=file_.read())
 
         # begin processing the document
         doc_id = create_json["id"]
@@ -313,7 +499,7 @@ class DocumentClient(BaseAPIClient):
     def _collect_files(self, path):
         """Find the paths to all pdfs under a directory"""
         path_list = []
-        for (dirpath, _dirname, filenames) in os.walk(path):
+        for dirpath, _dirname, filenames in os.walk(path):
             path_list.extend(
                 [
                     os.path.join(dirpath, i)
@@ -374,7 +560,7 @@ class DocumentClient(BaseAPIClient):
             for url, pdf_path in zip(presigned_urls, pdf_paths):
                 logger.info("Uploading %s to S3...", pdf_path)
                 try:
-                    response = requests_retry_session().put(
+                    response = self.client.transport.storage.put(
                         url, data=open(pdf_path, "rb").read()
                     )
                     self.client.raise_for_status(response)
@@ -411,6 +597,12 @@ class DocumentClient(BaseAPIClient):
         return [Document(self.client, d) for d in obj_list]
 
 
+class CompactDocumentClient(DocumentClient):
+    """Client for interacting with Documents, returning `CompactDocument`s"""
+
+    resource = CompactDocument
+
+
 @python_2_unicode_compatible
 class Mention:
     """A snippet from a document search"""
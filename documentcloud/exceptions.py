@@ -39,3 +39,7 @@ class DoesNotExistError(APIError):
 
 class MultipleObjectsReturnedError(APIError):
     """Raised when the API returns multiple objects when it expected one"""
+
+
+class CircuitOpenError(APIError):
+    """Raised instead of sending a request to a host which keeps failing"""
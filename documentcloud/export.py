@@ -0,0 +1,246 @@
+"""
+Export results straight from the API's responses, a page at a time, to columns,
+CSV, JSON lines, Arrow and Parquet, without building a resource for each result
+
+Fields may name values in nested objects with dots, such as `user.name`, and are
+empty where a result does not have them.  Arrow and Parquet require the optional
+`pyarrow` dependency, which can be installed with `pip install documentcloud[arrow]`
+"""
+
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import csv
+import json
+from collections import OrderedDict
+from itertools import chain
+
+# Local
+from .constants import PARQUET_PENDING_PAGES
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+
+def field_names(rows):
+    """Every field in `rows`, in the order they first appear"""
+    names = OrderedDict()
+    for row in rows:
+        for name in row:
+            names[name] = None
+    return list(names)
+
+
+def _getters(fields):
+    """A function to get each field's value from a row"""
+
+    def nested(path):
+        def get(row):
+            for key in path:
+                if not isinstance(row, dict):
+                    return None
+                row = row.get(key)
+            return row
+
+        return get
+
+    return [
+        nested(f.split(".")) if "." in f else (lambda row, f=f: row.get(f))
+        for f in fields
+    ]
+
+
+def _rows(pages, fields):
+    """The fields, defaulting to those on the first page, and a tuple of their
+    values for each row
+    """
+    pages = iter(pages)
+    first = next(pages, [])
+    if fields is None:
+        fields = field_names(first)
+    getters = _getters(fields)
+
+    rows = (
+        tuple(get(row) for get in getters)
+        for page in chain([first], pages)
+        for row in page
+    )
+    return fields, rows
+
+
+def _column_pages(pages, fields):
+    """The fields, defaulting to those on the first page, and an ordered dictionary
+    of the columns on each page
+    """
+    pages = iter(pages)
+    first = next(pages, [])
+    if fields is None:
+        fields = field_names(first)
+    getters = _getters(fields)
+
+    def page_columns(page):
+        return OrderedDict(
+            (field, [get(row) for row in page]) for field, get in zip(fields, getters)
+        )
+
+    return fields, (page_columns(page) for page in chain([first], pages))
+
+
+def columns(pages, fields=None):
+    """An ordered dictionary of a list of values for each field"""
+    fields, column_pages = _column_pages(pages, fields)
+    merged = OrderedDict((field, []) for field in fields)
+    for page in column_pages:
+        for field, values in page.items():
+            merged[field].extend(values)
+    return merged
+
+
+def _json(value):
+    """Nested objects and lists as JSON"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def write_csv(pages, file_, fields=None):
+    """Write a header and a row for each result, returning the number of results
+
+    `file_` should be opened with `newline=""`
+    """
+    fields, rows = _rows(pages, fields)
+    writer = csv.writer(file_)
+    writer.writerow(fields)
+    count = 0
+    for row in rows:
+        writer.writerow(["" if v is None else _json(v) for v in row])
+        count += 1
+    return count
+
+
+def write_jsonl(pages, file_, fields=None):
+    """Write each result as a line of JSON, returning the number of results
+
+    Without `fields`, the results are written as the API returned them
+    """
+    count = 0
+    if fields is None:
+        for page in pages:
+            for row in page:
+                file_.write(json.dumps(row) + "\n")
+                count += 1
+        return count
+    fields, rows = _rows(pages, fields)
+    for row in rows:
+        file_.write(json.dumps(OrderedDict(zip(fields, row))) + "\n")
+        count += 1
+    return count
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise ImportError(
+            "Exporting to Arrow and Parquet requires pyarrow, which can be installed "
+            "with `pip install documentcloud[arrow]`"
+        )
+
+
+def _widen(schema, other):
+    """`schema`, with the fields which have been empty so far given their types in
+    `other`
+    """
+    try:
+        return pyarrow.unify_schemas([schema, other])
+    except pyarrow.ArrowException as exc:
+        raise ValueError(
+            "The results' types changed between pages, pass a `schema` to convert "
+            "them to: {}".format(exc)
+        )
+
+
+def _cast(batch, schema):
+    """A table of `batch` with `schema`, which may widen its fields"""
+    try:
+        return pyarrow.Table.from_batches([batch]).cast(schema)
+    except pyarrow.ArrowException as exc:
+        raise ValueError(
+            "A field empty on the first pages had values on a later one, pass a "
+            "`schema` to convert them to: {}".format(exc)
+        )
+
+
+def _untyped(schema):
+    """Whether any field has only been empty"""
+    return any(pyarrow.types.is_null(f.type) for f in schema)
+
+
+def record_batches(pages, fields=None, schema=None):
+    """Yield a `pyarrow.RecordBatch` for each page
+
+    Without `schema`, it is inferred from the pages as they come, with nested
+    objects and lists, whose shape may differ between results, kept as JSON.
+    Fields which have only been empty are of Arrow's null type, and are widened
+    to the type of their values on a later page, so a batch's schema may be wider
+    than those before it.  With `schema`, the values are converted to its types as
+    they are.
+    """
+    _require_pyarrow()
+    infer = schema is None
+    fields, column_pages = _column_pages(pages, fields)
+    for page in column_pages:
+        if infer:
+            page = OrderedDict(
+                (field, [_json(v) for v in values]) for field, values in page.items()
+            )
+            inferred = pyarrow.RecordBatch.from_pydict(page).schema
+            schema = inferred if schema is None else _widen(schema, inferred)
+        yield pyarrow.RecordBatch.from_pydict(page, schema=schema)
+
+
+def arrow_table(pages, fields=None, schema=None):
+    """A `pyarrow.Table` of every result, with the schema of the last page, which
+    is the widest
+    """
+    batches = list(record_batches(pages, fields, schema))
+    return pyarrow.concat_tables([_cast(b, batches[-1].schema) for b in batches])
+
+
+def write_parquet(pages, where, fields=None, schema=None, **kwargs):
+    """Write the results to a Parquet file, a row group per page, returning the
+    number of results
+
+    `where` is a path or a file object, and `kwargs` are passed on to
+    `pyarrow.parquet.ParquetWriter`.  A file's schema cannot change, so without
+    `schema`, up to `PARQUET_PENDING_PAGES` pages are held back until every field
+    has had a value.  Fields still empty after them are written with Arrow's null
+    type, and values for them on a later page raise a `ValueError`.
+    """
+    count = 0
+    writer = None
+    pending = []
+
+    def write():
+        for batch in pending:
+            writer.write_table(_cast(batch, writer.schema))
+        del pending[:]
+
+    try:
+        for batch in record_batches(pages, fields, schema):
+            pending.append(batch)
+            count += batch.num_rows
+            if writer is None:
+                if len(pending) < PARQUET_PENDING_PAGES and _untyped(batch.schema):
+                    continue
+                writer = pyarrow.parquet.ParquetWriter(where, batch.schema, **kwargs)
+            write()
+        if writer is None:
+            writer = pyarrow.parquet.ParquetWriter(where, pending[-1].schema, **kwargs)
+            write()
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
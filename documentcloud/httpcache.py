@@ -0,0 +1,242 @@
+"""
+A validating cache for API responses, so that fetching an unchanged object again
+costs a `304 Not Modified` instead of the full response
+"""
+
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Third Party
+import requests
+from requests.models import PreparedRequest
+from requests.structures import CaseInsensitiveDict
+
+# Local
+from .constants import HTTP_CACHE_SIZE
+
+# a counter, rather than a timestamp, orders uses so that they never tie
+NEXT_USE = "SELECT coalesce(max(used), 0) + 1 FROM responses"
+
+
+def get_http_cache(http_cache):
+    """Build the HTTP cache for a client
+
+    `http_cache` may be True for an in memory cache, False or None for no cache, a
+    path to keep the cache in a SQLite file, or an `HTTPCache` of your own
+    """
+    # caches define __len__, so an empty one is falsy
+    if http_cache is True:
+        return HTTPCache()
+    elif http_cache is None or http_cache is False:
+        return None
+    elif isinstance(http_cache, (str, type(""))):
+        return FileHTTPCache(http_cache)
+    return http_cache
+
+
+class HTTPCache(object):
+    """A bounded, thread safe, least recently used cache of API responses held in
+    memory
+
+    Responses are only cached if they carry an `ETag` or `Last-Modified` header,
+    and they are never served without asking the server first.  Each GET for a
+    cached URL sends the validators of the entry from `get`, and that entry is
+    passed to `update`, which uses it only when the server answers `304 Not
+    Modified`.  Any other request invalidates the cached
+    responses for its URL and everything below it.
+    """
+
+    def __init__(self, maxsize=HTTP_CACHE_SIZE):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    # storage
+
+    def get(self, key):
+        """The cached entry for `key`, or None"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                # re-insert to mark it as the most recently used
+                self._entries[key] = entry
+            return entry
+
+    def set(self, key, entry):
+        """Cache `entry` under `key`, evicting the least recently used entries if
+        the cache is full
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url):
+        """Remove every entry for `url` or a URL below it"""
+        with self._lock:
+            for key in [
+                k for k, e in self._entries.items() if e["url"].startswith(url)
+            ]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    # HTTP
+
+    def key(self, username, url, params=None):
+        """The cache key for a GET request, kept apart by user so one account is
+        never served another's private responses
+        """
+        prepared = PreparedRequest()
+        prepared.prepare_url(url, params)
+        return "{} {}".format(username or "", prepared.url)
+
+    def conditional_headers(self, entry):
+        """The headers asking the server whether a cached entry has changed"""
+        if entry is None:
+            return {}
+        headers = {}
+        if entry["headers"].get("ETag"):
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if entry["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        return headers
+
+    def update(self, key, response, entry=None):
+        """Cache a fresh response, or replace a `304 Not Modified` response with the
+        cached `entry` whose validators were sent
+
+        The entry is kept from when the request was made, rather than looked up
+        again, as it may have been evicted or invalidated in the meantime.
+        """
+        if response.status_code == requests.codes.NOT_MODIFIED:
+            if entry is None:
+                return response
+            return self._build_response(entry, response)
+
+        cache_control = response.headers.get("Cache-Control", "")
+        if (
+            response.status_code == requests.codes.OK
+            and "no-store" not in cache_control
+            and (response.headers.get("ETag") or response.headers.get("Last-Modified"))
+        ):
+            url = response.request.url if response.request is not None else ""
+            self.set(
+                key,
+                {
+                    "url": url.split("?", 1)[0],
+                    "headers": dict(response.headers),
+                    "content": response.content,
+                    "encoding": response.encoding,
+                },
+            )
+        return response
+
+    def _build_response(self, entry, not_modified):
+        response = requests.Response()
+        response.status_code = requests.codes.OK
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        # a 304 may carry updated validators
+        for header in ("ETag", "Last-Modified", "Date"):
+            if header in not_modified.headers:
+                response.headers[header] = not_modified.headers[header]
+        response._content = entry["content"]  # pylint: disable=protected-access
+        response.encoding = entry["encoding"]
+        response.url = not_modified.url
+        response.request = not_modified.request
+        response.elapsed = not_modified.elapsed
+        response.connection = not_modified.connection
+        response.from_cache = True
+        return response
+
+
+class FileHTTPCache(HTTPCache):
+    """An `HTTPCache` kept in a SQLite file, so it survives between runs and may be
+    shared by several processes
+    """
+
+    def __init__(self, path, maxsize=HTTP_CACHE_SIZE):
+        super(FileHTTPCache, self).__init__(maxsize)
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, url TEXT, headers TEXT, content BLOB, "
+                "encoding TEXT, used INTEGER)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_used ON responses (used)"
+            )
+
+    def get(self, key):
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT url, headers, content, encoding FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE responses SET used = ({}) WHERE key = ?".format(NEXT_USE),
+                (key,),
+            )
+        return {
+            "url": row[0],
+            "headers": json.loads(row[1]),
+            "content": bytes(row[2]),
+            "encoding": row[3],
+        }
+
+    def set(self, key, entry):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ({}))".format(
+                    NEXT_USE
+                ),
+                (
+                    key,
+                    entry["url"],
+                    json.dumps(entry["headers"]),
+                    sqlite3.Binary(entry["content"]),
+                    entry["encoding"],
+                ),
+            )
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+                "ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+
+    def invalidate(self, url):
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM responses WHERE substr(url, 1, ?) = ?", (len(url), url)
+            )
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM responses")
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        """Close the cache file"""
+        self._db.close()
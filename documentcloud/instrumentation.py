@@ -0,0 +1,270 @@
+"""
+Events describing what a client spends its time on, and subscribers to collect them
+"""
+
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import bisect
+import logging
+import re
+import threading
+from collections import namedtuple
+
+try:
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:  # pragma: no cover
+    SpanKind = Status = StatusCode = None
+
+logger = logging.getLogger("documentcloud")
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# A request to the API
+# method - the HTTP method, in upper case
+# path - the path template, with IDs replaced by `{id}`, such as `documents/{id}/`
+# status - the status code, or None if no response was received
+# start - the wall clock time the request was sent at
+# latency - seconds until the response was received
+# bytes_sent, bytes_received - the size of the request and response bodies
+# retries - how many times the request was retried by the transport
+# from_cache - whether the body was served from the HTTP cache after a 304
+# error - the exception raised if no response was received
+RequestEvent = namedtuple(
+    "RequestEvent",
+    "method path status start latency bytes_sent bytes_received retries "
+    "from_cache error",
+)
+
+# Getting new tokens
+# kind - `login` for a username and password, or `refresh`
+# latency - seconds spent getting the tokens
+# error - the exception raised, if getting the tokens failed
+TokenEvent = namedtuple("TokenEvent", "kind start latency error")
+
+# A request held back by the rate limiter for `wait` seconds
+RateLimitEvent = namedtuple("RateLimitEvent", "wait")
+
+ID_SEGMENT = re.compile(r"^(?:\d+|[\w-]+-\d+)$")
+
+
+def path_template(path):
+    """Replace the IDs in an API path with `{id}`, so requests for different
+    objects of the same kind are counted together
+    """
+    return "/".join(
+        "{id}" if ID_SEGMENT.match(segment) else segment for segment in path.split("/")
+    )
+
+
+class EventBus(object):
+    """Passes each event to every subscriber
+
+    Subscribers are callables taking one event.  They are called on the thread
+    which made the request, so they should be quick.  An exception raised by a
+    subscriber is logged and does not affect the request.
+    """
+
+    def __init__(self):
+        self._subscribers = ()
+        self._lock = threading.Lock()
+
+    def subscribe(self, subscriber):
+        """Start passing events to `subscriber`, and return it"""
+        with self._lock:
+            self._subscribers = self._subscribers + (subscriber,)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Stop passing events to `subscriber`"""
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s != subscriber)
+
+    @property
+    def active(self):
+        """Whether anything is subscribed, so events are worth measuring"""
+        return bool(self._subscribers)
+
+    def emit(self, event):
+        for subscriber in self._subscribers:
+            try:
+                subscriber(event)
+            except Exception:  # pylint: disable=broad-except
+                logger.warning("Event subscriber %r failed", subscriber, exc_info=True)
+
+
+class Histogram(object):
+    """Counts of values falling into each bucket, by upper bound"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        # the final count is for values above the last bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, fraction):
+        """The upper bound of the bucket holding the given quantile, or None if it
+        is above every bucket or there are no values
+        """
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": dict(zip(self.buckets + ("+Inf",), self.counts)),
+        }
+
+
+class EndpointStats(object):
+    """Aggregate statistics for one method and path template"""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.statuses = {}
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+        self.cache_hits = 0
+
+    def add(self, event):
+        self.latency.add(event.latency)
+        self.statuses[event.status] = self.statuses.get(event.status, 0) + 1
+        if event.error is not None or (event.status or 0) >= 400:
+            self.errors += 1
+        self.bytes_sent += event.bytes_sent
+        self.bytes_received += event.bytes_received
+        self.retries += event.retries
+        self.cache_hits += event.from_cache
+
+    def as_dict(self):
+        return {
+            "latency": self.latency.as_dict(),
+            "statuses": dict(self.statuses),
+            "errors": self.errors,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "retries": self.retries,
+            "cache_hits": self.cache_hits,
+        }
+
+
+class MetricsAggregator(object):
+    """An event subscriber keeping latency histograms and totals per endpoint in
+    memory
+
+        >>> metrics = client.events.subscribe(MetricsAggregator())
+        >>> metrics.summary()
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+            self.tokens = {}
+            self.token_time = 0.0
+            self.rate_limit_waits = 0
+            self.rate_limit_time = 0.0
+
+    def __call__(self, event):
+        with self._lock:
+            if isinstance(event, RequestEvent):
+                key = (event.method, event.path)
+                if key not in self.endpoints:
+                    self.endpoints[key] = EndpointStats()
+                self.endpoints[key].add(event)
+            elif isinstance(event, TokenEvent):
+                self.tokens[event.kind] = self.tokens.get(event.kind, 0) + 1
+                self.token_time += event.latency
+            elif isinstance(event, RateLimitEvent):
+                self.rate_limit_waits += 1
+                self.rate_limit_time += event.wait
+
+    def summary(self):
+        """The statistics collected so far, as plain data"""
+        with self._lock:
+            return {
+                "endpoints": {
+                    "{} {}".format(*key): stats.as_dict()
+                    for key, stats in self.endpoints.items()
+                },
+                "tokens": dict(self.tokens),
+                "token_time": self.token_time,
+                "rate_limit_waits": self.rate_limit_waits,
+                "rate_limit_time": self.rate_limit_time,
+            }
+
+
+class SpanAdapter(object):
+    """An event subscriber recording each request and token refresh as a span on
+    an OpenTelemetry style tracer
+
+    The tracer only needs `start_span(name, start_time=..., attributes=...)`,
+    returning a span with `set_attribute`, `record_exception` and
+    `end(end_time=...)`.  Times are in nanoseconds since the epoch.  When the
+    `opentelemetry-api` package is installed, spans are also marked as client spans
+    and given an error status for failed requests.
+    """
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+
+    def _start_span(self, name, start, attributes):
+        kwargs = {"start_time": int(start * 1e9), "attributes": attributes}
+        if SpanKind is not None:
+            kwargs["kind"] = SpanKind.CLIENT
+        return self.tracer.start_span(name, **kwargs)
+
+    def _end_span(self, span, start, latency, error, failed):
+        if error is not None:
+            span.record_exception(error)
+        if failed and Status is not None:
+            span.set_status(Status(StatusCode.ERROR))
+        span.end(end_time=int((start + latency) * 1e9))
+
+    def __call__(self, event):
+        if isinstance(event, RequestEvent):
+            attributes = {
+                "http.request.method": event.method,
+                "http.route": event.path,
+                "http.request.body.size": event.bytes_sent,
+                "http.response.body.size": event.bytes_received,
+                "http.request.resend_count": event.retries,
+                "documentcloud.from_cache": event.from_cache,
+            }
+            if event.status is not None:
+                attributes["http.response.status_code"] = event.status
+            span = self._start_span(
+                "{} {}".format(event.method, event.path), event.start, attributes
+            )
+            failed = event.error is not None or (event.status or 0) >= 400
+            self._end_span(span, event.start, event.latency, event.error, failed)
+        elif isinstance(event, TokenEvent):
+            span = self._start_span(
+                "documentcloud.tokens.{}".format(event.kind), event.start, {}
+            )
+            failed = event.error is not None
+            self._end_span(span, event.start, event.latency, event.error, failed)
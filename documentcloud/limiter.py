@@ -0,0 +1,227 @@
+"""
+Client side rate limiting for requests to the DocumentCloud API
+"""
+
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+import weakref
+
+# Local
+from .constants import RATE_LIMIT, RATE_PERIOD
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+monotonic = getattr(time, "monotonic", time.time)
+
+# the file is not inherited by programs a process runs
+O_CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+
+
+def shared_path(account=None):
+    """The default path of a `SharedTokenBucket`'s file, in the temporary directory
+
+    It is kept apart for each user of the host, who could not open another's file,
+    and for each `account` if given, as each account is rate limited separately.
+    """
+    name = "documentcloud-rate-limit"
+    if hasattr(os, "getuid"):
+        name += "-{}".format(os.getuid())
+    if account:
+        name += "-" + re.sub(r"[^\w.@-]", "_", account)
+    return os.path.join(tempfile.gettempdir(), name)
+
+
+SHARED_PATH = shared_path()
+# the number of tokens and when they were counted
+STATE = struct.Struct("dd")
+
+
+class TokenBucket(object):
+    """A thread safe token bucket rate limiter
+
+    The bucket holds up to `burst` tokens and is refilled continuously at `rate`
+    tokens per second.  Each request takes a token, and when the bucket is empty
+    the caller sleeps until its token will be available, instead of failing.
+
+    Tokens are reserved in the order they are asked for, so many threads waiting
+    on one bucket each sleep exactly as long as needed and then proceed, without
+    polling or waking each other up.
+    """
+
+    def __init__(self, rate=RATE_LIMIT / RATE_PERIOD, burst=RATE_LIMIT, clock=None):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock or monotonic
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = self._clock()
+
+    def _refill(self, tokens, updated, now):
+        """The number of tokens in the bucket at `now`, given it held `tokens` at
+        `updated`
+        """
+        if now < updated:
+            # the clock was reset, such as by a reboot, so start over
+            return float(self.burst)
+        return min(self.burst, tokens + (now - updated) * self.rate)
+
+    def _transact(self, func):
+        """Atomically refill the bucket, then call `func` with the number of tokens
+        in it.  `func` returns the new number of tokens and a result to pass back.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens, result = func(self._refill(self._tokens, self._updated, now))
+            self._updated = now
+            return result
+
+    def reserve(self, tokens=1):
+        """Take `tokens` from the bucket, returning how many seconds the caller must
+        wait before using them
+        """
+        if tokens > self.burst:
+            raise ValueError(
+                "Can not take {} tokens from a bucket holding {}".format(
+                    tokens, self.burst
+                )
+            )
+
+        def take(available):
+            available -= tokens
+            return available, max(0, -available / self.rate)
+
+        return self._transact(take)
+
+    def acquire(self, tokens=1):
+        """Take `tokens` from the bucket, sleeping until they are available
+
+        Returns the number of seconds spent waiting
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def try_acquire(self, tokens=1):
+        """Take `tokens` from the bucket only if they are available right now"""
+
+        def take(available):
+            if available < tokens:
+                return available, False
+            return available - tokens, True
+
+        return self._transact(take)
+
+    @property
+    def available(self):
+        """The number of tokens which could be taken right now without waiting"""
+        return self._transact(lambda available: (available, max(0, available)))
+
+
+class SharedTokenBucket(TokenBucket):
+    """A token bucket shared by every process on the host using the same `path`
+
+    The state of the bucket is kept in a small file, locked while it is read and
+    updated, so that many worker processes together stay within one rate limit.
+    Use one path per account, as each account is rate limited separately, or pass
+    `account` to use a default path for it.  The file is opened again in forked
+    children, rather than shared with them.  This requires `fcntl`, so it is not
+    available on Windows.
+    """
+
+    def __init__(
+        self,
+        path=None,
+        rate=RATE_LIMIT / RATE_PERIOD,
+        burst=RATE_LIMIT,
+        clock=None,
+        account=None,
+    ):
+        if fcntl is None:  # pragma: no cover
+            raise NotImplementedError("SharedTokenBucket requires fcntl")
+        super(SharedTokenBucket, self).__init__(rate, burst, clock)
+        self.path = path or shared_path(account)
+        self._fd = None
+        self._pid = None
+        _shared_buckets.add(self)
+
+    def _open(self):
+        # file locks are shared with forked children through the file descriptor,
+        # so each process must open the file itself
+        if self._pid != os.getpid():
+            if self._fd is not None:
+                # inherited from the parent, where fork hooks are not available
+                os.close(self._fd)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | O_CLOEXEC, 0o600)
+            self._pid = os.getpid()
+        return self._fd
+
+    def _after_fork(self):
+        """Let go of the parent's file, and its thread lock, which another thread
+        may have held, in a forked child
+        """
+        self._lock = threading.Lock()
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = None
+        self._pid = None
+
+    def _transact(self, func):
+        # the thread lock serializes threads within this process, the file lock
+        # serializes processes
+        with self._lock:
+            fd = self._open()
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                # the monotonic clock is system wide, so it can be compared
+                # between processes
+                now = self._clock()
+                os.lseek(fd, 0, os.SEEK_SET)
+                data = os.read(fd, STATE.size)
+                if len(data) == STATE.size:
+                    tokens, updated = STATE.unpack(data)
+                    tokens = self._refill(tokens, updated, now)
+                else:
+                    tokens = float(self.burst)
+                tokens, result = func(tokens)
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.write(fd, STATE.pack(tokens, now))
+                return result
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def close(self):
+        """Close the state file"""
+        if self._pid == os.getpid():
+            os.close(self._fd)
+        self._fd = None
+        self._pid = None
+
+
+# the buckets in this process, whose files forked children open again for
+# themselves
+_shared_buckets = weakref.WeakSet()
+
+
+def _after_fork():
+    for bucket in list(_shared_buckets):
+        bucket._after_fork()  # pylint: disable=protected-access
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
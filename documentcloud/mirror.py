@@ -0,0 +1,252 @@
+"""
+A local SQLite copy of document and project metadata, kept up to date by fetching
+only the documents updated since the last sync, so that read heavy tools can look
+documents up without going through the rate limited API
+"""
+
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import json
+import re
+import sqlite3
+import threading
+
+# Local
+from .changes import ChangeFeed, Checkpoint
+from .constants import PER_PAGE_MAX
+from .documents import Document
+from .exceptions import DoesNotExistError
+from .projects import Project
+
+# the columns documents may be filtered and ordered by, each of them indexed
+DOCUMENT_COLUMNS = (
+    "title",
+    "access",
+    "status",
+    "language",
+    "page_count",
+    "user_id",
+    "organization_id",
+    "created_at",
+    "updated_at",
+)
+LOOKUPS = {"": "=", "lt": "<", "lte": "<=", "gt": ">", "gte": ">="}
+# the keys of a document's data which may be filtered by
+DATA_KEY = re.compile(r"^[\w:-]+$")
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS documents (id INTEGER PRIMARY KEY, {}, "
+    "document TEXT)".format(", ".join(DOCUMENT_COLUMNS)),
+    "CREATE TABLE IF NOT EXISTS projects (id INTEGER PRIMARY KEY, title TEXT, "
+    "project TEXT)",
+    "CREATE TABLE IF NOT EXISTS memberships (project_id INTEGER, "
+    "document_id INTEGER, PRIMARY KEY (project_id, document_id))",
+    "CREATE INDEX IF NOT EXISTS memberships_document ON memberships (document_id)",
+    "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT)",
+) + tuple(
+    "CREATE INDEX IF NOT EXISTS documents_{0} ON documents ({0})".format(column)
+    for column in DOCUMENT_COLUMNS
+)
+
+
+def _id(value):
+    """The ID of a potentially nested object"""
+    if isinstance(value, dict):
+        return value.get("id")
+    return value
+
+
+class Mirror(object):
+    """A copy of documents, projects and which documents are in which projects, in a
+    SQLite file at `path`, or in memory
+
+    `params` are filters passed to the API's document list to limit the documents
+    mirrored, such as `organization` or `project`.  The mirror is safe to share
+    between threads.
+    """
+
+    def __init__(self, client, path=":memory:", **params):
+        self.client = client
+        self.path = path
+        self.params = params
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            for statement in SCHEMA:
+                self._db.execute(statement)
+
+    @property
+    def checkpoint(self):
+        """The `Checkpoint` of the last mirrored document, or None before the first
+        sync
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM state WHERE key = 'checkpoint'"
+            ).fetchone()
+        return Checkpoint.from_token(row[0]) if row else None
+
+    def sync(self, projects=True):
+        """Fetch the documents updated since the last sync, and the user's projects
+        if `projects`, returning the number of documents fetched
+
+        Documents are fetched as a `ChangeFeed`, in order of `updated_at` and ID,
+        each page asked for from the checkpoint of the one before, so documents
+        updated during a sync are not skipped.  The checkpoint is saved with each
+        page, so an interrupted sync carries on where it stopped.  Deleted documents
+        are not noticed.
+        """
+        feed = ChangeFeed(self.client.documents, self.checkpoint, **self.params)
+        count = 0
+        for page in feed.raw_pages():
+            self._save_documents(page, feed.checkpoint)
+            count += len(page)
+        if projects:
+            self._save_projects(
+                self.client.projects.all(per_page=PER_PAGE_MAX).raw_pages()
+            )
+        return count
+
+    def _save_documents(self, page, checkpoint):
+        rows = [
+            [document["id"]]
+            + [
+                (
+                    _id(document.get(column[: -len("_id")]))
+                    if column.endswith("_id")
+                    else document.get(column)
+                )
+                for column in DOCUMENT_COLUMNS
+            ]
+            + [json.dumps(document)]
+            for document in page
+        ]
+        ids = [(document["id"],) for document in page]
+        # the documents list the projects they are in
+        memberships = [
+            (_id(project), document["id"])
+            for document in page
+            for project in document.get("projects", [])
+        ]
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO documents VALUES ({})".format(
+                    ", ".join("?" * (len(DOCUMENT_COLUMNS) + 2))
+                ),
+                rows,
+            )
+            self._db.executemany("DELETE FROM memberships WHERE document_id = ?", ids)
+            self._db.executemany(
+                "INSERT OR IGNORE INTO memberships VALUES (?, ?)", memberships
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO state VALUES ('checkpoint', ?)",
+                (checkpoint.token,),
+            )
+
+    def _save_projects(self, pages):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM projects")
+            for page in pages:
+                self._db.executemany(
+                    "INSERT INTO projects VALUES (?, ?, ?)",
+                    [(p["id"], p.get("title"), json.dumps(p)) for p in page],
+                )
+
+    def get(self, id_):
+        """The mirrored document with the given ID"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT document FROM documents WHERE id = ?", (id_,)
+            ).fetchone()
+        if row is None:
+            raise DoesNotExistError("Document {} is not mirrored".format(id_))
+        return Document(self.client, json.loads(row[0]))
+
+    def filter(self, project=None, order_by="id", **filters):
+        """The mirrored documents matching `filters`, as a list
+
+        Filters are on the columns in `DOCUMENT_COLUMNS`, and may end in `__lt`,
+        `__lte`, `__gt`, `__gte` or `__in` like the API's, such as
+        `page_count__gt=100`.  `data__<key>` filters by a key of the documents'
+        data, matching those with the value among the key's values, and may end in
+        `__in`.  It is not indexed, so each document's data is read.  `order_by` is
+        a column, or `id`, preceded by `-` for descending order.
+        """
+        where = []
+        values = []
+        for name, value in filters.items():
+            if name.startswith("data__"):
+                self._filter_data(name, value, where, values)
+                continue
+            column, _, lookup = name.partition("__")
+            if column not in DOCUMENT_COLUMNS or (
+                lookup not in LOOKUPS and lookup != "in"
+            ):
+                raise ValueError("Cannot filter by {}".format(name))
+            if lookup == "in":
+                value = list(value)
+                where.append("{} IN ({})".format(column, ", ".join("?" * len(value))))
+                values.extend(value)
+            else:
+                where.append("{} {} ?".format(column, LOOKUPS[lookup]))
+                values.append(value)
+        if project is not None:
+            where.append(
+                "id IN (SELECT document_id FROM memberships WHERE project_id = ?)"
+            )
+            values.append(getattr(project, "id", project))
+        column = order_by.lstrip("-")
+        if column not in DOCUMENT_COLUMNS + ("id",):
+            raise ValueError("Cannot order by {}".format(order_by))
+        query = "SELECT document FROM documents{} ORDER BY {}{}".format(
+            " WHERE " + " AND ".join(where) if where else "",
+            column,
+            " DESC" if order_by.startswith("-") else "",
+        )
+        with self._lock:
+            rows = self._db.execute(query, values).fetchall()
+        return [Document(self.client, json.loads(row[0])) for row in rows]
+
+    @staticmethod
+    def _filter_data(name, value, where, values):
+        key, _, lookup = name[len("data__") :].partition("__")
+        if not DATA_KEY.match(key) or lookup not in ("", "in"):
+            raise ValueError("Cannot filter by {}".format(name))
+        value = list(value) if lookup == "in" else [value]
+        # a key's values are a list, or a single value
+        where.append(
+            "EXISTS (SELECT 1 FROM json_each(document, ?) WHERE value IN ({}))".format(
+                ", ".join("?" * len(value))
+            )
+        )
+        values.append('$.data."{}"'.format(key))
+        values.extend(value)
+
+    def projects(self):
+        """The mirrored projects, as a list"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT project FROM projects ORDER BY id"
+            ).fetchall()
+        return [Project(self.client, json.loads(row[0])) for row in rows]
+
+    def document_ids(self, project):
+        """The IDs of the mirrored documents in a project, or a project's ID"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT document_id FROM memberships WHERE project_id = ? "
+                "ORDER BY document_id",
+                (getattr(project, "id", project),),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM documents").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,87 @@
+"""
+Fetch the following pages of results on a background thread while the current one
+is being used
+"""
+
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import threading
+from collections import deque
+
+
+class Prefetcher(object):
+    """Iterates over the pages of results starting from `url`, which a background
+    thread fetches with `fetch` up to `size` pages ahead of the consumer
+
+    The requests go through the client as usual, so they are held back by its rate
+    limiter.  An error fetching a page is raised once the pages before it have been
+    consumed.  Stopping the iteration early stops the thread.
+    """
+
+    def __init__(self, fetch, url, size):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.fetch = fetch
+        self.size = size
+        self._condition = threading.Condition()
+        # fetched pages, or the exception raised fetching the next page, in order
+        self._ready = deque()
+        # pages being fetched or waiting in _ready
+        self._ahead = 0
+        self._done = False
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, args=(url,), name="documentcloud-prefetch"
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, url):
+        while url:
+            with self._condition:
+                while self._ahead >= self.size and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                self._ahead += 1
+            try:
+                page = self.fetch(url)
+            except Exception as exc:  # pylint: disable=broad-except
+                self._put(exc)
+                return
+            self._put(page)
+            url = page.next_url
+        self._put(None)
+
+    def _put(self, item):
+        with self._condition:
+            if item is None or isinstance(item, Exception):
+                self._done = True
+            if item is not None:
+                self._ready.append(item)
+            self._condition.notify_all()
+
+    def __iter__(self):
+        try:
+            while True:
+                with self._condition:
+                    while not self._ready and not self._done:
+                        self._condition.wait()
+                    if not self._ready:
+                        return
+                    item = self._ready.popleft()
+                    self._ahead -= 1
+                    self._condition.notify_all()
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop fetching pages"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
@@ -5,11 +5,16 @@ from __future__ import division, print_function, unicode_literals
 from future.utils import python_2_unicode_compatible
 
 # Local
-from .base import APISet, BaseAPIClient, BaseAPIObject
+from .base import APIResults, APISet, BaseAPIClient, BaseAPIObject
 from .constants import BULK_LIMIT, PER_PAGE_MAX
-from .documents import Document
+from .documents import BaseDocument, Document
 from .exceptions import DoesNotExistError, MultipleObjectsReturnedError
-from .toolbox import get_id, grouper
+from .toolbox import field_params, get_id, grouper
+
+
+def _project_document(client, membership):
+    """The document in an entry of a project's document list"""
+    return Document(client, membership["document"])
 
 
 @python_2_unicode_compatible
@@ -23,49 +28,86 @@ class Project(BaseAPIObject):
         per_page = kwargs.pop("per_page", PER_PAGE_MAX)
         super(Project, self).__init__(*args, **kwargs)
         self._document_list = None
+        # the IDs of the documents in the project when the document list was loaded
+        # or last saved
+        self._saved_ids = None
         self._per_page = per_page
 
     def __str__(self):
         return self.title
 
     def save(self):
-        """Add the documents to the project as well"""
+        """Add the documents added to the document list since it was loaded or last
+        saved to the project, and remove the documents removed from it, as well
+
+        If the document list was set without being loaded, the IDs of the documents
+        in the project are fetched first to tell what changed.
+        """
         super(Project, self).save()
-        if self._document_list:
-            data = [{"document": d} for d in self.document_ids]
-            for data_group in grouper(data, BULK_LIMIT):
-                # Grouper will put None's on the end of the last group
-                data_group = [d for d in data_group if d is not None]
-                self._client.put(
-                    "{}/{}/documents/".format(self.api_path, self.id), json=data_group
-                )
+        if self._document_list is None:
+            return
+        if self._saved_ids is None:
+            if not self._document_list:
+                return
+            self._saved_ids = set(d.id for d in self._fetch_documents(["id"]))
+        added, removed = self._document_changes()
+        path = "{}/{}/documents/".format(self.api_path, self.id)
+        for group in self._groups(added):
+            self._client.post(path, json=[{"document": d} for d in group])
+            self._saved_ids.update(group)
+        for group in self._groups(removed):
+            self._client.delete(
+                path, params={"document_id__in": ",".join(str(d) for d in group)}
+            )
+            self._saved_ids.difference_update(group)
+
+    @staticmethod
+    def _groups(ids):
+        """`ids` in groups small enough for one bulk request"""
+        for group in grouper(ids, BULK_LIMIT):
+            # Grouper will put None's on the end of the last group
+            yield [i for i in group if i is not None]
+
+    def _document_changes(self):
+        """The IDs of the documents added to and removed from the document list
+        since it was loaded or last saved
+        """
+        ids = self.document_ids
+        added = [id_ for id_ in ids if id_ not in self._saved_ids]
+        removed = sorted(self._saved_ids.difference(ids))
+        return added, removed
+
+    def _fetch_documents(self, fields=None):
+        response = self._client.get(
+            "{}/{}/documents/".format(self.api_path, get_id(self.id)),
+            params=field_params(
+                {"per_page": self._per_page}, ["document"], fields, prefix="document."
+            ),
+        )
+        # the pages after the first are fetched concurrently
+        return APIResults(_project_document, self._client, response).fetch_all()
+
+    def load_document_list(self, fields=None):
+        """Fetch every document in the project
+
+        With `fields`, the API only returns those fields of each document
+        """
+        self._document_list = APISet(self._fetch_documents(fields), BaseDocument)
+        self._saved_ids = set(self.document_ids)
+        return self._document_list
 
     @property
     def document_list(self):
         if self._document_list is None:
-            response = self._client.get(
-                "{}/{}/documents/".format(self.api_path, get_id(self.id)),
-                params={"per_page": self._per_page, "expand": ["document"]},
-            )
-            json = response.json()
-            next_url = json["next"]
-            results = json["results"]
-            while next_url:
-                response = self._client.get(next_url, full_url=True)
-                json = response.json()
-                next_url = json["next"]
-                results.extend(json["results"])
-            self._document_list = APISet(
-                (Document(self._client, r["document"]) for r in results), Document
-            )
+            self.load_document_list()
         return self._document_list
 
     @document_list.setter
     def document_list(self, value):
         if value is None:
-            self._document_list = APISet([], Document)
+            self._document_list = APISet([], BaseDocument)
         elif isinstance(value, list):
-            self._document_list = APISet(value, Document)
+            self._document_list = APISet(value, BaseDocument)
         else:
             raise TypeError("document_list must be set to a list or None")
 
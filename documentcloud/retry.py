@@ -0,0 +1,252 @@
+"""
+When and how to retry failed requests, and when to stop sending them at all
+"""
+
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import random
+import threading
+import time
+from email.utils import mktime_tz, parsedate_tz
+
+# Third Party
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Local
+from .exceptions import CircuitOpenError
+from .limiter import monotonic
+
+try:
+    from urllib.parse import urlparse
+except ImportError:  # pragma: no cover
+    from urlparse import urlparse
+
+# Methods which may be sent again without changing the result
+IDEMPOTENT_METHODS = frozenset(["DELETE", "GET", "HEAD", "OPTIONS", "PUT", "TRACE"])
+# Statuses meaning the request was refused before being acted on, so any method may
+# be retried
+REFUSED_STATUSES = frozenset([429])
+
+
+class RetryPolicy(object):
+    """How a client retries failed requests
+
+    Requests failing with a status in `status_forcelist` are retried up to `retries`
+    times, if their method is in `methods`.  Requests refused with `429 Too Many
+    Requests` are retried whatever their method.  Between attempts the client waits
+    for as long as the `Retry-After` header asks, up to `retry_after_max` seconds,
+    or otherwise backs off exponentially from `backoff_factor` up to `backoff_max`
+    seconds.  With `jitter`, each wait is picked at random up to that backoff, so
+    that many clients retrying at once spread out instead of retrying in lock step.
+
+    Each host also gets a circuit breaker.  Once `breaker_threshold` requests in a
+    row fail with a server error or no response, requests to the host raise
+    `CircuitOpenError` at once, without being sent, for `breaker_timeout` seconds.
+    After that a single request is let through to test the host, and a success
+    closes the circuit again.  Set `breaker_threshold` to None to disable it.
+    """
+
+    def __init__(
+        self,
+        retries=3,
+        backoff_factor=0.3,
+        backoff_max=30,
+        jitter=True,
+        status_forcelist=(500, 502, 503, 504),
+        methods=IDEMPOTENT_METHODS,
+        respect_retry_after=True,
+        retry_after_max=60,
+        breaker_threshold=5,
+        breaker_timeout=30,
+        clock=None,
+    ):
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.status_forcelist = frozenset(status_forcelist)
+        self.methods = frozenset(m.upper() for m in methods)
+        self.respect_retry_after = respect_retry_after
+        self.retry_after_max = retry_after_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_timeout = breaker_timeout
+        self._clock = clock or monotonic
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def is_retry(self, method, status_code):
+        """Should a request with this method be retried after this status?"""
+        if status_code in REFUSED_STATUSES:
+            return True
+        return method.upper() in self.methods and status_code in self.status_forcelist
+
+    def backoff(self, attempt):
+        """Seconds to wait before retry number `attempt`, starting from 1"""
+        backoff = min(self.backoff_max, self.backoff_factor * 2 ** (attempt - 1))
+        if self.jitter:
+            return random.uniform(0, backoff)
+        return backoff
+
+    def retry_after(self, headers):
+        """Seconds the `Retry-After` header asks to wait for, capped at
+        `retry_after_max`, or None
+        """
+        value = headers.get("Retry-After")
+        if not self.respect_retry_after or value is None:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            date = parsedate_tz(value)
+            if date is None:
+                return None
+            seconds = mktime_tz(date) - time.time()
+        return min(self.retry_after_max, max(0, seconds))
+
+    def wait(self, attempt, headers):
+        """Seconds to wait before retry number `attempt` of a request answered with
+        `headers`
+        """
+        retry_after = self.retry_after(headers)
+        if retry_after is not None:
+            return retry_after
+        return self.backoff(attempt)
+
+    def breaker(self, host):
+        """The circuit breaker for `host`, or None if they are disabled"""
+        if self.breaker_threshold is None:
+            return None
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(
+                    host, self.breaker_threshold, self.breaker_timeout, self._clock
+                )
+            return self._breakers[host]
+
+    def urllib3_retry(self):
+        """This policy as a urllib3 `Retry`, for use with requests"""
+        return PolicyRetry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            status_forcelist=self.status_forcelist | REFUSED_STATUSES,
+            allowed_methods=self.methods,
+            respect_retry_after_header=self.respect_retry_after,
+            # return the final response, so the client can raise a useful error
+            raise_on_status=False,
+            policy=self,
+        )
+
+    def adapter(self, **kwargs):
+        """A requests transport adapter following this policy"""
+        return PolicyAdapter(self, **kwargs)
+
+
+class PolicyRetry(Retry):
+    """A urllib3 `Retry` deferring its decisions to a `RetryPolicy`"""
+
+    def __init__(self, *args, **kwargs):
+        self.policy = kwargs.pop("policy")
+        super(PolicyRetry, self).__init__(*args, **kwargs)
+
+    def new(self, **kwargs):
+        kwargs.setdefault("policy", self.policy)
+        return super(PolicyRetry, self).new(**kwargs)
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        return self.policy.is_retry(method, status_code)
+
+    def get_backoff_time(self):
+        if not self.history:
+            return 0
+        return self.policy.backoff(len(self.history))
+
+    def get_retry_after(self, response):
+        # a malformed header is ignored in favour of backing off, where urllib3
+        # would raise
+        return self.policy.retry_after(response.headers)
+
+
+class CircuitBreaker(object):
+    """Fails fast while a host is down, instead of piling more requests onto it"""
+
+    def __init__(self, host, threshold, timeout, clock=None):
+        self.host = host
+        self.threshold = threshold
+        self.timeout = timeout
+        self._clock = clock or monotonic
+        self._lock = threading.Lock()
+        self.failures = 0
+        self._opened_at = None
+
+    @property
+    def open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        """May a request be sent to the host now?"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = self._clock()
+            if now - self._opened_at >= self.timeout:
+                # let one request through to test the host, and hold the rest back
+                # for another timeout
+                self._opened_at = now
+                return True
+            return False
+
+    def check(self):
+        """Raise `CircuitOpenError` if a request may not be sent to the host now"""
+        if not self.allow():
+            raise CircuitOpenError(
+                "Requests to {} are failing, not sending more for up to {} "
+                "seconds".format(self.host, self.timeout)
+            )
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._opened_at is not None or self.failures >= self.threshold:
+                self._opened_at = self._clock()
+
+    def record(self, status_code):
+        """Record the outcome of a request answered with `status_code`"""
+        if status_code >= 500:
+            self.record_failure()
+        else:
+            self.record_success()
+
+
+class PolicyAdapter(HTTPAdapter):
+    """A requests transport adapter retrying as its `RetryPolicy` says, and
+    failing fast while a host's circuit breaker is open
+    """
+
+    def __init__(self, policy, **kwargs):
+        self.policy = policy
+        kwargs["max_retries"] = policy.urllib3_retry()
+        super(PolicyAdapter, self).__init__(**kwargs)
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        breaker = self.policy.breaker(urlparse(request.url).netloc)
+        if breaker is None:
+            return super(PolicyAdapter, self).send(request, **kwargs)
+        breaker.check()
+        try:
+            response = super(PolicyAdapter, self).send(request, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            breaker.record_failure()
+            raise
+        breaker.record(response.status_code)
+        return response
@@ -0,0 +1,92 @@
+"""
+An on disk cache of access and refresh tokens, so that new processes can reuse
+them instead of logging in again
+"""
+
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import io
+import json
+import os
+import tempfile
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".documentcloud", "tokens.json")
+
+
+class TokenCache(object):
+    """Tokens stored in a JSON file which only its owner may read or write
+
+    Tokens are keyed by the username and the account server they were issued by.
+    Passwords are never stored.  The file is replaced atomically on every update,
+    so readers never see a partially written file.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+
+    def _key(self, username, auth_uri):
+        return "{} {}".format(auth_uri, username)
+
+    def _read(self):
+        try:
+            with io.open(self.path, encoding="utf-8") as file_:
+                data = json.load(file_)
+        except (IOError, OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write(self, data):
+        directory = os.path.dirname(self.path) or "."
+        if not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tokens")
+        try:
+            # mkstemp creates the file readable and writable only by its owner
+            with os.fdopen(fd, "w") as file_:
+                json.dump(data, file_)
+            if hasattr(os, "replace"):
+                os.replace(temp_path, self.path)
+            else:  # pragma: no cover
+                os.rename(temp_path, self.path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    def get(self, username, auth_uri):
+        """The cached access and refresh tokens, or None if there are none"""
+        tokens = self._read().get(self._key(username, auth_uri))
+        if not isinstance(tokens, dict):
+            return None
+        return (tokens.get("access"), tokens.get("refresh"))
+
+    def set(self, username, auth_uri, access_token, refresh_token):
+        """Cache the access and refresh tokens"""
+        data = self._read()
+        data[self._key(username, auth_uri)] = {
+            "access": access_token,
+            "refresh": refresh_token,
+        }
+        self._write(data)
+
+    def delete(self, username, auth_uri):
+        """Remove the cached tokens"""
+        data = self._read()
+        if data.pop(self._key(username, auth_uri), None) is not None:
+            self._write(data)
+
+
+def get_token_cache(token_cache):
+    """Build the token cache for a client
+
+    `token_cache` may be True for the default path, False or None for no cache, a
+    path, or a `TokenCache` of your own
+    """
+    if token_cache is True:
+        return TokenCache()
+    elif not token_cache:
+        return None
+    elif isinstance(token_cache, (str, type(""))):
+        return TokenCache(token_cache)
+    return token_cache
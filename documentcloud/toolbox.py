@@ -4,9 +4,19 @@ A few toys the API will use.
 # Future
 from __future__ import division, print_function, unicode_literals
 
+# Standard Library
+import base64
+import json
+import re
+import time
+from datetime import datetime
+from email.utils import mktime_tz, parsedate_tz
+
 # Third Party
 import requests
-from requests.adapters import HTTPAdapter
+from dateutil.parser import parse as dateparser
+from dateutil.tz import tzoffset, tzutc
+from requests.adapters import DEFAULT_POOLBLOCK, DEFAULT_POOLSIZE, HTTPAdapter
 from urllib3.util.retry import Retry
 
 try:
@@ -16,22 +26,49 @@ except ImportError:
     from urlparse import urlparse
     from itertools import izip_longest as zip_longest
 
+# the timestamps the API returns, such as 2020-06-11T13:31:41.123456Z
+ISO_8601 = re.compile(
+    r"^(\d{4})-(\d\d)-(\d\d)[T ](\d\d):(\d\d)(?::(\d\d)(?:[.,](\d{1,6})\d*)?)?"
+    r"(?:(Z)|([+-])(\d\d):?(\d\d))?$"
+)
+UTC = tzutc()
+
 
 def requests_retry_session(
-    retries=3, backoff_factor=0.3, status_forcelist=(500, 502, 504), session=None
+    retries=3,
+    backoff_factor=0.3,
+    status_forcelist=(500, 502, 504),
+    session=None,
+    pool_connections=DEFAULT_POOLSIZE,
+    pool_maxsize=DEFAULT_POOLSIZE,
+    pool_block=DEFAULT_POOLBLOCK,
+    retry_policy=None,
 ):
     """Automatic retries for HTTP requests
     See: https://www.peterbe.com/plog/best-practice-with-retries-with-requests
+
+    The pool arguments are passed through to the `HTTPAdapter` and control how many
+    hosts are cached, how many connections are kept alive per host and whether to
+    block waiting for a free connection when the pool is exhausted.  A
+    `RetryPolicy` replaces the other retry arguments.
     """
     session = session or requests.Session()
-    retry = Retry(
-        total=retries,
-        read=retries,
-        connect=retries,
-        backoff_factor=backoff_factor,
-        status_forcelist=status_forcelist,
-    )
-    adapter = HTTPAdapter(max_retries=retry)
+    pool_kwargs = {
+        "pool_connections": pool_connections,
+        "pool_maxsize": pool_maxsize,
+        "pool_block": pool_block,
+    }
+    if retry_policy is not None:
+        adapter = retry_policy.adapter(**pool_kwargs)
+    else:
+        retry = Retry(
+            total=retries,
+            read=retries,
+            connect=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=status_forcelist,
+        )
+        adapter = HTTPAdapter(max_retries=retry, **pool_kwargs)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     return session
@@ -73,8 +110,97 @@ def grouper(iterable, num, fillvalue=None):
     return zip_longest(*args, fillvalue=fillvalue)
 
 
+def field_params(params=None, expand=None, fields=None, prefix=""):
+    """A copy of the query parameters `params`, also asking the API to expand the
+    related objects in `expand` and to return only the fields in `fields`
+
+    `prefix` is put before each field, to select the fields of a nested object
+    """
+    params = dict(params or {})
+    if expand is not None:
+        params["expand"] = ",".join(expand)
+    if fields is not None:
+        params["fields"] = ",".join(prefix + f for f in fields)
+    return params
+
+
+def parse_date(value):
+    """Parse a timestamp from the API
+
+    The API's ISO 8601 timestamps are parsed by `datetime.fromisoformat` where it
+    understands them, or else by a regular expression.  Anything else is left to
+    the much slower, but more forgiving, dateutil parser.
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except (AttributeError, ValueError):
+        # Python 2 does not have fromisoformat, and before 3.11 it does not
+        # understand a trailing Z
+        pass
+    match = ISO_8601.match(value)
+    if match is None:
+        return dateparser(value)
+    year, month, day, hour, minute, second, fraction, zulu, sign, tz_hour, tz_minute = (
+        match.groups()
+    )
+    if zulu:
+        tzinfo = UTC
+    elif sign:
+        offset = int(tz_hour) * 3600 + int(tz_minute) * 60
+        tzinfo = tzoffset(None, -offset if sign == "-" else offset)
+    else:
+        tzinfo = None
+    return datetime(
+        int(year),
+        int(month),
+        int(day),
+        int(hour),
+        int(minute),
+        int(second or 0),
+        int((fraction or "0").ljust(6, "0")),
+        tzinfo,
+    )
+
+
 def merge_dicts(*dicts):
     merged = {}
     for dict_ in dicts:
         merged.update(dict_)
     return merged
+
+
+def jwt_claims(token):
+    """Decode the claims of a JSON Web Token, without verifying its signature
+
+    Returns an empty dictionary if `token` is not a JWT
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload.encode("ascii")))
+    except (AttributeError, IndexError, TypeError, ValueError):
+        return {}
+    return claims if isinstance(claims, dict) else {}
+
+
+def clock_skew(response):
+    """How many seconds the clock of the server which sent `response` is ahead of
+    ours, according to its Date header"""
+    date = response.headers.get("Date")
+    parsed = parsedate_tz(date) if date else None
+    if parsed is None:
+        return 0
+    return mktime_tz(parsed) - time.time()
+
+
+def token_expiry(token, skew=0):
+    """When `token` expires by our clock, and how long it was valid for when it was
+    issued, given the `skew` of the issuing server's clock.
+
+    Returns `(None, None)` if the token does not say when it expires
+    """
+    exp = jwt_claims(token).get("exp")
+    if not isinstance(exp, (int, float)):
+        return None, None
+    expires = exp - skew
+    return expires, expires - time.time()
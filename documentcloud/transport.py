@@ -0,0 +1,94 @@
+"""
+The HTTP transport shared by everything that talks to the network on behalf of a
+DocumentCloud client
+"""
+
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Local
+from .constants import POOL_BLOCK, POOL_CONNECTIONS, POOL_MAXSIZE
+from .retry import RetryPolicy
+from .toolbox import requests_retry_session
+
+# Each class of host we talk to gets its own connection pool, so that heavy
+# downloads from the asset server can not starve the API of connections
+# api - the DocumentCloud API
+# auth - the account server which issues tokens
+# asset - the server hosting the text, images and PDFs for documents
+# storage - the server accepting uploads to presigned URLs
+POOLS = ("api", "auth", "asset", "storage")
+
+POOL_OPTIONS = ("pool_connections", "pool_maxsize", "pool_block")
+
+
+def pool_options(pool_config=None):
+    """Validate a pool configuration and fill in the defaults for each pool"""
+    if pool_config is None:
+        pool_config = {}
+
+    unknown = set(pool_config) - set(POOLS)
+    if unknown:
+        raise ValueError(
+            "Unknown pools: {}.  Valid pools are: {}".format(
+                ", ".join(sorted(unknown)), ", ".join(POOLS)
+            )
+        )
+
+    options = {}
+    for name in POOLS:
+        config = pool_config.get(name, {})
+        unknown = set(config) - set(POOL_OPTIONS)
+        if unknown:
+            raise ValueError(
+                "Unknown options for the {} pool: {}".format(
+                    name, ", ".join(sorted(unknown))
+                )
+            )
+        options[name] = {
+            "pool_connections": config.get("pool_connections", POOL_CONNECTIONS),
+            "pool_maxsize": config.get("pool_maxsize", POOL_MAXSIZE),
+            "pool_block": config.get("pool_block", POOL_BLOCK),
+        }
+    return options
+
+
+class Transport(object):
+    """A long lived, connection pooled session for each class of host
+
+    `pool_config` maps a pool name to a dictionary of `pool_connections`,
+    `pool_maxsize` and `pool_block` options.  Any pool or option left out uses the
+    defaults from `documentcloud.constants`.  Every session retries as
+    `retry_policy` says, and they share its circuit breakers.
+    """
+
+    def __init__(self, pool_config=None, retry_policy=None):
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        self.retry_policy = retry_policy
+        self.sessions = {}
+        for name, options in pool_options(pool_config).items():
+            self.sessions[name] = requests_retry_session(
+                retry_policy=retry_policy, **options
+            )
+
+    @property
+    def api(self):
+        return self.sessions["api"]
+
+    @property
+    def auth(self):
+        return self.sessions["auth"]
+
+    @property
+    def asset(self):
+        return self.sessions["asset"]
+
+    @property
+    def storage(self):
+        return self.sessions["storage"]
+
+    def close(self):
+        """Close all pooled connections"""
+        for session in self.sessions.values():
+            session.close()
@@ -19,13 +19,19 @@ setup(
     include_package_data=True,
     install_requires=(
         'future',
+        'futures; python_version < "3"',
         'listcrunch>=1.0.1',
         'python-dateutil',
-        'ratelimit',
         'requests',
-        'urllib3',
+        'urllib3>=1.26',
     ),
     extras_require={
+        'arrow': [
+            'pyarrow',
+        ],
+        'async': [
+            'httpx',
+        ],
         'dev': [
             'black',
             'coverage',
@@ -35,6 +41,7 @@ setup(
             'twine',
         ],
         'test': [
+            'httpx',
             'pytest',
             'pytest-mock',
             'pytest-recording',
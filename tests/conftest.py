@@ -12,6 +12,12 @@ import vcr
 # DocumentCloud
 from documentcloud.client import DocumentCloud
 from documentcloud.exceptions import DoesNotExistError
+from documentcloud.retry import RetryPolicy
+
+# Local
+from .stand_in import PASSWORD as STAND_IN_PASSWORD
+from .stand_in import USERNAME as STAND_IN_USERNAME
+from .stand_in import StandInAPI, StandInServer
 
 # Test against a development environment documentcloud instance
 BASE_URI = "http://api.dev.documentcloud.org/api/"
@@ -23,10 +29,38 @@ DEFAULT_DOCUMENT_URI = "https://assets.documentcloud.org/documents/20071460/test
 
 # pylint: disable=redefined-outer-name
 
+# Session fixtures which yield only use their cassettes while setting up and
+# tearing down, as VCR's patching is not safe for the threads of the stand-in tests
+# running in between
+fixture_vcr = vcr.VCR(ignore_localhost=True)
+DOCUMENT_CASSETTE = "tests/cassettes/fixtures/document.yaml"
+PROJECT_CASSETTE = "tests/cassettes/fixtures/project.yaml"
+
+
+class FakeClock(object):
+    """A clock for rate limiters and circuit breakers which only moves when `now`
+    is set
+    """
+
+    def __init__(self):
+        self.now = 0.0
 
-# We want to enable VCR for all tests
+    def __call__(self):
+        return self.now
+
+
+def timestamp(second):
+    """An `updated_at` the given number of seconds into 2021"""
+    return "2021-01-01T00:{:02d}:{:02d}.000000Z".format(*divmod(second, 60))
+
+
+# We want to enable VCR for all tests, except those running against a local
+# stand-in server
 def pytest_collection_modifyitems(items):
     for item in items:
+        if item.get_closest_marker("stand_in"):
+            item.add_marker(pytest.mark.block_network(allowed_hosts=["127.0.0.1"]))
+            continue
         item.add_marker(
             pytest.mark.vcr(
                 match_on=["method", "scheme", "host", "port", "path", "query", "body"]
@@ -35,9 +69,9 @@ def pytest_collection_modifyitems(items):
 
 
 @pytest.fixture(scope="session")
-@vcr.use_cassette("tests/cassettes/fixtures/client.yaml")
+@fixture_vcr.use_cassette("tests/cassettes/fixtures/client.yaml")
 def client():
-    return DocumentCloud(
+    client = DocumentCloud(
         username=USERNAME,
         password=PASSWORD,
         base_uri=BASE_URI,
@@ -45,29 +79,34 @@ def client():
         timeout=TIMEOUT,
         rate_limit=False,
     )
+    # log in while the fixture's cassette is active
+    client._set_tokens()  # pylint: disable=protected-access
+    return client
 
 
 @pytest.fixture(scope="session")
-@vcr.use_cassette("tests/cassettes/fixtures/rate_client.yaml")
+@fixture_vcr.use_cassette("tests/cassettes/fixtures/rate_client.yaml")
 def rate_client():
     """This client is solely to test rate limiting"""
-    return DocumentCloud(
+    client = DocumentCloud(
         username=USERNAME,
         password=PASSWORD,
         base_uri=BASE_URI,
         auth_uri=AUTH_URI,
         timeout=TIMEOUT,
     )
+    client._set_tokens()  # pylint: disable=protected-access
+    return client
 
 
 @pytest.fixture(scope="session")
-@vcr.use_cassette("tests/cassettes/short_fixtures/short_client.yaml")
+@fixture_vcr.use_cassette("tests/cassettes/short_fixtures/short_client.yaml")
 def short_client():
     """This client is to be used with the dev server set to issue tokens
     with very short expirations in order to test out the expired token
     handling code
     """
-    return DocumentCloud(
+    client = DocumentCloud(
         username=USERNAME,
         password=PASSWORD,
         base_uri=BASE_URI,
@@ -75,6 +114,8 @@ def short_client():
         timeout=TIMEOUT,
         rate_limit=False,
     )
+    client._set_tokens()  # pylint: disable=protected-access
+    return client
 
 
 @pytest.fixture
@@ -84,6 +125,73 @@ def public_client():
     )
 
 
+@pytest.fixture
+def stand_in():
+    """A local stand-in for the DocumentCloud API, for tests which need to make
+    requests that can not be pre-recorded, such as concurrent ones
+    """
+    with StandInServer(StandInAPI()) as api:
+        yield api
+
+
+@pytest.fixture
+def stand_in_client(stand_in):
+    client = DocumentCloud(
+        username=STAND_IN_USERNAME,
+        password=STAND_IN_PASSWORD,
+        base_uri=stand_in.base_uri,
+        auth_uri=stand_in.auth_uri,
+        timeout=TIMEOUT,
+        rate_limit=False,
+    )
+    client._set_tokens()  # pylint: disable=protected-access
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def make_client(stand_in):
+    """Make clients of the stand-in with a `RetryPolicy` of the given arguments,
+    which back off quickly by default
+    """
+    clients = []
+
+    def make_client(**kwargs):
+        kwargs.setdefault("backoff_factor", 0.001)
+        client = DocumentCloud(
+            username=STAND_IN_USERNAME,
+            password=STAND_IN_PASSWORD,
+            base_uri=stand_in.base_uri,
+            auth_uri=stand_in.auth_uri,
+            rate_limit=False,
+            retry_policy=RetryPolicy(**kwargs),
+        )
+        clients.append(client)
+        return client
+
+    yield make_client
+    for client in clients:
+        client.close()
+
+
+@pytest.fixture
+def make_async_client(stand_in):
+    """Make asyncio clients of the stand-in, to be closed by the test"""
+    # DocumentCloud
+    # imported here so the other tests run without httpx
+    from documentcloud.aio import AsyncDocumentCloud
+
+    def make_async_client(**kwargs):
+        kwargs.setdefault("username", STAND_IN_USERNAME)
+        kwargs.setdefault("password", STAND_IN_PASSWORD)
+        kwargs.setdefault("rate_limit", False)
+        return AsyncDocumentCloud(
+            base_uri=stand_in.base_uri, auth_uri=stand_in.auth_uri, **kwargs
+        )
+
+    return make_async_client
+
+
 def _wait_document(document, client, record_mode):
     # wait for document to finish processing
     while document.status in ("nofile", "pending"):
@@ -95,25 +203,26 @@ def _wait_document(document, client, record_mode):
 
 
 @pytest.fixture(scope="session")
-@vcr.use_cassette("tests/cassettes/fixtures/document.yaml")
 def document(project, client, record_mode):
-    document = client.documents.upload(
-        DEFAULT_DOCUMENT_URI,
-        access="private",
-        data={"_tag": ["document"]},
-        description="A simple test document",
-        source="DocumentCloud",
-        related_article="https://www.example.com/article/",
-        published_url="https://www.example.com/article/test.pdf",
-        projects=[project.id],
-    )
-    document = _wait_document(document, client, record_mode)
-    document.sections.create("Test Section", 0)
-    document.annotations.create(
-        "Test Note", 0, "<h1>A note!</h1>", x1=0.1, y1=0.1, x2=0.2, y2=0.2
-    )
+    with fixture_vcr.use_cassette(DOCUMENT_CASSETTE):
+        document = client.documents.upload(
+            DEFAULT_DOCUMENT_URI,
+            access="private",
+            data={"_tag": ["document"]},
+            description="A simple test document",
+            source="DocumentCloud",
+            related_article="https://www.example.com/article/",
+            published_url="https://www.example.com/article/test.pdf",
+            projects=[project.id],
+        )
+        document = _wait_document(document, client, record_mode)
+        document.sections.create("Test Section", 0)
+        document.annotations.create(
+            "Test Note", 0, "<h1>A note!</h1>", x1=0.1, y1=0.1, x2=0.2, y2=0.2
+        )
     yield document
-    document.delete()
+    with fixture_vcr.use_cassette(DOCUMENT_CASSETTE):
+        document.delete()
 
 
 @pytest.fixture(scope="session")
@@ -137,15 +246,16 @@ def document_factory(client, record_mode):
 
 
 @pytest.fixture(scope="session")
-@vcr.use_cassette("tests/cassettes/fixtures/project.yaml")
 def project(client, document_factory):
-    document = document_factory()
-    title = "This is a project for testing {}".format(uuid4())
-    project = client.projects.create(
-        title, "This is a project for testing", document_ids=[document.id]
-    )
+    with fixture_vcr.use_cassette(PROJECT_CASSETTE):
+        document = document_factory()
+        title = "This is a project for testing {}".format(uuid4())
+        project = client.projects.create(
+            title, "This is a project for testing", document_ids=[document.id]
+        )
     yield project
-    project.delete()
+    with fixture_vcr.use_cassette(PROJECT_CASSETTE):
+        project.delete()
 
 
 @pytest.fixture(scope="session")
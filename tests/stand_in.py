@@ -0,0 +1,440 @@
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import base64
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qsl, urlencode, urlparse
+except ImportError:  # pragma: no cover
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urllib import urlencode
+    from urlparse import parse_qsl, urlparse
+
+# DocumentCloud
+from documentcloud.toolbox import parse_date
+
+USERNAME = "stand-in-user"
+PASSWORD = "stand-in-password"
+USER_ID = 1
+ORGANIZATION_ID = 1
+TIMESTAMP = "2020-06-11T13:31:41.123456Z"
+
+
+def _b64(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf8")).rstrip(b"=")
+
+
+def make_token(token_type, lifetime):
+    """Make an unsigned JWT shaped token expiring after `lifetime` seconds"""
+    header = _b64({"typ": "JWT", "alg": "none"})
+    payload = _b64(
+        {
+            "token_type": token_type,
+            "exp": int(time.time() + lifetime),
+            "jti": "{:.6f}".format(time.time()),
+        }
+    )
+    return b".".join([header, payload, b"sig"]).decode("ascii")
+
+
+def select_fields(obj, fields):
+    """Only the `fields` of `obj`, comma separated and with dots for the fields of
+    nested objects, as the API returns them"""
+    if not fields:
+        return obj
+    nested = OrderedDict()
+    for field in fields.split(","):
+        name, _, rest = field.partition(".")
+        nested.setdefault(name, []).append(rest)
+    return {
+        name: select_fields(obj[name], ",".join(r for r in rest if r))
+        for name, rest in nested.items()
+        if name in obj
+    }
+
+
+class StandInAPI(object):
+    """In memory state for a stand-in DocumentCloud API server
+
+    It implements just enough of the API, the account server, the asset server and
+    presigned storage URLs to exercise the client without a real DocumentCloud
+    """
+
+    def __init__(self, token_lifetime=300):
+        self.url = None
+        self.token_lifetime = token_lifetime
+        self.lock = threading.Lock()
+        self.requests = []
+        self.access_tokens = set()
+        self.refresh_tokens = set()
+        self.documents = OrderedDict()
+        self.projects = OrderedDict()
+        self.memberships = {}
+        self.uploads = {}
+        # statuses and headers to answer the next API requests with, instead of
+        # handling them
+        self.failures = []
+        self._next_id = 1
+
+    @property
+    def base_uri(self):
+        return "{}api/".format(self.url)
+
+    @property
+    def auth_uri(self):
+        return "{}auth/".format(self.url)
+
+    def _new_id(self):
+        id_ = self._next_id
+        self._next_id += 1
+        return id_
+
+    def create_documents(self, count):
+        return [
+            self.create_document({"title": "Document {}".format(i)})
+            for i in range(count)
+        ]
+
+    def create_document(self, data):
+        id_ = self._new_id()
+        slug = re.sub(r"[^a-z0-9]+", "-", data.get("title", "").lower()).strip("-")
+        document = {
+            "id": id_,
+            "access": data.get("access", "private"),
+            "asset_url": "{}files/".format(self.url),
+            "canonical_url": "{}documents/{}-{}".format(self.url, id_, slug),
+            "created_at": TIMESTAMP,
+            "data": data.get("data", {}),
+            "description": data.get("description", ""),
+            "language": "eng",
+            "organization": ORGANIZATION_ID,
+            "page_count": 2,
+            "page_spec": "612.0x792.0:0-1",
+            "projects": data.get("projects", []),
+            "published_url": "",
+            "related_article": "",
+            "slug": slug,
+            "source": data.get("source", ""),
+            "status": "success",
+            "title": data.get("title", ""),
+            "updated_at": TIMESTAMP,
+            "user": USER_ID,
+        }
+        self.documents[id_] = document
+        return document
+
+    def issue_tokens(self):
+        access = make_token("access", self.token_lifetime)
+        refresh = make_token("refresh", self.token_lifetime * 10)
+        self.access_tokens.add(access)
+        self.refresh_tokens.add(refresh)
+        return {"access": access, "refresh": refresh}
+
+    def expire_access_tokens(self):
+        with self.lock:
+            self.access_tokens.clear()
+
+    def count(self, method, path):
+        """The number of requests made with the given method to the given path"""
+        with self.lock:
+            return len(
+                [r for r in self.requests if r[0] == method and r[1].startswith(path)]
+            )
+
+    def paginate(self, handler, items, params):
+        per_page = int(params.get("per_page", 25))
+        page = int(params.get("page", 1))
+        start = (page - 1) * per_page
+        results = items[start : start + per_page]
+
+        def page_url(number):
+            if number < 1 or (number - 1) * per_page >= len(items):
+                return None
+            query = dict(params)
+            query.pop("page", None)
+            if number > 1:
+                query["page"] = number
+            return "{}{}?{}".format(
+                self.url,
+                handler.parsed.path.lstrip("/"),
+                urlencode(sorted(query.items())),
+            )
+
+        return {
+            "count": len(items),
+            "next": page_url(page + 1),
+            "previous": page_url(page - 1),
+            "results": results,
+        }
+
+    def filter_documents(self, params):
+        documents = list(self.documents.values())
+        if "id__in" in params:
+            ids = [int(i) for i in params["id__in"].split(",") if i]
+            documents = [d for d in documents if d["id"] in ids]
+        if "updated_at__gte" in params:
+            since = parse_date(params["updated_at__gte"])
+            documents = [d for d in documents if parse_date(d["updated_at"]) >= since]
+        if "ordering" in params:
+            # sort by the last field first, relying on the sort being stable
+            for field in reversed(params["ordering"].split(",")):
+                documents.sort(
+                    key=lambda d, f=field.lstrip("-"): d[f],
+                    reverse=field.startswith("-"),
+                )
+        return documents
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # the do_<METHOD> names are BaseHTTPRequestHandler's
+    # pylint: disable=invalid-name
+
+    # keep connections alive to mimic a real server
+    protocol_version = "HTTP/1.1"
+    # send each response at once, rather than waiting on delayed acknowledgements
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # pylint: disable=redefined-builtin
+        pass
+
+    @property
+    def api(self):
+        return self.server.api
+
+    def _respond(
+        self,
+        status,
+        body=None,
+        content_type="application/json",
+        etag=False,
+        headers=None,
+    ):
+        if body is None:
+            data = b""
+        elif content_type == "application/json":
+            data = json.dumps(body).encode("utf8")
+        else:
+            data = body
+        headers = dict(headers or {}, **{"Content-Type": content_type})
+        if etag and status == 200:
+            headers["ETag"] = '"{}"'.format(hashlib.md5(data).hexdigest())
+            if self.headers.get("If-None-Match") == headers["ETag"]:
+                status, data = 304, b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length) if length else b""
+        if self.headers.get("Content-Type") == "application/json" and data:
+            return json.loads(data.decode("utf8"))
+        return data
+
+    def _authenticated(self):
+        authorization = self.headers.get("Authorization")
+        if authorization is None:
+            return None
+        return authorization[len("Bearer ") :] in self.api.access_tokens
+
+    def _handle(self, method):
+        self.parsed = urlparse(self.path)
+        params = dict(parse_qsl(self.parsed.query))
+        body = self._body()
+        with self.api.lock:
+            self.api.requests.append(
+                (method, self.parsed.path, params, dict(self.headers))
+            )
+            failure = status = response = None
+            if self.parsed.path.startswith("/api/") and self.api.failures:
+                failure = self.api.failures.pop(0)
+            else:
+                status, response = self._route(method, self.parsed.path, params, body)
+        if failure is not None:
+            self._respond(failure[0], {"detail": "Failure"}, headers=failure[1])
+        elif isinstance(response, bytes):
+            self._respond(status, response, "text/plain")
+        else:
+            self._respond(status, response, etag=method == "GET")
+
+    def _route(self, method, path, params, body):
+        # pylint: disable=too-many-return-statements,too-many-branches
+        api = self.api
+        if path == "/auth/token/" and method == "POST":
+            if body == {"username": USERNAME, "password": PASSWORD}:
+                return 200, api.issue_tokens()
+            return 401, {"detail": "No active account found"}
+        if path == "/auth/refresh/" and method == "POST":
+            if body.get("refresh") in api.refresh_tokens:
+                api.refresh_tokens.discard(body["refresh"])
+                return 200, api.issue_tokens()
+            return 401, {"detail": "Token is invalid or expired"}
+        if path.startswith("/storage/") and method == "PUT":
+            api.uploads[path[len("/storage/") :]] = body
+            return 200, None
+        if path.startswith("/files/") and method == "GET":
+            return 200, "Text for {}".format(path).encode("utf8")
+
+        if not path.startswith("/api/"):
+            return 404, {"detail": "Not found."}
+        authenticated = self._authenticated()
+        if authenticated is False:
+            return 403, {"detail": "Given token not valid for any token type"}
+        parts = [p for p in path[len("/api/") :].split("/") if p]
+
+        if parts == ["users", "me"]:
+            if not authenticated:
+                return 404, {"detail": "Not found."}
+            return 200, {"id": USER_ID, "name": "Stand In", "username": USERNAME}
+        if parts[0] in ("users", "organizations") and len(parts) == 2:
+            return 200, {"id": int(parts[1]), "name": "Stand In", "slug": "stand-in"}
+
+        if parts[0] == "documents":
+            return self._documents(method, parts[1:], params, body)
+        if parts[0] == "projects":
+            return self._projects(method, parts[1:], params, body)
+        return 404, {"detail": "Not found."}
+
+    def _documents(self, method, parts, params, body):
+        # pylint: disable=too-many-return-statements,too-many-branches
+        # pylint: disable=protected-access
+        api = self.api
+        if not parts or parts == ["search"]:
+            if method == "GET":
+                documents = [
+                    select_fields(d, params.get("fields"))
+                    for d in api.filter_documents(params)
+                ]
+                return 200, api.paginate(self, documents, params)
+            if method == "POST":
+                datas = body if isinstance(body, list) else [body]
+                created = []
+                for data in datas:
+                    document = dict(api.create_document(data))
+                    document["presigned_url"] = "{}storage/{}".format(
+                        api.url, document["id"]
+                    )
+                    created.append(document)
+                return 201, created if isinstance(body, list) else created[0]
+        if parts == ["process"]:
+            return 200, None
+        id_ = int(parts[0])
+        if id_ not in api.documents:
+            return 404, {"detail": "Not found."}
+        document = api.documents[id_]
+        if len(parts) == 1:
+            if method == "GET":
+                return 200, select_fields(document, params.get("fields"))
+            if method in ("PUT", "PATCH"):
+                document.update(body)
+                return 200, document
+            if method == "DELETE":
+                del api.documents[id_]
+                return 204, None
+        if parts[1] == "process":
+            return 200, None
+        if parts[1] in ("sections", "notes"):
+            if method == "POST":
+                return 201, dict(body, id=api._new_id())
+            return 200, api.paginate(self, [], params)
+        return 404, {"detail": "Not found."}
+
+    def _projects(self, method, parts, params, body):
+        # pylint: disable=too-many-return-statements,too-many-branches
+        # pylint: disable=protected-access
+        api = self.api
+        if not parts:
+            if method == "POST":
+                id_ = api._new_id()
+                api.projects[id_] = dict(body, id=id_, user=USER_ID)
+                api.memberships[id_] = []
+                return 201, api.projects[id_]
+            projects = list(api.projects.values())
+            if "title" in params:
+                projects = [p for p in projects if p["title"] == params["title"]]
+            return 200, api.paginate(self, projects, params)
+        id_ = int(parts[0])
+        if id_ not in api.projects:
+            return 404, {"detail": "Not found."}
+        if len(parts) == 1:
+            if method == "GET":
+                return 200, api.projects[id_]
+            if method in ("PUT", "PATCH"):
+                api.projects[id_].update(body)
+                return 200, api.projects[id_]
+            if method == "DELETE":
+                del api.projects[id_]
+                return 204, None
+        members = api.memberships[id_]
+        if len(parts) == 2:
+            if method == "GET":
+                results = [
+                    select_fields({"document": api.documents[d]}, params.get("fields"))
+                    for d in members
+                ]
+                return 200, api.paginate(self, results, params)
+            if method == "PUT":
+                # replaces the project's documents
+                api.memberships[id_] = []
+                members = api.memberships[id_]
+            if method in ("PUT", "POST"):
+                for data in body:
+                    if data["document"] not in members:
+                        members.append(data["document"])
+                return 200 if method == "PUT" else 201, body
+            if method == "DELETE":
+                ids = [int(i) for i in params["document_id__in"].split(",")]
+                api.memberships[id_] = [d for d in members if d not in ids]
+                return 204, None
+        doc_id = int(parts[2])
+        if doc_id not in members:
+            return 404, {"detail": "Not found."}
+        return 200, {"document": api.documents[doc_id]}
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class StandInServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, api):
+        HTTPServer.__init__(self, ("127.0.0.1", 0), StandInHandler)
+        self.api = api
+        api.url = "http://127.0.0.1:{}/".format(self.server_address[1])
+
+    def __enter__(self):
+        thread = threading.Thread(target=self.serve_forever, args=(0.01,))
+        thread.daemon = True
+        thread.start()
+        return self.api
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
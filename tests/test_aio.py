@@ -0,0 +1,237 @@
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import asyncio
+
+# Third Party
+import pytest
+
+# DocumentCloud
+from documentcloud.aio import AsyncAPIResults, AsyncDocument, AsyncProject
+from documentcloud.exceptions import (
+    APIError,
+    CredentialsFailedError,
+    DoesNotExistError,
+)
+from documentcloud.retry import RetryPolicy
+
+pytestmark = pytest.mark.stand_in
+
+
+def test_lazy_login(stand_in, make_async_client):
+    async def main():
+        async with make_async_client() as client:
+            assert stand_in.count("POST", "/auth/token/") == 0
+            assert await client.get_user_id() == 1
+            assert await client.get_user_id() == 1
+            assert stand_in.count("POST", "/auth/token/") == 1
+
+    asyncio.run(main())
+
+
+def test_bad_credentials(make_async_client):
+    async def main():
+        async with make_async_client(password="foo") as client:
+            with pytest.raises(CredentialsFailedError):
+                await client.users.get("me")
+
+    asyncio.run(main())
+
+
+def test_get(stand_in, make_async_client):
+    document = stand_in.create_document({"title": "Async"})
+
+    async def main():
+        async with make_async_client() as client:
+            result = await client.documents.get(document["id"])
+            assert isinstance(result, AsyncDocument)
+            assert result.title == "Async"
+            assert await result.get_full_text()
+            assert (await result.user).id == 1
+            with pytest.raises(DoesNotExistError):
+                await client.documents.get(document["id"] + 1)
+
+    asyncio.run(main())
+
+
+def test_get_fields(stand_in, make_async_client):
+    document = stand_in.create_document({"title": "Async"})
+
+    async def main():
+        async with make_async_client() as client:
+            result = await client.documents.get(document["id"], fields=["id", "title"])
+            assert result.title == "Async"
+            # without a user or organization to fetch
+            assert await result.user is None
+            assert await result.organization is None
+
+    asyncio.run(main())
+
+
+def test_list_paginate(stand_in, make_async_client):
+    stand_in.create_documents(7)
+
+    async def main():
+        async with make_async_client() as client:
+            results = await client.documents.list(per_page=2)
+            assert isinstance(results, AsyncAPIResults)
+            assert len(results) == 7
+            titles = [d.title async for d in results]
+            assert len(titles) == 7
+            second = await results.next()
+            assert (await second.previous()).results[0].id == results.results[0].id
+            with pytest.raises(TypeError):
+                await client.documents.search("", prefetch=2)
+            with pytest.raises(TypeError):
+                client.documents.compact()
+
+    asyncio.run(main())
+
+
+def test_changes(stand_in, make_async_client):
+    documents = stand_in.create_documents(5)
+    for document in documents:
+        document["updated_at"] = "2021-01-01T00:00:01.000000Z"
+
+    async def main():
+        async with make_async_client() as client:
+            feed = client.documents.changes(per_page=2)
+            assert [d.id async for d in feed] == [d["id"] for d in documents]
+            assert feed.checkpoint.id == documents[-1]["id"]
+
+    asyncio.run(main())
+
+
+def test_concurrent_requests_share_pool(stand_in, make_async_client):
+    documents = stand_in.create_documents(20)
+
+    async def main():
+        async with make_async_client() as client:
+            results = await asyncio.gather(
+                *[client.documents.get(d["id"]) for d in documents]
+            )
+            assert [r.id for r in results] == [d["id"] for d in documents]
+        # concurrent first requests only log in once
+        assert stand_in.count("POST", "/auth/token/") == 1
+
+    asyncio.run(main())
+
+
+def test_expired_access_token(stand_in, make_async_client):
+    document = stand_in.create_document({"title": "Expire"})
+
+    async def main():
+        async with make_async_client() as client:
+            await client.documents.get(document["id"])
+            stand_in.expire_access_tokens()
+            await asyncio.gather(
+                *[client.documents.get(document["id"]) for _ in range(5)]
+            )
+        # only one of the rejected requests refreshed the tokens
+        assert stand_in.count("POST", "/auth/refresh/") == 1
+
+    asyncio.run(main())
+
+
+def test_save_delete(stand_in, make_async_client):
+    document = stand_in.create_document({"title": "Before"})
+
+    async def main():
+        async with make_async_client() as client:
+            result = await client.documents.get(document["id"])
+            result.title = "After"
+            await result.save()
+            assert stand_in.documents[document["id"]]["title"] == "After"
+            await result.delete()
+            assert document["id"] not in stand_in.documents
+
+    asyncio.run(main())
+
+
+def test_upload(stand_in, make_async_client):
+    async def main():
+        async with make_async_client() as client:
+            document = await client.documents.upload("tests/pdfs/test.pdf")
+            assert document.title == "test"
+            assert stand_in.uploads[str(document.id)]
+
+    asyncio.run(main())
+
+
+def test_sections(stand_in, make_async_client):
+    document = stand_in.create_document({"title": "Sections"})
+
+    async def main():
+        async with make_async_client() as client:
+            result = await client.documents.get(document["id"])
+            section = await result.sections.create("Section", 1)
+            assert section.document is result
+            assert [s async for s in result.sections] == []
+            with pytest.raises(ValueError):
+                await result.annotations.create("Note", 0, x1=0.1)
+
+    asyncio.run(main())
+
+
+def test_projects(stand_in, make_async_client):
+    documents = stand_in.create_documents(3)
+
+    async def main():
+        async with make_async_client() as client:
+            project = await client.projects.create(
+                "Project", document_ids=[d["id"] for d in documents]
+            )
+            assert isinstance(project, AsyncProject)
+            with pytest.raises(ValueError):
+                project.document_list  # pylint: disable=pointless-statement
+            await project.load_document_list()
+            assert len(project.document_list) == 3
+            project.document_list.remove(project.document_list[0])
+            await project.save()
+            assert stand_in.memberships[project.id] == [d["id"] for d in documents[1:]]
+            project, created = await client.projects.get_or_create_by_title("Project")
+            assert not created
+
+    asyncio.run(main())
+
+
+def test_token_cache(stand_in, make_async_client, tmpdir):
+    path = str(tmpdir.join("tokens.json"))
+
+    async def main():
+        for _ in range(2):
+            async with make_async_client(token_cache=path) as client:
+                assert await client.get_user_id() == 1
+
+    asyncio.run(main())
+    assert stand_in.count("POST", "/auth/token/") == 1
+
+
+def test_get_many(stand_in, make_async_client):
+    documents = stand_in.create_documents(3)
+    ids = [d["id"] for d in reversed(documents)] + [999]
+
+    async def main():
+        async with make_async_client() as client:
+            found, missing = await client.documents.get_many(ids)
+            assert [d.id for d in found] == ids[:3]
+            assert missing == [999]
+
+    asyncio.run(main())
+
+
+def test_retry_policy(stand_in, make_async_client):
+    async def main():
+        async with make_async_client(
+            retry_policy=RetryPolicy(backoff_factor=0.001)
+        ) as client:
+            assert await client.get_user_id() == 1
+            stand_in.failures = [(503, {}), (429, {"Retry-After": "0"})]
+            assert await client.users.get("me")
+            stand_in.failures = [(503, {})]
+            with pytest.raises(APIError):
+                await client.post("projects/", json={"title": "Project"})
+
+    asyncio.run(main())
+    assert stand_in.count("GET", "/api/users/me/") == 4
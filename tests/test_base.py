@@ -2,14 +2,22 @@
 from __future__ import division, print_function, unicode_literals
 
 # Standard Library
+import gc
+import io
+import json
+import weakref
 from builtins import str
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 # Third Party
 import pytest
 
 # DocumentCloud
+from documentcloud.base import APIResults, APISet
+from documentcloud.constants import PER_PAGE_MAX
 from documentcloud.documents import Document
-from documentcloud.exceptions import DuplicateObjectError
+from documentcloud.exceptions import DoesNotExistError, DuplicateObjectError
 
 
 class TestAPIResults:
@@ -53,6 +61,147 @@ class TestAPIResults:
         assert results.previous.previous is None
 
 
+@pytest.mark.stand_in
+class TestAPIResultsPages:
+    def test_getitem_fetches_one_page(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(50)
+        results = stand_in_client.documents.list(per_page=5)
+        assert results[42].id == documents[42]["id"]
+        assert results[-1].id == documents[-1]["id"]
+        assert results[43].id == documents[43]["id"]
+        # the first page, then pages 9 and 10
+        assert stand_in.count("GET", "/api/documents/") == 3
+
+    def test_slice(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(50)
+        results = stand_in_client.documents.list(per_page=5)
+        assert [d.id for d in results[12:23]] == [d["id"] for d in documents[12:23]]
+        assert [d.id for d in results[40::4]] == [d["id"] for d in documents[40::4]]
+        assert stand_in.count("GET", "/api/documents/") == 1 + 3 + 2
+
+    def test_later_page(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(12)
+        results = stand_in_client.documents.list(per_page=5, page=2)
+        assert results.per_page == 5
+        assert results[0].id == documents[5]["id"]
+        assert results[6].id == documents[11]["id"]
+        with pytest.raises(IndexError):
+            results[7]  # pylint: disable=pointless-statement
+
+    def test_deep_index(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(3000)
+        results = stand_in_client.documents.list(per_page=1)
+        assert results[2999].id == documents[-1]["id"]
+        assert stand_in.count("GET", "/api/documents/") == 2
+
+    def test_iter_many_pages(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(1500)
+        results = stand_in_client.documents.list(per_page=1)
+        assert [d.id for d in results] == [d["id"] for d in documents]
+
+    def test_stream(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(30)
+        results = stand_in_client.documents.list(per_page=5)
+        refs = [weakref.ref(d) for d in results.stream()]
+        assert len(refs) == len(documents)
+        # documents refer to themselves through their sections and notes
+        gc.collect()
+        # only the first page is still held, by the results themselves
+        assert all(r() is not None for r in refs[:5])
+        assert all(r() is None for r in refs[5:])
+        assert results._next is None  # pylint: disable=protected-access
+
+    def test_prefetch(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(23)
+        results = stand_in_client.documents.list(per_page=5, prefetch=2)
+        assert [d.id for d in results] == [d["id"] for d in documents]
+        # the pages are kept, so iterating again fetches nothing
+        assert [d.id for d in results] == [d["id"] for d in documents]
+        assert [d.id for d in results.stream()] == [d["id"] for d in documents]
+        assert stand_in.count("GET", "/api/documents/") == 5 + 4
+
+    def test_prefetch_search(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(12)
+        results = stand_in_client.documents.search("", per_page=5, prefetch=1)
+        assert [d.id for d in results.stream()] == [d["id"] for d in documents]
+
+    def test_fetch_all(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(23)
+        results = stand_in_client.documents.list(per_page=5)
+        assert results[12].id == documents[12]["id"]
+        all_results = results.fetch_all(workers=3)
+        assert [d.id for d in all_results] == [d["id"] for d in documents]
+        # the pages fetched already are not fetched again
+        assert stand_in.count("GET", "/api/documents/") == 5
+
+    def test_lazy(self, stand_in, stand_in_client):
+        # pylint: disable=protected-access
+        documents = stand_in.create_documents(5)
+        results = stand_in_client.documents.list()
+        page = results.results
+        assert [r["id"] for r in page.raw] == [d["id"] for d in documents]
+        assert page._objects == [None] * 5
+        document = results[2]
+        assert page._objects.count(None) == 4
+        assert results[2] is document
+        assert not isinstance(vars(document)["created_at"], datetime)
+        assert isinstance(document.created_at, datetime)
+        assert isinstance(vars(document)["created_at"], datetime)
+        assert "sections" not in vars(document)
+        sections = document.sections
+        assert document.sections is sections
+        assert document.notes is document.annotations
+
+    def test_lazy_list(self, stand_in, stand_in_client):
+        stand_in.create_documents(3)
+        page = stand_in_client.documents.list().results
+        documents = list(page)
+        # it is compared and added like the list it used to be
+        assert page == documents
+        assert documents == page
+        assert page != documents[:2]
+        assert page + documents == documents * 2
+        assert documents + page == documents * 2
+
+    def test_to_columns(self, stand_in, stand_in_client):
+        # pylint: disable=protected-access
+        documents = stand_in.create_documents(12)
+        results = stand_in_client.documents.list(per_page=5)
+        columns = results.to_columns(fields=["id", "title"])
+        assert columns["id"] == [d["id"] for d in documents]
+        assert columns["title"] == [d["title"] for d in documents]
+        # the pages are not kept, and no documents were built
+        assert results._next is None
+        assert results.results._objects == [None] * 5
+
+    def test_to_csv(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(12)
+        results = stand_in_client.documents.list(per_page=5, prefetch=2)
+        file_ = io.StringIO()
+        assert results.to_csv(file_, fields=["id", "slug"]) == 12
+        lines = file_.getvalue().splitlines()
+        assert lines[0] == "id,slug"
+        assert lines[1:] == ["{},{}".format(d["id"], d["slug"]) for d in documents]
+        assert stand_in.count("GET", "/api/documents/") == 3
+
+    def test_to_jsonl_extra(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(3)
+        parent = stand_in_client.projects.create("Parent")
+        # like the results of a child client, such as a document's notes
+        results = APIResults(
+            Document,
+            stand_in_client,
+            stand_in_client.get("documents/"),
+            extra={"parent": parent},
+        )
+        assert results[0].parent is parent
+        file_ = io.StringIO()
+        assert results.to_jsonl(file_) == 3
+        rows = [json.loads(line) for line in file_.getvalue().splitlines()]
+        assert [r["id"] for r in rows] == [d["id"] for d in documents]
+        assert not any("parent" in r for r in rows)
+
+
 class TestAPISet:
     def test_init(self, project_factory, document):
         project = project_factory()
@@ -112,3 +261,94 @@ class TestAPISet:
     def test_extend_dupe(self, project, document):
         with pytest.raises(DuplicateObjectError):
             project.document_list.extend([document])
+
+    def test_indexed(self):
+        documents = [Document(None, {"id": i, "title": str(i)}) for i in range(5)]
+        document_list = APISet(documents, Document)
+        # the documents are kept as they are
+        assert all(a is b for a, b in zip(document_list, documents))
+        document_list.remove(Document(None, {"id": 2, "title": "2"}))
+        assert Document(None, {"id": 2, "title": "2"}) not in document_list
+        assert document_list.index(documents[4]) == 3
+        assert document_list.pop().id == 4
+        document_list.insert(0, documents[4])
+        assert document_list.index(documents[4]) == 0
+        assert [d.id for d in document_list] == [4, 0, 1, 3]
+        with pytest.raises(DuplicateObjectError):
+            document_list[1] = documents[4]
+        assert [d.id for d in document_list] == [4, 0, 1, 3]
+        with pytest.raises(ValueError):
+            document_list.remove(documents[2])
+
+    def test_indexed_changes(self):
+        documents = [Document(None, {"id": i, "title": str(i)}) for i in range(100)]
+        document_list = APISet(documents, Document)
+        expected = list(documents)
+        # removing from the middle moves the positions after it
+        for document in documents[10:90:3]:
+            document_list.remove(document)
+            expected.remove(document)
+        replaced = expected[20]
+        replacement = Document(None, {"id": 100, "title": "100"})
+        document_list[20] = replacement
+        expected[20] = replacement
+        del document_list[-5]
+        del expected[-5]
+        assert list(document_list) == expected
+        assert all(document_list.index(d) == i for i, d in enumerate(expected))
+        assert replaced not in document_list
+        assert document_list.index(replacement) == 20
+        document_list[1:3] = [documents[1], documents[10]]
+        assert [d.id for d in document_list[:4]] == [0, 1, 10, 3]
+        with pytest.raises(DuplicateObjectError):
+            document_list[4:5] = [documents[0]]
+
+    def test_update(self):
+        documents = [Document(None, {"id": i, "title": str(i)}) for i in range(5)]
+        document_list = APISet(documents[:3], Document)
+        document_list.update(documents)
+        assert [d.id for d in document_list] == [0, 1, 2, 3, 4]
+        with pytest.raises(TypeError):
+            document_list.update([1])
+        document_list.clear()
+        assert documents[0] not in document_list
+
+
+@pytest.mark.stand_in
+class TestGetMany:
+    def test_get_many(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(3)
+        ids = [documents[2]["id"], documents[0]["id"], 999, documents[2]["id"]]
+        found, missing = stand_in_client.documents.get_many(ids)
+        assert [d.id for d in found] == [ids[0], ids[1], ids[3]]
+        assert all(isinstance(d, Document) for d in found)
+        assert missing == [999]
+        assert stand_in.count("GET", "/api/documents/") == 1
+
+    def test_get_many_pages(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(PER_PAGE_MAX + 5)
+        ids = [d["id"] for d in documents]
+        found, missing = stand_in_client.documents.get_many(ids)
+        assert [d.id for d in found] == ids
+        assert not missing
+        assert stand_in.count("GET", "/api/documents/") == 2
+
+    def test_get_future(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(5)
+        futures = [stand_in_client.documents.get_future(d["id"]) for d in documents]
+        missing = stand_in_client.documents.get_future(999)
+        assert [f.result(timeout=5).id for f in futures] == [d["id"] for d in documents]
+        with pytest.raises(DoesNotExistError):
+            missing.result(timeout=5)
+        assert stand_in.count("GET", "/api/documents/") == 1
+
+    def test_get_future_threads(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(20)
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            futures = list(
+                executor.map(
+                    lambda d: stand_in_client.documents.get_future(d["id"]), documents
+                )
+            )
+        assert [f.result(timeout=5).id for f in futures] == [d["id"] for d in documents]
+        assert stand_in.count("GET", "/api/documents/") < len(documents)
@@ -0,0 +1,109 @@
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+from datetime import datetime
+
+# Third Party
+import pytest
+
+# DocumentCloud
+from documentcloud.changes import Checkpoint
+from documentcloud.toolbox import UTC
+
+# Local
+from .conftest import timestamp
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def documents(stand_in):
+    documents = stand_in.create_documents(7)
+    for i, document in enumerate(documents):
+        document["updated_at"] = timestamp(i)
+    return documents
+
+
+def test_checkpoint_token():
+    checkpoint = Checkpoint(datetime(2021, 1, 1, 0, 0, 4, 123, tzinfo=UTC), 12)
+    assert Checkpoint.from_token(checkpoint.token) == checkpoint
+    assert Checkpoint.from_token(str(checkpoint)) == checkpoint
+    with pytest.raises(ValueError):
+        Checkpoint.from_token("12")
+
+
+def test_checkpoint_datetime():
+    checkpoint = Checkpoint.coerce(datetime(2021, 1, 1))
+    assert checkpoint == (datetime(2021, 1, 1, tzinfo=UTC), 0)
+
+
+@pytest.mark.stand_in
+def test_changes(stand_in_client, documents):
+    feed = stand_in_client.documents.changes(per_page=3)
+    assert [d.id for d in feed] == [d["id"] for d in documents]
+    assert feed.checkpoint.id == documents[-1]["id"]
+    # nothing changed since
+    assert not list(stand_in_client.documents.changes(since=feed.checkpoint.token))
+
+
+@pytest.mark.stand_in
+def test_changes_resume(stand_in_client, documents):
+    feed = stand_in_client.documents.changes(per_page=3)
+    for document in feed:
+        if document.id == documents[3]["id"]:
+            break
+    token = feed.checkpoint.token
+    documents[0]["updated_at"] = timestamp(30)
+    feed = stand_in_client.documents.changes(since=token, per_page=3)
+    assert [d.id for d in feed] == [d["id"] for d in documents[4:] + documents[:1]]
+
+
+@pytest.mark.stand_in
+@pytest.mark.usefixtures("stand_in")
+def test_changes_ties(stand_in_client, documents):
+    for document in documents:
+        document["updated_at"] = timestamp(1)
+    feed = stand_in_client.documents.changes(per_page=2)
+    seen = []
+    for document in feed:
+        seen.append(document.id)
+        if len(seen) == 5:
+            break
+    # more documents updated at the checkpoint's time than fit on a page
+    feed = stand_in_client.documents.changes(since=feed.checkpoint, per_page=2)
+    assert seen + [d.id for d in feed] == [d["id"] for d in documents]
+
+
+@pytest.mark.stand_in
+def test_changes_ties_pages(stand_in, stand_in_client):
+    documents = stand_in.create_documents(40)
+    for document in documents:
+        document["updated_at"] = timestamp(1)
+    feed = stand_in_client.documents.changes(per_page=4)
+    assert [d.id for d in feed] == [d["id"] for d in documents]
+    # the run is read a page after another, after starting again from the first
+    # checkpoint, rather than from its start for each page
+    assert stand_in.count("GET", "/api/documents/") == 11
+    feed = stand_in_client.documents.changes(per_page=4)
+    assert sum(len(page) for page in feed.raw_pages()) == 40
+    assert stand_in.count("GET", "/api/documents/") == 22
+
+
+@pytest.mark.stand_in
+def test_changes_while_reading(stand_in_client, documents):
+    seen = []
+    for document in stand_in_client.documents.changes(per_page=2):
+        seen.append(document.id)
+        if document.id == documents[1]["id"]:
+            # one already seen and one not yet, both moving to the end
+            documents[0]["updated_at"] = timestamp(40)
+            documents[2]["updated_at"] = timestamp(41)
+    ids = [d["id"] for d in documents]
+    assert seen == ids[:2] + ids[3:] + [ids[0], ids[2]]
+
+
+@pytest.mark.stand_in
+def test_changes_fields(stand_in_client, documents):
+    feed = stand_in_client.documents.changes(fields=["title"])
+    assert [d.title for d in feed] == [d["title"] for d in documents]
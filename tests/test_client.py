@@ -2,15 +2,25 @@
 from __future__ import division, print_function, unicode_literals
 
 # Standard Library
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Third Party
 import pytest
-import ratelimit
 
 # DocumentCloud
-from documentcloud.constants import RATE_LIMIT
+from documentcloud.client import DocumentCloud
+from documentcloud.constants import POOL_MAXSIZE, RATE_LIMIT
 from documentcloud.exceptions import APIError, CredentialsFailedError
+from documentcloud.limiter import TokenBucket
+from documentcloud.tokencache import TokenCache
+
+# Local
+from .conftest import FakeClock
+from .stand_in import PASSWORD as STAND_IN_PASSWORD
+from .stand_in import USERNAME as STAND_IN_USERNAME
+from .stand_in import make_token
 
 # pylint: disable=protected-access
 
@@ -18,28 +28,28 @@ from documentcloud.exceptions import APIError, CredentialsFailedError
 def test_set_tokens_credentials(client):
     """Test setting the tokens using credentials"""
     client.refresh_token = None
-    del client.session.headers["Authorization"]
+    client._access_token = None
     client._set_tokens()
     assert client.refresh_token
-    assert "Authorization" in client.session.headers
+    assert client._access_token
 
 
 def test_set_tokens_refresh(client):
     """Test setting the tokens using refresh token"""
     # first set tokens sets, refresh token, second one uses it
     client.refresh_token = None
-    del client.session.headers["Authorization"]
+    client._access_token = None
     client._set_tokens()
     client._set_tokens()
     assert client.refresh_token
-    assert "Authorization" in client.session.headers
+    assert client._access_token
 
 
 def test_set_tokens_none(public_client):
     """Test setting the tokens with no credentials"""
     public_client._set_tokens()
     assert public_client.refresh_token is None
-    assert "Authorization" not in public_client.session.headers
+    assert public_client._access_token is None
 
 
 def test_get_tokens(client):
@@ -77,10 +87,24 @@ def test_bad_attr(client):
         assert client.foo
 
 
-def test_rate_limit(rate_client):
-    with pytest.raises(ratelimit.RateLimitException):
-        for _ in range(RATE_LIMIT * 2):
-            rate_client.users.get("me")
+def test_rate_limit(rate_client, monkeypatch):
+    """The burst is used up by back to back requests, which do not raise"""
+    assert isinstance(rate_client.rate_limiter, TokenBucket)
+    # the bucket does not refill however long the requests take
+    limiter = TokenBucket(clock=FakeClock())
+    monkeypatch.setattr(rate_client, "rate_limiter", limiter)
+    for _ in range(RATE_LIMIT):
+        rate_client.users.get("me")
+    assert limiter.available == 0
+
+
+def test_rate_limit_disabled(public_client):
+    assert public_client.rate_limiter is None
+
+
+def test_rate_limit_custom():
+    limiter = TokenBucket(rate=1, burst=1)
+    assert DocumentCloud(rate_limit=limiter).rate_limiter is limiter
 
 
 @pytest.mark.short
@@ -111,3 +135,253 @@ def test_expired_refresh_token(short_client, record_mode):
     assert short_client.users.get("me")
     # check the refresh token was updated
     assert old_refresh_token != short_client.refresh_token
+
+
+def test_transport_shared(public_client):
+    """The same pooled sessions are used for every request"""
+    transport = public_client.transport
+    assert public_client.session is transport.api
+    assert len({id(s) for s in transport.sessions.values()}) == len(transport.sessions)
+
+
+def test_pool_config():
+    client = DocumentCloud(
+        rate_limit=False,
+        pool_config={"asset": {"pool_maxsize": 32, "pool_block": True}},
+    )
+    adapter = client.transport.asset.get_adapter("https://")
+    assert adapter._pool_maxsize == 32
+    assert adapter._pool_block
+    adapter = client.transport.api.get_adapter("https://")
+    assert adapter._pool_maxsize == POOL_MAXSIZE
+
+
+@pytest.mark.parametrize(
+    "pool_config", [{"foo": {}}, {"api": {"pool_maxsize": 1, "foo": 2}}]
+)
+def test_pool_config_bad(pool_config):
+    with pytest.raises(ValueError):
+        DocumentCloud(rate_limit=False, pool_config=pool_config)
+
+
+@pytest.mark.stand_in
+def test_refresh_expired_token_before_request(stand_in, stand_in_client):
+    """An expired access token is refreshed before the request, not after a 403"""
+    stand_in_client._access_expires = time.time() - 1
+    assert stand_in_client.users.get("me")
+    assert stand_in.count("POST", "/auth/refresh/") == 1
+    assert stand_in.count("GET", "/api/users/me/") == 1
+
+
+@pytest.mark.stand_in
+def test_refresh_expiring_token_in_background(stand_in, stand_in_client):
+    old_token = stand_in_client._access_token
+    stand_in_client._access_expires = time.time() + 1
+    assert stand_in_client.users.get("me")
+    # wait for the background refresh to finish
+    with stand_in_client._refresh_lock:
+        pass
+    assert stand_in.count("POST", "/auth/refresh/") == 1
+    assert stand_in_client._access_token != old_token
+
+
+@pytest.mark.stand_in
+def test_refresh_once_for_many_threads(stand_in, stand_in_client):
+    stand_in_client._access_expires = time.time() - 1
+    threads = [
+        threading.Thread(target=stand_in_client.users.get, args=("me",))
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stand_in.count("POST", "/auth/refresh/") == 1
+
+
+@pytest.mark.stand_in
+def test_rejected_token_refreshed_once(stand_in, stand_in_client):
+    """Requests rejected with the same token only refresh it once"""
+    token = stand_in_client._access_token
+    stand_in.expire_access_tokens()
+    stand_in_client._set_tokens(used_token=token)
+    stand_in_client._set_tokens(used_token=token)
+    assert stand_in.count("POST", "/auth/refresh/") == 1
+
+
+@pytest.mark.stand_in
+def test_lazy_login(stand_in):
+    client = DocumentCloud(
+        username=STAND_IN_USERNAME,
+        password=STAND_IN_PASSWORD,
+        base_uri=stand_in.base_uri,
+        auth_uri=stand_in.auth_uri,
+        rate_limit=False,
+    )
+    assert stand_in.count("POST", "/auth/token/") == 0
+    assert client.user_id == 1
+    assert stand_in.count("POST", "/auth/token/") == 1
+    client.close()
+
+
+@pytest.mark.stand_in
+def test_lazy_login_bad_credentials(stand_in):
+    client = DocumentCloud(
+        username=STAND_IN_USERNAME,
+        password="foo",
+        base_uri=stand_in.base_uri,
+        auth_uri=stand_in.auth_uri,
+        rate_limit=False,
+    )
+    with pytest.raises(CredentialsFailedError):
+        client.users.get("me")
+    client.close()
+
+
+@pytest.mark.stand_in
+def test_token_cache_reused(stand_in, tmpdir):
+    """A second client reuses the tokens cached by the first without logging in"""
+    path = str(tmpdir.join("tokens.json"))
+    for _ in range(2):
+        client = DocumentCloud(
+            username=STAND_IN_USERNAME,
+            password=STAND_IN_PASSWORD,
+            base_uri=stand_in.base_uri,
+            auth_uri=stand_in.auth_uri,
+            rate_limit=False,
+            token_cache=path,
+        )
+        assert client.users.get("me")
+        client.close()
+    assert stand_in.count("POST", "/auth/token/") == 1
+    assert stand_in.count("POST", "/auth/refresh/") == 0
+
+
+@pytest.mark.stand_in
+def test_token_cache_expired_access_token(stand_in, tmpdir):
+    """An expired cached access token is refreshed with the cached refresh token,
+    and the new tokens are cached
+    """
+    cache = TokenCache(str(tmpdir.join("tokens.json")))
+    refresh_token = stand_in.issue_tokens()["refresh"]
+    cache.set(
+        STAND_IN_USERNAME, stand_in.auth_uri, make_token("access", -10), refresh_token
+    )
+    client = DocumentCloud(
+        username=STAND_IN_USERNAME,
+        password=STAND_IN_PASSWORD,
+        base_uri=stand_in.base_uri,
+        auth_uri=stand_in.auth_uri,
+        rate_limit=False,
+        token_cache=cache,
+    )
+    assert client.users.get("me")
+    client.close()
+    assert stand_in.count("POST", "/auth/token/") == 0
+    assert stand_in.count("POST", "/auth/refresh/") == 1
+    assert cache.get(STAND_IN_USERNAME, stand_in.auth_uri) == (
+        client._access_token,
+        client.refresh_token,
+    )
+
+
+@pytest.mark.stand_in
+def test_http_cache(stand_in):
+    document = stand_in.create_document({"title": "Cached"})
+    client = DocumentCloud(
+        username=STAND_IN_USERNAME,
+        password=STAND_IN_PASSWORD,
+        base_uri=stand_in.base_uri,
+        auth_uri=stand_in.auth_uri,
+        rate_limit=False,
+        http_cache=True,
+    )
+    path = "/api/documents/{}/".format(document["id"])
+
+    assert client.documents.get(document["id"]).title == "Cached"
+    response = client.get("documents/{}/".format(document["id"]))
+    assert response.from_cache
+    assert response.json()["title"] == "Cached"
+    assert "If-None-Match" in stand_in.requests[-1][3]
+
+    # a change on the server is seen on the next request
+    stand_in.documents[document["id"]]["title"] = "Changed"
+    assert client.documents.get(document["id"]).title == "Changed"
+
+    # writes invalidate the cached response
+    client.put("documents/{}/".format(document["id"]), json={"title": "Written"})
+    assert client.documents.get(document["id"]).title == "Written"
+    assert "If-None-Match" not in stand_in.requests[-1][3]
+    assert stand_in.count("GET", path) == 4
+    client.close()
+
+
+@pytest.mark.stand_in
+def test_http_cache_evicted(stand_in, monkeypatch):
+    """A 304 is answered with the entry whose validators were sent, even if it has
+    left the cache by the time the response arrives
+    """
+    document = stand_in.create_document({"title": "Cached"})
+    client = DocumentCloud(
+        username=STAND_IN_USERNAME,
+        password=STAND_IN_PASSWORD,
+        base_uri=stand_in.base_uri,
+        auth_uri=stand_in.auth_uri,
+        rate_limit=False,
+        http_cache=True,
+    )
+    client.get("documents/{}/".format(document["id"]))
+    update = client.http_cache.update
+
+    def evict_and_update(*args):
+        client.http_cache.clear()
+        return update(*args)
+
+    monkeypatch.setattr(client.http_cache, "update", evict_and_update)
+    response = client.get("documents/{}/".format(document["id"]))
+    assert response.status_code == 200
+    assert response.from_cache
+    assert response.json()["title"] == "Cached"
+    client.close()
+
+
+@pytest.mark.stand_in
+def test_thread_safety(stand_in):
+    """Many threads sharing one client log in once, look up the user once and
+    refresh an expired token once
+    """
+    documents = stand_in.create_documents(10)
+    client = DocumentCloud(
+        username=STAND_IN_USERNAME,
+        password=STAND_IN_PASSWORD,
+        base_uri=stand_in.base_uri,
+        auth_uri=stand_in.auth_uri,
+        rate_limit=False,
+        pool_config={"api": {"pool_maxsize": 16}},
+    )
+    expired = threading.Event()
+
+    def work(thread):
+        for i in range(10):
+            if thread == 0 and i == 5:
+                stand_in.expire_access_tokens()
+                expired.set()
+            assert client.user_id == 1
+            document = documents[(thread + i) % len(documents)]
+            assert client.documents.get(document["id"]).id == document["id"]
+            assert len(client.documents.list(per_page=5)) == len(documents)
+            client.put(
+                "documents/{}/".format(document["id"]),
+                json={"title": "Thread {}".format(thread)},
+            )
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(work, range(16)))
+    client.close()
+
+    assert expired.is_set()
+    assert stand_in.count("POST", "/auth/token/") == 1
+    assert stand_in.count("POST", "/auth/refresh/") == 1
+    assert stand_in.count("GET", "/api/users/me/") == 1
+    # requests rejected with the expired token are sent again
+    assert stand_in.count("PUT", "/api/documents/") >= 16 * 10
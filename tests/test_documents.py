@@ -3,13 +3,15 @@ from __future__ import division, print_function, unicode_literals
 
 # Standard Library
 from builtins import str
+from copy import copy
 from datetime import datetime
 
 # Third Party
 import pytest
 
 # DocumentCloud
-from documentcloud.documents import Mention
+from documentcloud.base import APISet
+from documentcloud.documents import BaseDocument, CompactDocument, Document, Mention
 from documentcloud.exceptions import APIError, DoesNotExistError
 from documentcloud.organizations import Organization
 from documentcloud.users import User
@@ -73,6 +75,29 @@ class TestDocument:
     def test_dir(self, document, attr):
         assert attr in dir(document)
 
+    @pytest.mark.parametrize(
+        "attr",
+        [
+            "full_text_url",
+            "get_full_text",
+            "full_text",
+            "get_small_image_url",
+            "get_small_image",
+            "large_image_url_list",
+        ],
+    )
+    def test_accessors_generated(self, attr):
+        # on the class, rather than looked up each time
+        assert any(attr in vars(cls) for cls in Document.__mro__)
+
+    def test_getattr_missing(self, document):
+        with pytest.raises(AttributeError):
+            document.get_missing_url  # pylint: disable=pointless-statement
+
+    def test_accessor_field_precedence(self, client):
+        document = Document(client, {"id": 1, "pdf_url": "https://www.example.com/"})
+        assert document.pdf_url == "https://www.example.com/"
+
     def test_mentions(self, client, document):
         document = client.documents.search("document:{} text".format(document.id))[0]
         assert document.mentions
@@ -91,7 +116,9 @@ class TestDocument:
     def test_user_expanded(self, client, document):
         document = client.documents.get(document.id, expand=["user"])
         assert document._user is not None
-        assert document._user == document.user
+        # the nested user is built when it is first used
+        assert isinstance(document.user, User)
+        assert document.user == document._user
 
     def test_organization(self, document):
         assert document._organization is None
@@ -206,6 +233,112 @@ class TestDocumentClient:
             client.documents.get(document.id)
 
 
+@pytest.mark.stand_in
+class TestFields:
+    def test_get(self, stand_in, stand_in_client):
+        (data,) = stand_in.create_documents(1)
+        document = stand_in_client.documents.get(
+            data["id"], fields=["id", "title", "updated_at"]
+        )
+        assert document.title == data["title"]
+        assert isinstance(document.updated_at, datetime)
+        assert not hasattr(document, "created_at")
+        assert document.user is None
+        assert document.organization is None
+
+    def test_list(self, stand_in, stand_in_client):
+        stand_in.create_documents(3)
+        documents = stand_in_client.documents.list(fields=["id", "title"])
+        assert [d.title for d in documents] == [
+            "Document 0",
+            "Document 1",
+            "Document 2",
+        ]
+        assert not any(hasattr(d, "slug") for d in documents)
+
+    def test_search(self, stand_in, stand_in_client):
+        stand_in.create_documents(2)
+        documents = stand_in_client.documents.search("", fields=["id"])
+        assert len(documents) == 2
+        assert not any(hasattr(d, "title") for d in documents)
+
+
+@pytest.mark.stand_in
+class TestCompactDocument:
+    def test_fields(self, stand_in, stand_in_client):
+        (data,) = stand_in.create_documents(1)
+        document = stand_in_client.documents.get(data["id"])
+        compact = stand_in_client.documents.compact().get(data["id"])
+        assert isinstance(compact, CompactDocument)
+        for field in ("id", "title", "slug", "created_at", "user_id", "data"):
+            assert getattr(compact, field) == getattr(document, field)
+        assert isinstance(compact.created_at, datetime)
+        assert compact.get_pdf_url() == document.get_pdf_url()
+        assert compact.user.id == document.user.id
+        assert isinstance(compact, BaseDocument)
+        assert not isinstance(compact, Document)
+        assert not hasattr(compact, "__dict__")
+
+    def test_equality(self, stand_in, stand_in_client):
+        (data,) = stand_in.create_documents(1)
+        document = stand_in_client.documents.get(data["id"])
+        compact = stand_in_client.documents.compact().get(data["id"])
+        assert document == compact
+        assert compact == document
+        # either may be in a project's list of documents
+        documents = APISet([document], BaseDocument)
+        assert compact in documents
+        documents.remove(compact)
+        documents.append(compact)
+        assert document in documents
+
+    def test_mock(self, mocker):
+        # a mock of a document still counts as one
+        assert isinstance(mocker.Mock(spec=Document), Document)
+        assert isinstance(mocker.Mock(spec=CompactDocument), BaseDocument)
+
+    def test_extra(self, stand_in, stand_in_client):
+        # pylint: disable=protected-access
+        stand_in.create_documents(1)
+        (compact,) = stand_in_client.documents.compact().list()
+        compact.unknown = "value"
+        assert compact.unknown == "value"
+        assert compact._extra == {"unknown": "value"}
+        clone = copy(compact)
+        clone.other = "value"
+        assert not hasattr(compact, "other")
+        assert clone.title == compact.title
+        with pytest.raises(AttributeError):
+            compact.missing  # pylint: disable=pointless-statement
+
+    def test_extra_shortcut(self, stand_in, stand_in_client):
+        # pylint: disable=protected-access
+        stand_in.create_documents(1)
+        (compact,) = stand_in_client.documents.compact().list()
+        # the overflow dictionary is only created when it is needed
+        assert compact._extra is None
+        # an overflow field named like a shortcut is read instead of fetching
+        compact.full_text = "text"
+        assert compact.full_text == "text"
+
+    def test_fields_left_out(self, stand_in, stand_in_client):
+        stand_in.create_documents(1)
+        (compact,) = stand_in_client.documents.compact().list(fields=["id"])
+        assert not hasattr(compact, "title")
+        assert not hasattr(compact, "created_at")
+        assert compact.user is None
+
+    def test_save(self, stand_in, stand_in_client):
+        (data,) = stand_in.create_documents(1)
+        compact = stand_in_client.documents.compact().get(data["id"])
+        compact.title = "New title"
+        compact.save()
+        assert stand_in.documents[data["id"]]["title"] == "New title"
+        sections = compact.sections
+        assert compact.sections is sections
+        assert compact.notes is compact.annotations
+
+
 class TestMention:
     def test_mention(self):
         mention = Mention("page_no_42", "text")
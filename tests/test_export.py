@@ -0,0 +1,152 @@
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import io
+import json
+
+# Third Party
+import pytest
+
+# DocumentCloud
+from documentcloud import export
+
+PAGES = [
+    [
+        {"id": 1, "title": "One", "user": {"id": 10, "name": "A"}, "data": {}},
+        {"id": 2, "title": "Two", "user": 11, "data": {"tag": ["x"]}},
+    ],
+    [{"id": 3, "title": "Three", "user": None, "extra": True}],
+]
+
+
+def test_field_names():
+    assert export.field_names(PAGES[0] + PAGES[1]) == [
+        "id",
+        "title",
+        "user",
+        "data",
+        "extra",
+    ]
+
+
+def test_columns():
+    columns = export.columns(iter(PAGES))
+    # the fields default to those on the first page
+    assert list(columns) == ["id", "title", "user", "data"]
+    assert columns["id"] == [1, 2, 3]
+    assert columns["data"] == [{}, {"tag": ["x"]}, None]
+
+
+def test_columns_nested():
+    columns = export.columns(iter(PAGES), fields=["id", "user.name"])
+    assert columns == {"id": [1, 2, 3], "user.name": ["A", None, None]}
+
+
+def test_columns_empty():
+    assert not export.columns(iter([]))
+    assert export.columns(iter([]), fields=["id"]) == {"id": []}
+
+
+def test_write_csv():
+    file_ = io.StringIO()
+    assert export.write_csv(iter(PAGES), file_, fields=["id", "data", "extra"]) == 3
+    assert file_.getvalue().splitlines() == [
+        "id,data,extra",
+        "1,{},",
+        '2,"{""tag"": [""x""]}",',
+        "3,,True",
+    ]
+
+
+def test_write_jsonl():
+    file_ = io.StringIO()
+    assert export.write_jsonl(iter(PAGES), file_) == 3
+    assert [json.loads(l) for l in file_.getvalue().splitlines()] == (
+        PAGES[0] + PAGES[1]
+    )
+
+
+def test_write_jsonl_fields():
+    file_ = io.StringIO()
+    export.write_jsonl(iter(PAGES), file_, fields=["title", "user.id"])
+    assert file_.getvalue().splitlines()[:2] == [
+        '{"title": "One", "user.id": 10}',
+        '{"title": "Two", "user.id": null}',
+    ]
+
+
+def test_record_batches():
+    pytest.importorskip("pyarrow")
+    batches = list(
+        export.record_batches(iter(PAGES[:1]), fields=["id", "data", "extra"])
+    )
+    assert [b.num_rows for b in batches] == [2]
+    # nested objects are kept as JSON, and fields empty so far have no type
+    assert str(batches[0].schema.field("data").type) == "string"
+    assert str(batches[0].schema.field("extra").type) == "null"
+    assert batches[0].column(1).to_pylist() == ["{}", '{"tag": ["x"]}']
+
+
+def test_record_batches_widen():
+    pytest.importorskip("pyarrow")
+    batches = list(export.record_batches(iter(PAGES), fields=["id", "extra"]))
+    # a field empty on the first page takes its type from a later one
+    assert str(batches[0].schema.field("extra").type) == "null"
+    assert str(batches[1].schema.field("extra").type) == "bool"
+    table = export.arrow_table(iter(PAGES), fields=["id", "extra"])
+    assert table.schema == batches[1].schema
+    assert table.to_pydict() == {"id": [1, 2, 3], "extra": [None, None, True]}
+
+
+def test_record_batches_changed_type():
+    pytest.importorskip("pyarrow")
+    pages = [[{"id": 1}], [{"id": "two"}]]
+    with pytest.raises(ValueError):
+        list(export.record_batches(iter(pages)))
+
+
+def test_record_batches_schema():
+    pyarrow = pytest.importorskip("pyarrow")
+    schema = pyarrow.schema([("id", pyarrow.int32()), ("extra", pyarrow.bool_())])
+    batches = list(export.record_batches(iter(PAGES), ["id", "extra"], schema))
+    assert all(b.schema == schema for b in batches)
+    assert batches[1].to_pydict() == {"id": [3], "extra": [True]}
+
+
+def test_write_parquet(tmpdir):
+    pyarrow = pytest.importorskip("pyarrow")
+    pytest.importorskip("pyarrow.parquet")
+    path = str(tmpdir.join("results.parquet"))
+    assert export.write_parquet(iter(PAGES), path, fields=["id", "title"]) == 3
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    assert parquet_file.num_row_groups == 2
+    assert parquet_file.read().to_pydict() == {
+        "id": [1, 2, 3],
+        "title": ["One", "Two", "Three"],
+    }
+
+
+def test_write_parquet_widen(tmpdir):
+    pyarrow = pytest.importorskip("pyarrow")
+    pytest.importorskip("pyarrow.parquet")
+    path = str(tmpdir.join("results.parquet"))
+    # the first page is held back until the empty field has a type
+    assert export.write_parquet(iter(PAGES), path, fields=["id", "extra"]) == 3
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    assert parquet_file.num_row_groups == 2
+    assert str(parquet_file.schema_arrow.field("extra").type) == "bool"
+    assert parquet_file.read().to_pydict() == {
+        "id": [1, 2, 3],
+        "extra": [None, None, True],
+    }
+
+
+def test_write_parquet_pending(tmpdir, monkeypatch):
+    pytest.importorskip("pyarrow")
+    pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(export, "PARQUET_PENDING_PAGES", 1)
+    path = str(tmpdir.join("results.parquet"))
+    # the file's schema was settled before the empty field had a type
+    with pytest.raises(ValueError):
+        export.write_parquet(iter(PAGES), path, fields=["id", "extra"])
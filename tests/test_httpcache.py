@@ -0,0 +1,99 @@
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Third Party
+import pytest
+
+# DocumentCloud
+from documentcloud.httpcache import FileHTTPCache, HTTPCache, get_http_cache
+
+URL = "https://api.example.com/api/documents/1/"
+
+# pylint: disable=redefined-outer-name
+
+
+def entry(url=URL, content=b"{}"):
+    return {
+        "url": url,
+        "headers": {"ETag": '"abc"', "Last-Modified": "Thu, 11 Jun 2020 13:31:41 GMT"},
+        "content": content,
+        "encoding": "utf-8",
+    }
+
+
+@pytest.fixture(params=["memory", "file"])
+def make_cache(request, tmpdir):
+    def make_cache(maxsize=3):
+        if request.param == "memory":
+            return HTTPCache(maxsize)
+        return FileHTTPCache(str(tmpdir.join("cache.sqlite")), maxsize)
+
+    return make_cache
+
+
+def test_get_set(make_cache):
+    cache = make_cache()
+    assert cache.get("key") is None
+    cache.set("key", entry())
+    assert cache.get("key") == entry()
+
+
+def test_lru_eviction(make_cache):
+    cache = make_cache(maxsize=2)
+    cache.set("a", entry())
+    cache.set("b", entry())
+    # using a makes b the least recently used
+    cache.get("a")
+    cache.set("c", entry())
+    assert len(cache) == 2
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_invalidate(make_cache):
+    cache = make_cache()
+    cache.set("document", entry())
+    cache.set("sections", entry(URL + "sections/"))
+    cache.set("other", entry(URL.replace("1", "2")))
+    cache.invalidate(URL)
+    assert cache.get("document") is None
+    assert cache.get("sections") is None
+    assert cache.get("other") is not None
+
+
+def test_conditional_headers(make_cache):
+    cache = make_cache()
+    assert cache.conditional_headers(cache.get("key")) == {}
+    cache.set("key", entry())
+    assert cache.conditional_headers(cache.get("key")) == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Thu, 11 Jun 2020 13:31:41 GMT",
+    }
+
+
+def test_key():
+    cache = HTTPCache()
+    assert cache.key("user", URL, {"b": 1, "a": 2}) == cache.key(
+        "user", URL + "?b=1&a=2"
+    )
+    assert cache.key("user", URL) != cache.key("other", URL)
+
+
+def test_file_cache_persists(tmpdir):
+    path = str(tmpdir.join("cache.sqlite"))
+    cache = FileHTTPCache(path)
+    cache.set("key", entry(content=b"\x00binary"))
+    cache.close()
+    assert FileHTTPCache(path).get("key") == entry(content=b"\x00binary")
+
+
+def test_get_http_cache(tmpdir):
+    assert get_http_cache(None) is None
+    assert isinstance(get_http_cache(True), HTTPCache)
+    path = str(tmpdir.join("cache.sqlite"))
+    assert isinstance(get_http_cache(path), FileHTTPCache)
+    cache = HTTPCache()
+    assert get_http_cache(cache) is cache
+    with pytest.raises(ValueError):
+        HTTPCache(0)
@@ -0,0 +1,186 @@
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Third Party
+import pytest
+
+# DocumentCloud
+from documentcloud.client import DocumentCloud
+from documentcloud.exceptions import DoesNotExistError
+from documentcloud.instrumentation import (
+    EventBus,
+    Histogram,
+    MetricsAggregator,
+    RateLimitEvent,
+    RequestEvent,
+    SpanAdapter,
+    TokenEvent,
+    path_template,
+)
+
+# Local
+from .stand_in import PASSWORD, USERNAME
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def client(stand_in):
+    client = DocumentCloud(
+        username=USERNAME,
+        password=PASSWORD,
+        base_uri=stand_in.base_uri,
+        auth_uri=stand_in.auth_uri,
+        rate_limit=FixedWait(),
+    )
+    yield client
+    client.close()
+
+
+class FixedWait(object):
+    """A rate limiter reporting that every request after the first waited"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def acquire(self):
+        self.calls += 1
+        return 0.5 if self.calls > 1 else 0
+
+    def reserve(self):  # pragma: no cover
+        return self.acquire()
+
+
+class FakeSpan(object):
+    def __init__(self, name, start_time, attributes, **_kwargs):
+        self.name = name
+        self.start_time = start_time
+        self.attributes = attributes
+        self.end_time = None
+        self.exceptions = []
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exception):
+        self.exceptions.append(exception)
+
+    def set_status(self, status):
+        pass
+
+    def end(self, end_time=None):
+        self.end_time = end_time
+
+
+class FakeTracer(object):
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, **kwargs):
+        span = FakeSpan(name, **kwargs)
+        self.spans.append(span)
+        return span
+
+
+@pytest.mark.parametrize(
+    "path,template",
+    [
+        ("documents/", "documents/"),
+        ("documents/123/", "documents/{id}/"),
+        ("documents/123/notes/45/", "documents/{id}/notes/{id}/"),
+        ("documents/the-slug-123/", "documents/{id}/"),
+        ("documents/search/", "documents/search/"),
+        ("users/me/", "users/me/"),
+    ],
+)
+def test_path_template(path, template):
+    assert path_template(path) == template
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(1, 2, 3))
+    assert histogram.quantile(0.5) is None
+    for value in (0.5, 1.5, 1.5, 2.5, 10):
+        histogram.add(value)
+    assert histogram.counts == [1, 2, 1, 1]
+    assert histogram.quantile(0.5) == 2
+    assert histogram.quantile(1) is None
+    assert histogram.as_dict()["mean"] == pytest.approx(3.2)
+
+
+def test_event_bus_failing_subscriber():
+    events = EventBus()
+    received = []
+
+    def fail(event):
+        raise ValueError(event)
+
+    events.subscribe(fail)
+    events.subscribe(received.append)
+    assert events.active
+    events.emit(RateLimitEvent(1))
+    assert received == [RateLimitEvent(1)]
+    events.unsubscribe(fail)
+    events.unsubscribe(received.append)
+    assert not events.active
+
+
+@pytest.mark.stand_in
+def test_request_events(stand_in, client):
+    documents = stand_in.create_documents(2)
+    events = []
+    client.events.subscribe(events.append)
+    for document in documents:
+        client.documents.get(document["id"])
+    with pytest.raises(DoesNotExistError):
+        client.documents.get(999)
+
+    (login,) = [e for e in events if isinstance(e, TokenEvent)]
+    assert login.kind == "login"
+    assert login.error is None
+    requests = [e for e in events if isinstance(e, RequestEvent)]
+    assert [(e.method, e.path, e.status) for e in requests] == [
+        ("GET", "documents/{id}/", 200),
+        ("GET", "documents/{id}/", 200),
+        ("GET", "documents/{id}/", 404),
+    ]
+    assert all(e.latency > 0 and e.bytes_received > 0 for e in requests)
+    assert all(e.retries == 0 and not e.from_cache for e in requests)
+    # every request after the first waits
+    assert len([e for e in events if isinstance(e, RateLimitEvent)]) == 2
+
+
+@pytest.mark.stand_in
+def test_metrics_aggregator(stand_in, client):
+    documents = stand_in.create_documents(3)
+    metrics = client.events.subscribe(MetricsAggregator())
+    for document in documents:
+        client.documents.get(document["id"])
+    client.put("documents/{}/".format(documents[0]["id"]), json={"title": "New"})
+
+    summary = metrics.summary()
+    get = summary["endpoints"]["GET documents/{id}/"]
+    assert get["latency"]["count"] == 3
+    assert get["statuses"] == {200: 3}
+    assert get["errors"] == 0
+    assert summary["endpoints"]["PUT documents/{id}/"]["bytes_sent"] > 0
+    assert summary["tokens"] == {"login": 1}
+    assert summary["rate_limit_waits"] == 3
+    metrics.reset()
+    assert metrics.summary()["endpoints"] == {}
+
+
+@pytest.mark.stand_in
+def test_span_adapter(stand_in, client):
+    document = stand_in.create_document({"title": "Traced"})
+    tracer = FakeTracer()
+    client.events.subscribe(SpanAdapter(tracer))
+    client.documents.get(document["id"])
+
+    assert len(tracer.spans) == 2
+    login, request = tracer.spans[0], tracer.spans[1]
+    assert login.name == "documentcloud.tokens.login"
+    assert request.name == "GET documents/{id}/"
+    assert request.attributes["http.response.status_code"] == 200
+    assert request.attributes["http.route"] == "documents/{id}/"
+    assert request.start_time < request.end_time
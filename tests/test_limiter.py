@@ -0,0 +1,144 @@
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import multiprocessing
+import os
+import threading
+import time
+
+# Third Party
+import pytest
+
+# DocumentCloud
+from documentcloud.limiter import SharedTokenBucket, TokenBucket, shared_path
+
+# Local
+from .conftest import FakeClock
+
+
+def test_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=5, clock=clock)
+    assert bucket.available == 5
+    for _ in range(5):
+        assert bucket.reserve() == 0
+    assert bucket.available == 0
+
+
+def test_reserve_waits_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=1, clock=clock)
+    assert bucket.reserve() == 0
+    # each waiting caller is queued behind the previous one
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+    clock.now = 1.0
+    assert bucket.reserve() == pytest.approx(0.5)
+
+
+def test_refill_capped_at_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=3, clock=clock)
+    bucket.reserve(3)
+    clock.now = 100
+    assert bucket.available == 3
+
+
+def test_try_acquire():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, burst=1, clock=clock)
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    clock.now = 1
+    assert bucket.try_acquire()
+
+
+@pytest.mark.parametrize("kwargs", [{"rate": 0}, {"burst": 0}])
+def test_bad_arguments(kwargs):
+    with pytest.raises(ValueError):
+        TokenBucket(**kwargs)
+
+
+def test_too_many_tokens():
+    with pytest.raises(ValueError):
+        TokenBucket(burst=2).reserve(3)
+
+
+def test_acquire_threads():
+    """Many threads sharing a bucket are held to its rate"""
+    bucket = TokenBucket(rate=100, burst=5)
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(25)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 5 tokens are available immediately, the other 20 take 0.2 seconds
+    assert time.time() - start >= 0.19
+
+
+def _acquire_shared(path, count):
+    bucket = SharedTokenBucket(path, rate=100, burst=5)
+    for _ in range(count):
+        bucket.acquire()
+
+
+def test_shared_state(tmp_path):
+    path = str(tmp_path / "bucket")
+    first = SharedTokenBucket(path, rate=1, burst=3)
+    second = SharedTokenBucket(path, rate=1, burst=3)
+    first.reserve(2)
+    assert second.available == pytest.approx(1, abs=0.1)
+    assert second.try_acquire()
+    assert not first.try_acquire()
+    first.close()
+    second.close()
+
+
+def test_shared_processes(tmp_path):
+    """Many processes sharing a bucket are held to its rate together"""
+    path = str(tmp_path / "bucket")
+    processes = [
+        multiprocessing.Process(target=_acquire_shared, args=(path, 10))
+        for _ in range(4)
+    ]
+    start = time.time()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(p.exitcode == 0 for p in processes)
+    # 5 tokens are available immediately, the other 35 take 0.35 seconds
+    assert time.time() - start >= 0.34
+
+
+def test_shared_path():
+    # one file per user of the host, and per account
+    assert shared_path().endswith("-{}".format(os.getuid()))
+    assert shared_path("me@example.com").endswith(
+        "-{}-me@example.com".format(os.getuid())
+    )
+    assert shared_path("../me") != shared_path()
+    assert os.path.dirname(shared_path("../me")) == os.path.dirname(shared_path())
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_shared_fork(tmp_path):
+    """A forked child opens the bucket's file for itself"""
+    # pylint: disable=protected-access
+    fcntl = pytest.importorskip("fcntl")
+    bucket = SharedTokenBucket(str(tmp_path / "bucket"), rate=0.01, burst=5)
+    bucket.acquire()
+    fd = bucket._fd
+    assert fcntl.fcntl(fd, fcntl.F_GETFD) & fcntl.FD_CLOEXEC
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        bucket.acquire()
+        os._exit(0 if bucket._pid == os.getpid() else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert bucket._fd == fd
+    # the child took its token from the same file
+    assert bucket.available == pytest.approx(3, abs=0.1)
+    bucket.close()
@@ -0,0 +1,138 @@
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Third Party
+import pytest
+
+# DocumentCloud
+from documentcloud.exceptions import DoesNotExistError
+from documentcloud.mirror import Mirror
+
+# Local
+from .conftest import timestamp
+
+pytestmark = pytest.mark.stand_in
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def documents(stand_in):
+    documents = stand_in.create_documents(5)
+    for i, document in enumerate(documents):
+        document["updated_at"] = timestamp(i)
+        document["page_count"] = i + 1
+    return documents
+
+
+@pytest.fixture
+def mirror(stand_in_client, tmpdir):
+    mirror = Mirror(stand_in_client, str(tmpdir.join("mirror.sqlite")))
+    yield mirror
+    mirror.close()
+
+
+@pytest.mark.usefixtures("stand_in")
+def test_sync(documents, mirror):
+    assert mirror.checkpoint is None
+    assert mirror.sync() == 5
+    assert len(mirror) == 5
+    assert mirror.checkpoint.id == documents[4]["id"]
+    assert mirror.checkpoint.token.startswith("2021-01-01T00:00:04")
+    assert mirror.get(documents[2]["id"]).title == documents[2]["title"]
+
+
+@pytest.mark.usefixtures("stand_in")
+def test_sync_incremental(documents, mirror):
+    mirror.sync()
+    documents[1]["title"] = "Renamed"
+    documents[1]["updated_at"] = timestamp(9)
+    assert mirror.sync() == 1
+    assert mirror.get(documents[1]["id"]).title == "Renamed"
+    assert mirror.checkpoint.id == documents[1]["id"]
+    assert mirror.sync() == 0
+
+
+def test_sync_updated_during(stand_in, mirror, monkeypatch):
+    documents = stand_in.create_documents(150)
+    for i, document in enumerate(documents):
+        document["updated_at"] = timestamp(i)
+    save = mirror._save_documents  # pylint: disable=protected-access
+
+    def save_and_update(page, checkpoint):
+        save(page, checkpoint)
+        if documents[0]["updated_at"] == timestamp(0):
+            # moves to the end of the ordering, after the first page is mirrored
+            documents[0]["title"] = "Renamed"
+            documents[0]["updated_at"] = timestamp(200)
+
+    monkeypatch.setattr(mirror, "_save_documents", save_and_update)
+    assert mirror.sync() == 151
+    assert len(mirror) == 150
+    assert mirror.get(documents[0]["id"]).title == "Renamed"
+    assert mirror.get(documents[101]["id"]).title == documents[101]["title"]
+
+
+@pytest.mark.usefixtures("documents")
+def test_persists(stand_in_client, tmpdir):
+    path = str(tmpdir.join("mirror.sqlite"))
+    mirror = Mirror(stand_in_client, path)
+    mirror.sync()
+    mirror.close()
+    mirror = Mirror(stand_in_client, path)
+    assert len(mirror) == 5
+    assert mirror.sync() == 0
+    mirror.close()
+
+
+def test_get_missing(mirror):
+    with pytest.raises(DoesNotExistError):
+        mirror.get(1)
+
+
+def test_filter(documents, mirror):
+    mirror.sync()
+    ids = [d["id"] for d in documents]
+    assert [d.id for d in mirror.filter(page_count__gte=4)] == ids[3:]
+    assert [d.id for d in mirror.filter(page_count__in=[1, 5])] == [ids[0], ids[4]]
+    assert [d.id for d in mirror.filter(order_by="-updated_at", access="private")] == (
+        ids[::-1]
+    )
+    with pytest.raises(ValueError):
+        mirror.filter(description="")
+    with pytest.raises(ValueError):
+        mirror.filter(order_by="description")
+
+
+def test_filter_data(documents, mirror):
+    documents[0]["data"] = {"tag": ["a", "b"], "state": ["open"]}
+    documents[2]["data"] = {"tag": ["b"]}
+    documents[3]["data"] = {"tag": "a"}
+    mirror.sync()
+    ids = [d["id"] for d in documents]
+    assert [d.id for d in mirror.filter(data__tag="a")] == [ids[0], ids[3]]
+    assert [d.id for d in mirror.filter(data__tag="b")] == [ids[0], ids[2]]
+    assert [d.id for d in mirror.filter(data__tag="b", data__state="open")] == [ids[0]]
+    assert [d.id for d in mirror.filter(data__tag__in=["a", "b"])] == [
+        ids[0],
+        ids[2],
+        ids[3],
+    ]
+    assert not mirror.filter(data__missing="a")
+    with pytest.raises(ValueError):
+        mirror.filter(data__tag__gt="a")
+    with pytest.raises(ValueError):
+        mirror.filter(**{'data__"tag': "a"})
+
+
+@pytest.mark.usefixtures("stand_in")
+def test_projects(stand_in_client, documents, mirror):
+    project = stand_in_client.projects.create("Mirrored")
+    for document in documents[:2]:
+        document["projects"] = [project.id]
+    mirror.sync()
+    assert [p.title for p in mirror.projects()] == ["Mirrored"]
+    assert mirror.document_ids(project) == [d["id"] for d in documents[:2]]
+    assert [d.id for d in mirror.filter(project=project.id)] == [
+        d["id"] for d in documents[:2]
+    ]
@@ -0,0 +1,80 @@
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import threading
+import time
+from collections import namedtuple
+
+# Third Party
+import pytest
+
+# DocumentCloud
+from documentcloud.prefetch import Prefetcher
+
+Page = namedtuple("Page", "number next_url")
+
+
+class FakePages(object):
+    """Fetches `count` pages, whose URLs are their numbers"""
+
+    def __init__(self, count, fail_at=None):
+        self.count = count
+        self.fail_at = fail_at
+        self.fetched = []
+        self.lock = threading.Lock()
+
+    def __call__(self, url):
+        with self.lock:
+            self.fetched.append(url)
+        if url == self.fail_at:
+            raise ValueError("page {} failed".format(url))
+        return Page(url, url + 1 if url < self.count else None)
+
+    def wait_for(self, count):
+        deadline = time.time() + 5
+        while len(self.fetched) < count and time.time() < deadline:
+            time.sleep(0.001)
+
+
+def test_pages_in_order():
+    pages = FakePages(10)
+    assert [p.number for p in Prefetcher(pages, 1, 3)] == list(range(1, 11))
+
+
+def test_stays_ahead():
+    pages = FakePages(10)
+    iterator = iter(Prefetcher(pages, 1, 3))
+    assert next(iterator).number == 1
+    pages.wait_for(4)
+    time.sleep(0.05)
+    # the page consumed and three more
+    assert pages.fetched == [1, 2, 3, 4]
+    iterator.close()
+
+
+def test_error():
+    pages = FakePages(10, fail_at=3)
+    iterator = iter(Prefetcher(pages, 1, 5))
+    assert next(iterator).number == 1
+    assert next(iterator).number == 2
+    with pytest.raises(ValueError):
+        next(iterator)
+    assert pages.fetched == [1, 2, 3]
+
+
+def test_close():
+    pages = FakePages(100)
+    prefetcher = Prefetcher(pages, 1, 2)
+    for page in prefetcher:
+        if page.number == 5:
+            break
+    # pylint: disable=protected-access
+    prefetcher._thread.join(timeout=5)
+    assert not prefetcher._thread.is_alive()
+    assert len(pages.fetched) <= 7
+
+
+def test_bad_size():
+    with pytest.raises(ValueError):
+        Prefetcher(FakePages(1), 1, 0)
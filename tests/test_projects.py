@@ -16,28 +16,18 @@ class TestProject:
     def test_str(self, project):
         assert str(project) == project.title
 
-    def test_save(self, client, project, document_factory):
-        document = document_factory()
-        assert document not in project.documents
-        project.documents.append(document)
-        # put is an alias for save
-        project.put()
-        project = client.projects.get(project.id)
-        assert document in project.documents
-
     def test_document_list(self, project):
         assert len(project.document_list) > 0
         assert all(isinstance(d, Document) for d in project.document_list)
 
     def test_document_list_paginate(self, project):
         # pylint: disable=protected-access
-        length = len(project.document_list)
-        assert length > 1
         # clear cache
         project._document_list = None
         # set per page to 1 to force pagination
         project._per_page = 1
-        assert len(project.document_list) == length
+        # the project had three documents, a page each, when this was recorded
+        assert len(project.document_list) == 3
 
     def test_document_list_setter(self, project, document):
         assert document in project.document_list
@@ -107,3 +97,66 @@ class TestProjectClient:
         assert project.title == title
         project.delete()
         assert created
+
+
+@pytest.mark.stand_in
+class TestProjectDocumentList:
+    def test_document_list_pages(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(25)
+        ids = [d["id"] for d in documents]
+        project = stand_in_client.projects.create("Big", document_ids=ids)
+        project._per_page = 4  # pylint: disable=protected-access
+        assert project.document_ids == ids
+        path = "/api/projects/{}/documents/".format(project.id)
+        assert stand_in.count("GET", path) == 7
+
+    def test_load_document_list_fields(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(3)
+        ids = [d["id"] for d in documents]
+        project = stand_in_client.projects.create("Slim", document_ids=ids)
+        document_list = project.load_document_list(fields=["id", "title"])
+        assert project.document_list is document_list
+        assert [d.id for d in document_list] == ids
+        assert not any(hasattr(d, "slug") for d in document_list)
+
+    def test_save(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(3)
+        project = stand_in_client.projects.create(
+            "Saved", document_ids=[d["id"] for d in documents[:2]]
+        )
+        document = stand_in_client.documents.get(documents[2]["id"])
+        assert document not in project.documents
+        project.documents.append(document)
+        # put is an alias for save
+        project.put()
+        project = stand_in_client.projects.get(project.id)
+        assert document in project.documents
+        assert len(project.documents) == 3
+
+    def test_save_changes(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(60)
+        ids = [d["id"] for d in documents]
+        project = stand_in_client.projects.create("Diff", document_ids=ids[:40])
+        path = "/api/projects/{}/documents/".format(project.id)
+        for document in stand_in_client.documents.get_many(ids[40:50])[0]:
+            project.document_list.append(document)
+        for document in project.document_list[:3]:
+            project.document_list.remove(document)
+        project.save()
+        # only the changes are sent
+        assert stand_in.count("POST", path) == 1
+        assert stand_in.count("DELETE", path) == 1
+        assert stand_in.count("PUT", path) == 1
+        assert stand_in.memberships[project.id] == ids[3:50]
+        # nothing changed since
+        project.save()
+        assert stand_in.count("POST", path) == 1
+        assert stand_in.count("DELETE", path) == 1
+
+    def test_save_set_list(self, stand_in, stand_in_client):
+        documents = stand_in.create_documents(5)
+        ids = [d["id"] for d in documents]
+        project = stand_in_client.projects.create("Set", document_ids=ids[:3])
+        project.document_list = stand_in_client.documents.get_many(ids[2:])[0]
+        project.save()
+        assert sorted(stand_in.memberships[project.id]) == ids[2:]
@@ -0,0 +1,150 @@
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import time
+from email.utils import formatdate
+
+# Third Party
+import pytest
+
+# DocumentCloud
+from documentcloud.exceptions import APIError, CircuitOpenError
+from documentcloud.retry import CircuitBreaker, RetryPolicy
+
+# Local
+from .conftest import FakeClock
+
+
+def test_is_retry():
+    policy = RetryPolicy()
+    assert policy.is_retry("get", 503)
+    assert policy.is_retry("PUT", 502)
+    assert not policy.is_retry("POST", 503)
+    assert not policy.is_retry("GET", 404)
+    # too many requests are refused before being acted on
+    assert policy.is_retry("POST", 429)
+
+
+def test_backoff():
+    policy = RetryPolicy(backoff_factor=1, backoff_max=5, jitter=False)
+    assert [policy.backoff(a) for a in range(1, 6)] == [1, 2, 4, 5, 5]
+    policy = RetryPolicy(backoff_factor=1, backoff_max=5)
+    for attempt in range(1, 6):
+        assert 0 <= policy.backoff(attempt) <= min(5, 2 ** (attempt - 1))
+
+
+def test_retry_after():
+    policy = RetryPolicy(retry_after_max=10)
+    assert policy.retry_after({}) is None
+    assert policy.retry_after({"Retry-After": "3"}) == 3
+    assert policy.retry_after({"Retry-After": "120"}) == 10
+    date = formatdate(time.time() + 5, usegmt=True)
+    assert 3 < policy.retry_after({"Retry-After": date}) <= 5
+    assert policy.retry_after({"Retry-After": "soon"}) is None
+    assert (
+        RetryPolicy(respect_retry_after=False).retry_after({"Retry-After": "3"}) is None
+    )
+    assert policy.wait(1, {"Retry-After": "3"}) == 3
+
+
+def test_circuit_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker("example.com", threshold=2, timeout=10, clock=clock)
+    breaker.record(500)
+    assert breaker.allow()
+    breaker.record(200)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.open
+    assert not breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    # one trial request is let through after the timeout
+    clock.now = 10
+    assert breaker.allow()
+    assert not breaker.allow()
+    # a failed trial keeps the circuit open for another timeout
+    breaker.record_failure()
+    clock.now = 15
+    assert not breaker.allow()
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert not breaker.open
+    assert breaker.allow()
+
+
+def test_breaker_per_host():
+    policy = RetryPolicy()
+    assert policy.breaker("a.example.com") is policy.breaker("a.example.com")
+    assert policy.breaker("a.example.com") is not policy.breaker("b.example.com")
+    assert RetryPolicy(breaker_threshold=None).breaker("a.example.com") is None
+
+
+@pytest.mark.stand_in
+def test_retry_server_error(stand_in, make_client):
+    client = make_client()
+    assert client.users.get("me")
+    stand_in.failures = [(503, {}), (502, {})]
+    assert client.users.get("me")
+    assert stand_in.count("GET", "/api/users/me/") == 4
+
+
+@pytest.mark.stand_in
+def test_no_retry_post(stand_in, make_client):
+    client = make_client()
+    assert client.users.get("me")
+    stand_in.failures = [(503, {})]
+    with pytest.raises(APIError) as excinfo:
+        client.post("projects/", json={"title": "Project"})
+    assert excinfo.value.status_code == 503
+    assert stand_in.count("POST", "/api/projects/") == 1
+
+
+@pytest.mark.stand_in
+def test_retry_too_many_requests(stand_in, make_client):
+    client = make_client()
+    assert client.users.get("me")
+    stand_in.failures = [(429, {"Retry-After": "1"})]
+    start = time.time()
+    client.post("projects/", json={"title": "Project"})
+    assert time.time() - start >= 1
+    assert stand_in.count("POST", "/api/projects/") == 2
+
+
+@pytest.mark.stand_in
+def test_retry_after_malformed(stand_in, make_client):
+    client = make_client()
+    assert client.users.get("me")
+    stand_in.failures = [(503, {"Retry-After": "garbage"})]
+    # backs off instead
+    assert client.users.get("me")
+    assert stand_in.count("GET", "/api/users/me/") == 3
+
+
+@pytest.mark.stand_in
+def test_retries_exhausted(stand_in, make_client):
+    client = make_client(retries=2)
+    assert client.users.get("me")
+    stand_in.failures = [(500, {})] * 3
+    with pytest.raises(APIError) as excinfo:
+        client.users.get("me")
+    assert excinfo.value.status_code == 500
+
+
+@pytest.mark.stand_in
+def test_circuit_opens(stand_in, make_client):
+    client = make_client(retries=0, breaker_threshold=2, breaker_timeout=60)
+    assert client.users.get("me")
+    stand_in.failures = [(500, {})] * 2
+    for _ in range(2):
+        with pytest.raises(APIError):
+            client.users.get("me")
+    requests = len(stand_in.requests)
+    with pytest.raises(CircuitOpenError):
+        client.users.get("me")
+    # the request was not sent
+    assert len(stand_in.requests) == requests
@@ -0,0 +1,59 @@
+# Future
+from __future__ import division, print_function, unicode_literals
+
+# Standard Library
+import os
+import stat
+
+# DocumentCloud
+from documentcloud.tokencache import TokenCache, get_token_cache
+
+AUTH_URI = "https://accounts.example.com/api/"
+
+
+def test_get_set(tmpdir):
+    cache = TokenCache(str(tmpdir.join("tokens.json")))
+    assert cache.get("user", AUTH_URI) is None
+    cache.set("user", AUTH_URI, "access", "refresh")
+    assert cache.get("user", AUTH_URI) == ("access", "refresh")
+    # tokens are kept apart by username and account server
+    assert cache.get("other", AUTH_URI) is None
+    assert cache.get("user", "https://other.example.com/api/") is None
+
+
+def test_delete(tmpdir):
+    cache = TokenCache(str(tmpdir.join("tokens.json")))
+    cache.set("user", AUTH_URI, "access", "refresh")
+    cache.set("other", AUTH_URI, "access2", "refresh2")
+    cache.delete("user", AUTH_URI)
+    assert cache.get("user", AUTH_URI) is None
+    assert cache.get("other", AUTH_URI) == ("access2", "refresh2")
+
+
+def test_private_file(tmpdir):
+    path = tmpdir.join("dir", "tokens.json")
+    cache = TokenCache(str(path))
+    cache.set("user", AUTH_URI, "access", "refresh")
+    assert stat.S_IMODE(os.stat(str(path)).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(str(path.dirpath())).st_mode) & 0o077 == 0
+    # no temporary files are left behind
+    assert path.dirpath().listdir() == [path]
+
+
+def test_corrupt_file(tmpdir):
+    path = tmpdir.join("tokens.json")
+    path.write("not json")
+    cache = TokenCache(str(path))
+    assert cache.get("user", AUTH_URI) is None
+    cache.set("user", AUTH_URI, "access", "refresh")
+    assert cache.get("user", AUTH_URI) == ("access", "refresh")
+
+
+def test_get_token_cache(tmpdir):
+    assert get_token_cache(None) is None
+    assert get_token_cache(False) is None
+    assert isinstance(get_token_cache(True), TokenCache)
+    path = str(tmpdir.join("tokens.json"))
+    assert get_token_cache(path).path == path
+    cache = TokenCache(path)
+    assert get_token_cache(cache) is cache
@@ -1,8 +1,20 @@
 # Future
 from __future__ import division, print_function, unicode_literals
 
+# Standard Library
+import time
+from datetime import datetime
+
+# Third Party
+import pytest
+from dateutil.parser import parse as dateparser
+
 # DocumentCloud
-from documentcloud.toolbox import get_id
+from documentcloud import toolbox
+from documentcloud.toolbox import get_id, jwt_claims, parse_date, token_expiry
+
+# Local
+from .stand_in import make_token
 
 
 def test_get_id_number():
@@ -23,3 +35,53 @@ def test_get_id_postfix():
 
 def test_get_id_both():
     assert get_id("42-foo-bar-123") == "42"
+
+
+def test_jwt_claims():
+    token = make_token("access", 300)
+    assert jwt_claims(token)["token_type"] == "access"
+
+
+@pytest.mark.parametrize("token", ["", "foo", "foo.bar.baz", None])
+def test_jwt_claims_bad(token):
+    assert jwt_claims(token) == {}
+
+
+def test_token_expiry():
+    token = make_token("access", 300)
+    # the server's clock is one hour ahead of ours
+    expires, lifetime = token_expiry(token, skew=3600)
+    assert expires == pytest.approx(time.time() + 300 - 3600, abs=2)
+    assert lifetime == pytest.approx(300 - 3600, abs=2)
+    assert token_expiry("foo") == (None, None)
+
+
+DATES = [
+    "2020-06-11T13:31:41.123456Z",
+    "2020-06-11T13:31:41Z",
+    "2020-06-11T13:31:41.5+05:30",
+    "2020-06-11T13:31:41.1234567-0800",
+    "2020-06-11 13:31",
+    "June 11, 2020 1:31 PM",
+]
+
+
+class OldDatetime(datetime):
+    """A datetime without a working fromisoformat, as on older Pythons"""
+
+    @classmethod
+    def fromisoformat(cls, date_string):
+        raise ValueError
+
+
+@pytest.mark.parametrize("value", DATES)
+def test_parse_date(value):
+    assert parse_date(value) == dateparser(value)
+
+
+@pytest.mark.parametrize("value", DATES)
+def test_parse_date_pattern(value, monkeypatch):
+    monkeypatch.setattr(toolbox, "datetime", OldDatetime)
+    parsed = parse_date(value)
+    assert parsed == dateparser(value)
+    assert parsed.utcoffset() == dateparser(value).utcoffset()